@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Sequence
+import numpy as np
+
+POLLUTANTS = ["pm25", "pm10", "no2", "o3", "co"]
+BUCKETS = {
+    "hour": "datetime64[h]",
+    "day": "datetime64[D]",
+    "week": "datetime64[D]"
+}
+
+
+def bucket_label(pollutant: str, stat: str) -> str:
+    return f"{pollutant}_{stat}"
+
+
+def _truncate(timestamps: np.ndarray, bucket: str) -> np.ndarray:
+    """Trunca timestamps al inicio del bucket (semanas inician en lunes, como date_trunc)"""
+    truncated = timestamps.astype(BUCKETS[bucket])
+    if bucket == "week":
+        # 1970-01-01 fue jueves: desplazar al lunes anterior
+        days = truncated.astype(np.int64)
+        truncated = (days - (days + 3) % 7).astype("datetime64[D]")
+    return truncated
+
+
+def _stat(values: np.ndarray, func, *args):
+    if values.size == 0:
+        return None
+    return float(func(values, *args))
+
+
+def aggregate_rows(
+    rows: Sequence[Sequence],
+    bucket: str,
+    pollutants: List[str],
+    percentiles: List[int]
+):
+    """Agrega filas (timestamp, *pollutants) por bucket con NumPy.
+
+    Implementación de respaldo para motores sin date_trunc/percentile_cont
+    (SQLite). Produce las mismas etiquetas que la versión SQL: count y, por
+    contaminante, mean/min/max/p<N>. Los valores nulos se ignoran.
+    """
+    if not rows:
+        return []
+
+    timestamps = np.array([row[0] for row in rows], dtype="datetime64[us]")
+    values = np.array(
+        [[np.nan if value is None else value for value in row[1:]] for row in rows],
+        dtype=np.float64
+    ).reshape(len(rows), len(pollutants))
+
+    keys = _truncate(timestamps, bucket)
+    buckets, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(buckets) + 1))
+
+    results = []
+    for index, key in enumerate(buckets):
+        members = values[order[bounds[index]:bounds[index + 1]]]
+        result = {
+            "bucket": key.astype("datetime64[us]").item(),
+            "count": int(members.shape[0])
+        }
+        for column, pollutant in enumerate(pollutants):
+            series = members[:, column]
+            series = series[~np.isnan(series)]
+            result[bucket_label(pollutant, "mean")] = _stat(series, np.mean)
+            result[bucket_label(pollutant, "min")] = _stat(series, np.min)
+            result[bucket_label(pollutant, "max")] = _stat(series, np.max)
+            for percentile in percentiles:
+                result[bucket_label(pollutant, f"p{percentile}")] = _stat(
+                    series, np.percentile, percentile
+                )
+        results.append(result)
+    return results
+
+
+ROLLUP_GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1)
+}
+
+
+def truncate_datetime(value: datetime, granularity: str) -> datetime:
+    if granularity == "day":
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _empty_rollup():
+    rollup = {"count": 0}
+    for pollutant in POLLUTANTS:
+        rollup[f"{pollutant}_count"] = 0
+        rollup[f"{pollutant}_sum"] = None
+        rollup[f"{pollutant}_min"] = None
+        rollup[f"{pollutant}_max"] = None
+    return rollup
+
+
+def _fold(rollup: dict, pollutant: str, count: int, total, minimum, maximum):
+    if not count:
+        return
+    rollup[f"{pollutant}_count"] += count
+    current_sum = rollup[f"{pollutant}_sum"]
+    current_min = rollup[f"{pollutant}_min"]
+    current_max = rollup[f"{pollutant}_max"]
+    rollup[f"{pollutant}_sum"] = total if current_sum is None else current_sum + total
+    rollup[f"{pollutant}_min"] = minimum if current_min is None else min(current_min, minimum)
+    rollup[f"{pollutant}_max"] = maximum if current_max is None else max(current_max, maximum)
+
+
+def rollup_readings(rows: Iterable[Sequence], granularity: str):
+    """Agrupa filas (source, timestamp, pm25, pm10, no2, o3, co) en rollups.
+
+    Retorna un diccionario {(source, bucket_start): rollup} con count y,
+    por contaminante, _count/_sum/_min/_max (los nulos no se cuentan).
+    """
+    rollups = {}
+    for source, timestamp, *values in rows:
+        key = (source, truncate_datetime(timestamp, granularity))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = _empty_rollup()
+        rollup["count"] += 1
+        for pollutant, value in zip(POLLUTANTS, values):
+            if value is not None:
+                _fold(rollup, pollutant, 1, value, value, value)
+    return rollups
+
+
+def merge_rollups(rollups: Iterable[dict], granularity: str):
+    """Combina rollups (p. ej. horarios) en buckets más grandes (p. ej. diarios)"""
+    merged = {}
+    for item in rollups:
+        key = (item["source"], truncate_datetime(item["bucket_start"], granularity))
+        rollup = merged.get(key)
+        if rollup is None:
+            rollup = merged[key] = _empty_rollup()
+        rollup["count"] += item["count"]
+        for pollutant in POLLUTANTS:
+            _fold(
+                rollup, pollutant,
+                item[f"{pollutant}_count"],
+                item[f"{pollutant}_sum"],
+                item[f"{pollutant}_min"],
+                item[f"{pollutant}_max"]
+            )
+    return merged
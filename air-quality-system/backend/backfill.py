@@ -0,0 +1,280 @@
+"""Recarga histórica de lecturas de Open-Meteo por fragmentos de fechas.
+
+El rango se divide en fragmentos de BACKFILL_CHUNK_DAYS días que se piden en
+paralelo (BACKFILL_CONCURRENCY) sin superar BACKFILL_RATE_LIMIT peticiones
+por segundo. Cada fragmento se guarda en cuanto llega con el upsert por lotes
+y queda marcado en ``backfill_jobs``; al reanudar un trabajo solo se piden
+los fragmentos pendientes. Volver a guardar un fragmento es idempotente.
+
+El rango termina como máximo hoy y cubre a lo sumo BACKFILL_MAX_DAYS días.
+Solo una recarga corre a la vez entre todos los procesos: el estado
+'running' se asigna en la base de datos (ver BackfillRepository.claim_job).
+Las lecturas se guardan con store_batch_readings, que incrementa la versión
+de las lecturas; la API invalida sus cachés y ETag aunque la recarga corra
+desde esta CLI.
+
+Uso:
+    python backfill.py run --start 2024-01-01 --end 2024-12-31 [--chunk-days 30]
+    python backfill.py resume JOB_ID
+    python backfill.py status [JOB_ID]
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+import config
+import models
+from database import SessionLocal, engine
+from migrations import run_migrations
+from repositories.crud import AirQualityRepository, BackfillRepository
+from data_collectors.registry import normalize_reading
+
+SOURCE = "openmeteo"
+
+
+class BackfillConflictError(Exception):
+    """Otra recarga histórica está en curso"""
+
+
+class RateLimiter:
+    """Espacia las peticiones para no superar ``rate`` por segundo"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def split_range(start_date: date, end_date: date, chunk_days: int) -> List[Tuple[date, date]]:
+    """Fragmentos [inicio, fin] (inclusive) de ``chunk_days`` días que cubren el rango"""
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def validate_range(start_date: date, end_date: date, today: Optional[date] = None) -> Tuple[date, date]:
+    """Recorta ``end_date`` a hoy y valida el rango; lanza ValueError si no es válido"""
+    end_date = min(end_date, today or date.today())
+    if start_date > end_date:
+        raise ValueError("start_date debe ser anterior o igual a end_date y a la fecha actual")
+    days = (end_date - start_date).days + 1
+    if days > config.BACKFILL_MAX_DAYS:
+        raise ValueError(f"El rango ({days} días) supera el máximo de {config.BACKFILL_MAX_DAYS} días")
+    return start_date, end_date
+
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(minutes=config.BACKFILL_STALE_MINUTES)
+
+
+def claim_job(job_id: int) -> bool:
+    """Asigna la recarga a este proceso; False si otra recarga está en curso"""
+    db = SessionLocal()
+    try:
+        return BackfillRepository.claim_job(db, job_id, _stale_before())
+    finally:
+        db.close()
+
+
+def _load_job(job_id: int):
+    db = SessionLocal()
+    try:
+        job = BackfillRepository.get_job(db, job_id)
+        if job is None:
+            return None
+        return {**job.to_dict(), "completed": set(job.completed_chunks or [])}
+    finally:
+        db.close()
+
+
+def _set_status(job_id: int, status: str, error: Optional[str] = None):
+    db = SessionLocal()
+    try:
+        BackfillRepository.set_status(db, job_id, status, error)
+    finally:
+        db.close()
+
+
+def _store_chunk(job_id: int, chunk_start: date, readings: List[dict]):
+    """Guarda un fragmento y registra el punto de control; None si falla"""
+    db = SessionLocal()
+    try:
+        counts = AirQualityRepository.store_batch_readings(db, readings)
+        if counts is not None and BackfillRepository.record_chunk(db, job_id, chunk_start, counts) is None:
+            return None
+        return counts
+    finally:
+        db.close()
+
+
+def create_job(start_date: date, end_date: date, chunk_days: int = config.BACKFILL_CHUNK_DAYS):
+    """Valida el rango y registra una recarga pendiente; retorna su id (None si falla).
+
+    Lanza ValueError si el rango no es válido y BackfillConflictError si otra
+    recarga está en curso.
+    """
+    start_date, end_date = validate_range(start_date, end_date)
+    db = SessionLocal()
+    try:
+        running = BackfillRepository.get_running_job(db, _stale_before())
+        if running is not None:
+            raise BackfillConflictError(f"La recarga {running.id} está en curso")
+        job = BackfillRepository.create_job(db, SOURCE, start_date, end_date, chunk_days)
+        return job.id if job else None
+    finally:
+        db.close()
+
+
+async def run_job(
+    job_id: int,
+    collector,
+    concurrency: int = config.BACKFILL_CONCURRENCY,
+    rate_limit: float = config.BACKFILL_RATE_LIMIT,
+    on_chunk: Optional[Callable[[dict], Awaitable]] = None,
+    claimed: bool = False
+):
+    """Ejecuta (o reanuda) una recarga histórica.
+
+    ``collector`` expone ``fetch_range(start_date, end_date)``. Las
+    peticiones corren en paralelo, pero los fragmentos se escriben de uno en
+    uno para no competir por la base de datos. Un fragmento sin respuesta o
+    sin lecturas falla y no queda registrado, así que al reanudar se vuelve
+    a pedir. ``on_chunk`` recibe los
+    conteos de cada fragmento guardado. Si quien llama no asignó ya la
+    recarga con claim_job (``claimed``), se asigna aquí; lanza
+    BackfillConflictError si otra recarga está en curso. Retorna el estado
+    final del trabajo.
+    """
+    job = await asyncio.to_thread(_load_job, job_id)
+    if job is None:
+        raise ValueError(f"No existe la recarga {job_id}")
+    if not claimed and not await asyncio.to_thread(claim_job, job_id):
+        raise BackfillConflictError(f"Otra recarga está en curso; no se puede ejecutar la {job_id}")
+
+    chunks = [
+        chunk for chunk in split_range(
+            date.fromisoformat(job["start_date"]),
+            date.fromisoformat(job["end_date"]),
+            job["chunk_days"]
+        )
+        if chunk[0].isoformat() not in job["completed"]
+    ]
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = RateLimiter(rate_limit)
+    write_lock = asyncio.Lock()
+
+    async def process(chunk_start: date, chunk_end: date):
+        async with semaphore:
+            await limiter.acquire()
+            data = await collector.fetch_range(chunk_start, chunk_end)
+        if data is None:
+            raise RuntimeError(f"sin respuesta para {chunk_start} a {chunk_end}")
+
+        readings = [
+            reading for reading in (normalize_reading(SOURCE, raw) for raw in data)
+            if reading is not None
+        ]
+        # Un fragmento siempre cubre al menos un día: sin lecturas es un error
+        # de la fuente (p. ej. campos faltantes), no un fragmento terminado
+        if not readings:
+            raise RuntimeError(f"sin lecturas para {chunk_start} a {chunk_end}")
+        async with write_lock:
+            counts = await asyncio.to_thread(_store_chunk, job_id, chunk_start, readings)
+        if counts is None:
+            raise RuntimeError(f"no se pudo guardar {chunk_start} a {chunk_end}")
+        print(f"Recarga {job_id}: {chunk_start} a {chunk_end} {counts}")
+        if on_chunk is not None:
+            await on_chunk(counts)
+        return counts
+
+    try:
+        results = await asyncio.gather(
+            *(process(*chunk) for chunk in chunks),
+            return_exceptions=True
+        )
+    except asyncio.CancelledError:
+        # Los fragmentos guardados ya quedaron registrados; se puede reanudar
+        await asyncio.to_thread(_set_status, job_id, "interrupted")
+        raise
+
+    errors = [str(result) for result in results if isinstance(result, Exception)]
+    if errors:
+        status = "failed"
+        error = f"{len(errors)} fragmentos fallaron: {errors[0]}"
+    else:
+        status, error = "completed", None
+    await asyncio.to_thread(_set_status, job_id, status, error)
+    return status
+
+
+def _print_jobs(job_id: Optional[int]):
+    db = SessionLocal()
+    try:
+        jobs = [BackfillRepository.get_job(db, job_id)] if job_id else BackfillRepository.get_jobs(db)
+        for job in jobs:
+            if job is not None:
+                print(job.to_dict())
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recarga histórica de lecturas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run = subparsers.add_parser("run")
+    run.add_argument("--start", type=date.fromisoformat, required=True)
+    run.add_argument("--end", type=date.fromisoformat, required=True)
+    run.add_argument("--chunk-days", type=int, default=config.BACKFILL_CHUNK_DAYS)
+    resume = subparsers.add_parser("resume")
+    resume.add_argument("job_id", type=int)
+    status = subparsers.add_parser("status")
+    status.add_argument("job_id", type=int, nargs="?")
+    args = parser.parse_args()
+
+    # Mismo esquema que al arrancar la API: una base existente puede no
+    # tener aún columnas como raw_batch_id o quadrant_name
+    models.Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    if args.command == "status":
+        _print_jobs(args.job_id)
+        return
+
+    from data_collectors.air_quality_collector import OpenMeteoCollector
+    from data_collectors.http_client import close_http_client
+
+    try:
+        job_id = args.job_id if args.command == "resume" else create_job(args.start, args.end, args.chunk_days)
+    except (ValueError, BackfillConflictError) as e:
+        raise SystemExit(str(e))
+    if job_id is None:
+        raise SystemExit("No se pudo crear la recarga")
+
+    async def execute():
+        try:
+            return await run_job(job_id, OpenMeteoCollector())
+        finally:
+            await close_http_client()
+
+    try:
+        print(f"Recarga {job_id}: {asyncio.run(execute())}")
+    except (ValueError, BackfillConflictError) as e:
+        raise SystemExit(str(e))
+    _print_jobs(job_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Benchmarks de las rutas críticas de ingesta, consulta y serialización.
+
+Siembra una base de datos local con historial sintético y mide cada
+operación varias veces; el resultado se emite como JSON para comparar
+entre commits.
+
+Uso:
+    python benchmarks.py --rows 10k --output bench.json
+    python benchmarks.py --rows 1M --database-url postgresql://localhost/bench
+    python benchmarks.py --rows 10k --compare bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SIZES = {"10k": 10_000, "1M": 1_000_000, "10M": 10_000_000}
+# Estaciones sintéticas; las horas de historial se derivan del número de filas
+BENCH_LOCATIONS = 100
+BENCH_START = datetime(2024, 1, 1)
+SEED_CHUNK_SIZE = 20_000
+BATCH_SIZE = 1000
+
+
+def _parse_rows(value: str) -> int:
+    return SIZES.get(value) or int(value)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat: int, setup=None):
+    """Ejecuta ``func`` ``repeat`` veces y retorna estadísticas en milisegundos.
+
+    La salida estándar se descarta durante la medición para que los
+    ``print`` de los repositorios no contaminen el JSON.
+    """
+    timings = []
+    for iteration in range(repeat):
+        argument = setup(iteration) if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if setup:
+                func(argument)
+            else:
+                func()
+            timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+        "max_ms": max(timings)
+    }
+
+
+def seed_database(engine, rows: int):
+    """Siembra ``rows`` lecturas sintéticas, reutilizando la base si ya las tiene"""
+    from sqlalchemy import func, select
+    import models
+    from data_collectors.synthetic import generate_dataset, grid_locations, iter_records
+    from quadrants import QUADRANT_INDEX
+
+    table = models.AirQualityReading.__table__
+    hours = max(1, rows // BENCH_LOCATIONS)
+    end = BENCH_START + timedelta(hours=hours)
+    with engine.begin() as conn:
+        # Quitar lotes de corridas anteriores para que las inserciones medidas sean nuevas
+        conn.execute(table.delete().where(table.c.timestamp >= end))
+        existing = conn.execute(select(func.count()).select_from(table)).scalar()
+    if existing == hours * BENCH_LOCATIONS:
+        return existing
+
+    locations = grid_locations(BENCH_LOCATIONS)
+    chunk_hours = max(1, SEED_CHUNK_SIZE // BENCH_LOCATIONS)
+    with engine.begin() as conn:
+        conn.execute(table.delete())
+        # Generar por bloques de horas para que la memoria no dependa de ``rows``
+        for offset in range(0, hours, chunk_hours):
+            columns = generate_dataset(
+                BENCH_START + timedelta(hours=offset), min(chunk_hours, hours - offset), locations
+            )
+            quadrant_names = QUADRANT_INDEX.lookup(columns["latitude"], columns["longitude"])
+            chunk = next(iter_records(columns, chunk_size=SEED_CHUNK_SIZE))
+            for reading, quadrant_name in zip(chunk, quadrant_names):
+                reading["quadrant_name"] = quadrant_name
+            conn.execute(table.insert(), chunk)
+    return hours * BENCH_LOCATIONS
+
+
+def run_benchmarks(rows: int, repeat: int):
+    # Importar después de fijar DATABASE_URL
+    from fastapi.testclient import TestClient
+    import models
+    from database import SessionLocal, engine
+    from migrations import run_migrations
+    from data_collectors.synthetic import generate_dataset, grid_locations, iter_records
+    from repositories.crud import AirQualityRepository, QuadrantStatsRepository
+    from serialization import serialize_rows
+    import main
+
+    models.Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    seed_start = time.perf_counter()
+    seeded = seed_database(engine, rows)
+    seed_seconds = time.perf_counter() - seed_start
+
+    hours = max(1, seeded // BENCH_LOCATIONS)
+    end = BENCH_START + timedelta(hours=hours)
+    window_start = end - timedelta(hours=24)
+    results = {}
+    # Sin expirar en commit: las lecturas ORM cargadas se reutilizan entre mediciones
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        # Lotes nuevos después del historial sembrado (inserción) y el mismo lote otra vez (sin cambios)
+        batch_hours = BATCH_SIZE // BENCH_LOCATIONS
+        batches = [
+            next(iter_records(
+                generate_dataset(end + timedelta(hours=batch_hours * i), batch_hours, grid_locations(BENCH_LOCATIONS)),
+                chunk_size=BATCH_SIZE
+            ))
+            for i in range(repeat)
+        ]
+        results["store_batch_readings.insert"] = measure(
+            lambda batch: AirQualityRepository.store_batch_readings(db, batch),
+            repeat,
+            setup=lambda i: batches[i]
+        )
+        results["store_batch_readings.unchanged"] = measure(
+            lambda batch: AirQualityRepository.store_batch_readings(db, batch),
+            repeat,
+            setup=lambda i: batches[i]
+        )
+
+        results["get_readings_in_timeframe.24h"] = measure(
+            lambda: AirQualityRepository.get_readings_in_timeframe(db, window_start, end, limit=5000),
+            repeat
+        )
+        results["get_readings_count_in_timeframe.all"] = measure(
+            lambda: AirQualityRepository.get_readings_count_in_timeframe(db, BENCH_START, end),
+            repeat
+        )
+
+        orm_readings = db.query(models.AirQualityReading)\
+            .filter(models.AirQualityReading.timestamp >= window_start)\
+            .limit(BATCH_SIZE).all()
+        results["calculate_quadrant_stats.1000"] = measure(
+            lambda: QuadrantStatsRepository.calculate_quadrant_stats(db, "benchmark", orm_readings),
+            repeat
+        )
+        results["update_running_stats"] = measure(
+            lambda: QuadrantStatsRepository.update_running_stats(db),
+            repeat
+        )
+
+        results["to_dict.1000"] = measure(
+            lambda: [reading.to_dict() for reading in orm_readings],
+            repeat
+        )
+        core_rows = AirQualityRepository.get_readings_in_timeframe(db, window_start, end, limit=BATCH_SIZE)
+        results["serialize_rows.columns.1000"] = measure(
+            lambda: serialize_rows(core_rows, "columns"),
+            repeat
+        )
+    finally:
+        db.close()
+
+    with TestClient(main.app) as client:
+        params = {"start_time": window_start.isoformat(), "end_time": end.isoformat()}
+        for layout in ("records", "columns"):
+            results[f"api.history.{layout}"] = measure(
+                lambda: client.get("/api/air-quality/history", params={**params, "layout": layout}).raise_for_status(),
+                repeat
+            )
+
+    return {
+        "meta": {
+            "rows": seeded,
+            "database": engine.dialect.name,
+            "seed_seconds": seed_seconds,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "created_at": datetime.now().isoformat()
+        },
+        "results": results
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """Imprime el cambio de la mediana respecto a una corrida anterior"""
+    for name, stats in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        change = (stats["median_ms"] - previous["median_ms"]) / previous["median_ms"] * 100
+        print(
+            f"{name:40s} {previous['median_ms']:10.2f} ms -> {stats['median_ms']:10.2f} ms "
+            f"({change:+.1f}%)",
+            file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del backend de calidad del aire")
+    parser.add_argument("--rows", type=_parse_rows, default=SIZES["10k"], help="10k, 1M, 10M o un entero")
+    parser.add_argument("--database-url", help="por defecto, un archivo SQLite temporal por tamaño")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="archivo JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.gettempdir(), f'aq_bench_{args.rows}.db')}"
+    )
+    os.environ["INGESTION_ENABLED"] = "false"
+
+    # Los mensajes de migraciones y repositorios van a stderr; stdout queda para el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmarks(args.rows, args.repeat)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Optional, Set
+
+
+class BroadcastMessage:
+    __slots__ = ("sse", "text")
+
+    def __init__(self, sse: bytes, text: str):
+        self.sse = sse
+        self.text = text
+
+
+class Subscription:
+    """Cola acotada de eventos de un cliente suscrito"""
+
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, message: "BroadcastMessage"):
+        # Contrapresión: si el cliente no consume, se descarta el evento más viejo
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional["BroadcastMessage"]:
+        """Espera el siguiente evento; retorna None si vence el timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    """Difunde eventos a todos los suscriptores (SSE y WebSocket).
+
+    Cada evento se serializa una sola vez y se encola sin bloquear en la cola
+    acotada de cada cliente, de modo que un cliente lento no frena a los demás
+    ni hace crecer la memoria.
+    """
+
+    def __init__(self, max_queue: int = 16):
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queue)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, event: str, data: bytes):
+        """Publica un evento con datos JSON ya serializados.
+
+        Cada mensaje se prepara una sola vez en los dos formatos: bytes SSE
+        y texto JSON para WebSocket.
+        """
+        message = BroadcastMessage(
+            sse=b"event: " + event.encode() + b"\ndata: " + data + b"\n\n",
+            text='{"event": "' + event + '", "data": ' + data.decode() + "}"
+        )
+        for subscription in list(self.subscribers):
+            subscription.offer(message)
+        self.published += 1
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in self.subscribers)
+        }
@@ -0,0 +1,174 @@
+import asyncio
+import pickle
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import config
+
+
+class MemoryBackend:
+    """Almacenamiento en memoria del proceso con expulsión LRU"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[object, float]]" = OrderedDict()
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, value, stored_at: float, expire: float):
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, prefix: str = ""):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+
+class RedisBackend:
+    """Almacenamiento compartido entre procesos sobre Redis (opcional).
+
+    Requiere el paquete ``redis``; para pruebas locales basta con un
+    servidor Redis local o ``fakeredis``.
+    """
+
+    def __init__(self, url: str = config.REDIS_URL, namespace: str = "aq-cache:", client=None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("CACHE_BACKEND=redis requiere el paquete 'redis'") from e
+            client = redis.from_url(url)
+        self.client = client
+        self.namespace = namespace
+
+    async def get(self, key: str):
+        data = await self.client.get(self.namespace + key)
+        return pickle.loads(data) if data is not None else None
+
+    async def set(self, key: str, value, stored_at: float, expire: float):
+        await self.client.set(
+            self.namespace + key,
+            pickle.dumps((value, stored_at)),
+            ex=max(1, int(expire))
+        )
+
+    async def invalidate(self, prefix: str = ""):
+        keys = [key async for key in self.client.scan_iter(match=f"{self.namespace}{prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class NegativeResult:
+    """Marca almacenada en lugar de un resultado None (caché negativa)"""
+
+
+class AsyncCache:
+    """Caché asíncrona con TTL, stale-while-revalidate y coalescencia de peticiones.
+
+    - Dentro del TTL se sirve el valor almacenado.
+    - Entre TTL y TTL + stale_ttl se sirve el valor viejo y se refresca en
+      segundo plano.
+    - Fuera de ese rango (o sin valor) se espera la consulta.
+    Las consultas concurrentes de la misma clave comparten una sola tarea, por
+    lo que el número de llamadas al origen no depende del número de clientes.
+    Los resultados None no se almacenan, salvo con ``negative_ttl``: entonces
+    un fallo se recuerda durante ``negative_ttl`` segundos para no consultar
+    al origen caído en cada petición. Un refresco fallido nunca reemplaza un
+    valor viejo que todavía se puede servir.
+    """
+
+    def __init__(self, backend=None, ttl: float = 60, stale_ttl: float = 300):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def _fetch_and_store(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable],
+        ttl: float,
+        stale_ttl: float,
+        negative_ttl: float = 0
+    ):
+        value = await fetch()
+        if value is not None:
+            await self.backend.set(key, value, time.time(), ttl + stale_ttl)
+        elif negative_ttl > 0:
+            await self.backend.set(key, NegativeResult(), time.time(), negative_ttl)
+        return value
+
+    def _refresh(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable],
+        ttl: float,
+        stale_ttl: float,
+        negative_ttl: float = 0
+    ) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(key, fetch, ttl, stale_ttl, negative_ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable],
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+        negative_ttl: float = 0
+    ):
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+
+        entry = await self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if isinstance(value, NegativeResult):
+                if age < negative_ttl:
+                    self.hits += 1
+                    return None
+            elif age < ttl:
+                self.hits += 1
+                return value
+            elif age < ttl + stale_ttl:
+                self.stale_hits += 1
+                task = self._refresh(key, fetch, ttl, stale_ttl)
+                # Evitar advertencias de excepciones no recuperadas en refrescos fallidos
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return value
+
+        self.misses += 1
+        # shield: si un cliente cancela, la consulta compartida continúa para los demás
+        return await asyncio.shield(self._refresh(key, fetch, ttl, stale_ttl, negative_ttl))
+
+    async def invalidate(self, prefix: str = ""):
+        await self.backend.invalidate(prefix)
+
+    def stats(self):
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / total if total else None
+        }
+
+
+def create_backend():
+    if config.CACHE_BACKEND == "redis":
+        return RedisBackend()
+    return MemoryBackend(config.CACHE_MAX_ENTRIES)
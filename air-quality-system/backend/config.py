@@ -0,0 +1,85 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Programador de ingesta (segundos)
+INGESTION_ENABLED = os.getenv("INGESTION_ENABLED", "true").lower() == "true"
+INGESTION_INTERVAL = float(os.getenv("INGESTION_INTERVAL", os.getenv("OPENMETEO_INGESTION_INTERVAL", "900")))
+INGESTION_JITTER = float(os.getenv("INGESTION_JITTER", "0.1"))
+INGESTION_MAX_BACKOFF = float(os.getenv("INGESTION_MAX_BACKOFF", "3600"))
+
+# Fuentes de datos: tiempo límite por fuente y peso en la fusión
+COLLECTOR_TIMEOUT = float(os.getenv("COLLECTOR_TIMEOUT", "30"))
+OPENMETEO_PRIORITY = float(os.getenv("OPENMETEO_PRIORITY", "1.0"))
+SENTINEL5P_ENABLED = os.getenv("SENTINEL5P_ENABLED", "true" if os.getenv("CAMS_API_KEY") else "false").lower() == "true"
+SENTINEL5P_PRIORITY = float(os.getenv("SENTINEL5P_PRIORITY", "0.5"))
+
+# Cliente HTTP compartido por los colectores
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "4"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+
+# Caché de respuestas y resultados de colectores
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # 'memory' o 'redis'
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_STALE_TTL = float(os.getenv("WEATHER_STALE_TTL", "3600"))
+# Tiempo durante el que se recuerda un fallo del clima antes de reintentar
+WEATHER_NEGATIVE_TTL = float(os.getenv("WEATHER_NEGATIVE_TTL", "60"))
+AIR_QUALITY_CACHE_TTL = float(os.getenv("AIR_QUALITY_CACHE_TTL", "60"))
+AIR_QUALITY_STALE_TTL = float(os.getenv("AIR_QUALITY_STALE_TTL", "300"))
+
+# Cabeceras HTTP de caché y compresión
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Canal de actualizaciones en vivo (SSE / WebSocket)
+STREAM_MAX_QUEUE = int(os.getenv("STREAM_MAX_QUEUE", "16"))
+STREAM_KEEPALIVE = float(os.getenv("STREAM_KEEPALIVE", "15"))
+
+# Estimador espacial (mapa de calor)
+ESTIMATOR_LOOKBACK_HOURS = float(os.getenv("ESTIMATOR_LOOKBACK_HOURS", "3"))
+ESTIMATOR_MAX_GRID = int(os.getenv("ESTIMATOR_MAX_GRID", "400"))
+
+# Ventana (horas) de las estadísticas por cuadrante
+QUADRANT_STATS_WINDOW_HOURS = int(os.getenv("QUADRANT_STATS_WINDOW_HOURS", "24"))
+
+# Pronóstico por cuadrante
+FORECAST_INTERVAL = float(os.getenv("FORECAST_INTERVAL", "3600"))
+FORECAST_HISTORY_DAYS = float(os.getenv("FORECAST_HISTORY_DAYS", "7"))
+
+# Semilla de los datos sintéticos (respaldo y pruebas de carga)
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "42"))
+
+# Base de datos: pool de conexiones y motor asíncrono opcional (asyncpg / aiosqlite)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
+# Particiones mensuales y retención del historial crudo (meses; 0 = sin límite)
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "2"))
+RETENTION_READINGS_MONTHS = int(os.getenv("RETENTION_READINGS_MONTHS", "0"))
+RETENTION_TRAFFIC_MONTHS = int(os.getenv("RETENTION_TRAFFIC_MONTHS", "0"))
+MAINTENANCE_INTERVAL = float(os.getenv("MAINTENANCE_INTERVAL", "86400"))
+
+# Payloads crudos comprimidos por lote fuera de las tablas calientes
+RAW_PAYLOAD_CODEC = os.getenv("RAW_PAYLOAD_CODEC", "zstd")  # 'zstd', 'zlib' o 'none'
+RAW_PAYLOAD_LEVEL = int(os.getenv("RAW_PAYLOAD_LEVEL", "3"))
+
+# Recarga histórica: días por petición, peticiones simultáneas y por segundo
+BACKFILL_CHUNK_DAYS = int(os.getenv("BACKFILL_CHUNK_DAYS", "30"))
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+BACKFILL_RATE_LIMIT = float(os.getenv("BACKFILL_RATE_LIMIT", "2"))
+# Días máximos por recarga y minutos sin progreso tras los que una recarga
+# 'running' se considera abandonada (p. ej. por un proceso caído)
+BACKFILL_MAX_DAYS = int(os.getenv("BACKFILL_MAX_DAYS", "366"))
+BACKFILL_STALE_MINUTES = float(os.getenv("BACKFILL_STALE_MINUTES", "30"))
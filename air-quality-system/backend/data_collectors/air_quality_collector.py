@@ -1,27 +1,12 @@
-import requests
-from datetime import datetime, timedelta
-import random
-
-def get_fallback_data(limit: int = 24):
-    """Genera datos de ejemplo cuando no hay datos reales disponibles"""
-    now = datetime.now()
-    start_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    return [
-        {
-            "timestamp": (start_time + timedelta(hours=i)).isoformat(),
-            "latitude": 19.5438,
-            "longitude": -96.9102,
-            "pm25": random.uniform(10, 50),
-            "pm10": random.uniform(20, 70),
-            "no2": random.uniform(20, 60),
-            "o3": random.uniform(30, 80),
-            "co": random.uniform(0.5, 2.0)
-        }
-        for i in range(limit)
-    ]
+from datetime import date, datetime, timedelta
+from typing import Optional
+from data_collectors.http_client import AsyncHTTPClient, get_http_client
+from data_collectors.synthetic import get_fallback_data
+
 
 class OpenMeteoCollector:
-    def __init__(self):
+    def __init__(self, http_client: Optional[AsyncHTTPClient] = None):
+        self.http_client = http_client or get_http_client()
         self.base_url = "https://air-quality-api.open-meteo.com/v1/air-quality"
         self.weather_url = "https://api.open-meteo.com/v1/forecast"
         self.latitude = 19.5438
@@ -29,35 +14,54 @@ class OpenMeteoCollector:
 
     async def get_air_quality_data(self):
         """Obtiene datos de calidad del aire de Open Meteo"""
-        try:
-            # Calcular fechas para obtener las últimas 24 horas
-            end_time = datetime.now()
-            start_time = end_time - timedelta(hours=24)
+        data = await self.fetch_air_quality_data()
+        return data if data else get_fallback_data()
 
+    async def fetch_air_quality_data(self):
+        """Obtiene datos reales de Open Meteo; retorna None si la petición falla"""
+        # Calcular fechas para obtener las últimas 24 horas
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=24)
+
+        data = await self._request_air_quality(start_time.date(), end_time.date())
+        if data is None:
+            return None
+        print("Datos recibidos de Open Meteo:", str(data)[:500])
+        return self.process_openmeteo_data(data)
+
+    async def fetch_range(self, start_date: date, end_date: date):
+        """Obtiene todas las horas entre start_date y end_date (inclusive).
+
+        Se usa para recargas históricas; retorna None si la petición falla.
+        """
+        data = await self._request_air_quality(start_date, end_date)
+        if data is None:
+            return None
+        return self.process_openmeteo_data(data, limit=None)
+
+    async def _request_air_quality(self, start_date: date, end_date: date):
+        try:
             # Construir parámetros de la petición
             params = {
                 "latitude": self.latitude,
                 "longitude": self.longitude,
                 "hourly": ["pm10", "pm2_5", "nitrogen_dioxide", "carbon_monoxide", "ozone"],
                 "timezone": "America/Mexico_City",
-                "start_date": start_time.strftime("%Y-%m-%d"),
-                "end_date": end_time.strftime("%Y-%m-%d")
+                "start_date": start_date.strftime("%Y-%m-%d"),
+                "end_date": end_date.strftime("%Y-%m-%d")
             }
 
-            print("Realizando petición a Open Meteo...")
-            response = requests.get(self.base_url, params=params)
+            print(f"Realizando petición a Open Meteo ({params['start_date']} a {params['end_date']})...")
+            response = await self.http_client.get(self.base_url, params=params)
             print(f"Código de respuesta: {response.status_code}")
 
             if response.status_code == 200:
-                data = response.json()
-                print("Datos recibidos de Open Meteo:", str(data)[:500])
-                return self.process_openmeteo_data(data)
-            else:
-                print(f"Error en la petición: {response.text}")
-                return get_fallback_data()
+                return response.json()
+            print(f"Error en la petición: {response.text}")
+            return None
         except Exception as e:
             print(f"Error obteniendo datos: {str(e)}")
-            return get_fallback_data()
+            return None
 
     async def get_weather_data(self):
         """Obtiene datos meteorológicos de Open Meteo"""
@@ -69,7 +73,7 @@ class OpenMeteoCollector:
                 "timezone": "America/Mexico_City"
             }
 
-            response = requests.get(self.weather_url, params=params)
+            response = await self.http_client.get(self.weather_url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -86,8 +90,11 @@ class OpenMeteoCollector:
             print(f"Error obteniendo datos meteorológicos: {str(e)}")
             return None
 
-    def process_openmeteo_data(self, raw_data):
-        """Procesa los datos recibidos de Open Meteo al formato esperado por el sistema"""
+    def process_openmeteo_data(self, raw_data, limit: Optional[int] = 24):
+        """Procesa los datos recibidos de Open Meteo al formato esperado por el sistema.
+
+        Retorna las ``limit`` horas más recientes (todas si es None).
+        """
         try:
             processed_data = []
             hourly_data = raw_data.get('hourly', {})
@@ -97,7 +104,7 @@ class OpenMeteoCollector:
             required_fields = ['pm10', 'pm2_5', 'nitrogen_dioxide', 'carbon_monoxide', 'ozone']
             if not all(key in hourly_data for key in required_fields):
                 print("Faltan algunos datos requeridos en la respuesta de Open Meteo")
-                return get_fallback_data()
+                return []
 
             for i in range(len(times)):
                 try:
@@ -121,11 +128,11 @@ class OpenMeteoCollector:
             
             # Verificar que tenemos datos procesados
             if not processed_data:
-                print("No se pudieron procesar los datos, usando fallback")
-                return get_fallback_data()
+                print("No se pudieron procesar los datos")
+                return []
 
-            return processed_data[:24]  # Retornar solo las últimas 24 horas
+            return processed_data[:limit] if limit else processed_data
 
         except Exception as e:
             print(f"Error procesando datos: {str(e)}")
-            return get_fallback_data()
\ No newline at end of file
+            return []
\ No newline at end of file
@@ -0,0 +1,130 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+import config
+from metrics import UPSTREAM_REQUEST_DURATION, UPSTREAM_RETRIES
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsyncHTTPClient:
+    """Cliente HTTP asíncrono compartido por todos los colectores.
+
+    Mantiene conexiones keep-alive en un pool, limita la concurrencia por host
+    y reintenta con backoff exponencial los errores de red y respuestas 429/5xx.
+    El transporte es inyectable (p. ej. ``httpx.MockTransport``) para pruebas
+    contra un servidor falso local.
+    """
+
+    def __init__(
+        self,
+        timeout: float = config.HTTP_TIMEOUT,
+        max_connections: int = config.HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = config.HTTP_MAX_KEEPALIVE,
+        per_host_limit: int = config.HTTP_PER_HOST_LIMIT,
+        retries: int = config.HTTP_RETRIES,
+        backoff: float = config.HTTP_RETRY_BACKOFF,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # El cliente se crea de forma perezosa para que el pool viva en el event loop activo
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                transport=self.transport
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        delay = self.backoff * (2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Realiza una petición con límite por host y reintentos"""
+        attempt = 0
+        host = urlsplit(url).hostname or ""
+        while True:
+            response = None
+            try:
+                async with self._host_limit(url):
+                    start = time.perf_counter()
+                    try:
+                        response = await self.client.request(method, url, **kwargs)
+                    finally:
+                        UPSTREAM_REQUEST_DURATION.observe(
+                            time.perf_counter() - start,
+                            host=host,
+                            status=response.status_code if response is not None else "error"
+                        )
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return response
+                print(f"Respuesta {response.status_code} de {url}, reintentando...")
+                UPSTREAM_RETRIES.inc(host=host, reason=str(response.status_code))
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt >= self.retries:
+                    raise
+                print(f"Error de red en {url} ({type(e).__name__}), reintentando...")
+                UPSTREAM_RETRIES.inc(host=host, reason=type(e).__name__)
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_shared_client: Optional[AsyncHTTPClient] = None
+
+
+def get_http_client() -> AsyncHTTPClient:
+    """Retorna el cliente HTTP compartido, creándolo si no existe"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = AsyncHTTPClient()
+    return _shared_client
+
+
+def set_http_client(client: Optional[AsyncHTTPClient]):
+    """Reemplaza el cliente compartido (útil para inyectar transportes de prueba)"""
+    global _shared_client
+    _shared_client = client
+
+
+async def close_http_client():
+    if _shared_client is not None:
+        await _shared_client.aclose()
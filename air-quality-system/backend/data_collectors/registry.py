@@ -0,0 +1,165 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from aggregation import POLLUTANTS
+from metrics import COLLECTOR_DURATION, COLLECTOR_ERRORS
+
+# Decimales de lat/lon con los que dos observaciones se consideran el mismo punto
+FUSION_COORD_PRECISION = 2
+FUSED_SOURCE = "fused"
+# Campos que pasan a columnas propias; raw_data guarda solo el resto
+PROMOTED_FIELDS = {"timestamp", "latitude", "longitude", *POLLUTANTS}
+
+
+class CollectorSpec:
+    """Colector registrado con su tiempo límite y peso de prioridad en la fusión"""
+
+    def __init__(self, name: str, collector, timeout: float = 30, priority: float = 1.0, enabled: bool = True):
+        self.name = name
+        self.collector = collector
+        self.timeout = timeout
+        self.priority = priority
+        self.enabled = enabled
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def normalize_reading(source: str, reading: dict) -> Optional[dict]:
+    """Convierte una lectura de cualquier colector al esquema común de lecturas"""
+    timestamp = _parse_timestamp(reading.get("timestamp"))
+    if timestamp is None or reading.get("latitude") is None or reading.get("longitude") is None:
+        return None
+    extra = {key: value for key, value in reading.items() if key not in PROMOTED_FIELDS}
+    normalized = {
+        "timestamp": timestamp,
+        "latitude": float(reading["latitude"]),
+        "longitude": float(reading["longitude"]),
+        "source": source,
+        "raw_data": extra or None
+    }
+    for pollutant in POLLUTANTS:
+        value = reading.get(pollutant)
+        normalized[pollutant] = float(value) if value is not None else None
+    return normalized
+
+
+def fuse_readings(readings: List[dict], priorities: Dict[str, float]) -> List[dict]:
+    """Fusiona observaciones de distintas fuentes que coinciden en hora y ubicación.
+
+    Las lecturas se agrupan por hora y por coordenadas redondeadas a
+    FUSION_COORD_PRECISION decimales; cada contaminante es el promedio
+    ponderado por la prioridad de las fuentes que lo reportan. Solo se
+    generan lecturas fusionadas donde coinciden al menos dos fuentes.
+    """
+    groups: Dict[tuple, List[dict]] = {}
+    for reading in readings:
+        key = (
+            reading["timestamp"].replace(minute=0, second=0, microsecond=0),
+            round(reading["latitude"], FUSION_COORD_PRECISION),
+            round(reading["longitude"], FUSION_COORD_PRECISION)
+        )
+        groups.setdefault(key, []).append(reading)
+
+    fused = []
+    for (hour, latitude, longitude), group in groups.items():
+        sources = sorted({reading["source"] for reading in group})
+        if len(sources) < 2:
+            continue
+        fused_reading = {
+            "timestamp": hour,
+            "latitude": latitude,
+            "longitude": longitude,
+            "source": FUSED_SOURCE,
+            "raw_data": {
+                "sources": sources,
+                "weights": {source: priorities.get(source, 1.0) for source in sources}
+            }
+        }
+        for pollutant in POLLUTANTS:
+            weighted_sum = 0.0
+            total_weight = 0.0
+            for reading in group:
+                if reading[pollutant] is not None:
+                    weight = priorities.get(reading["source"], 1.0)
+                    weighted_sum += weight * reading[pollutant]
+                    total_weight += weight
+            fused_reading[pollutant] = weighted_sum / total_weight if total_weight else None
+        fused.append(fused_reading)
+    return fused
+
+
+class CollectorRegistry:
+    """Registro de colectores que se consultan en paralelo en cada ciclo.
+
+    Cada colector expone ``fetch_air_quality_data()`` (None si falla). Todas
+    las fuentes habilitadas se consultan con ``asyncio.gather`` y cada una
+    tiene su propio tiempo límite, así que un ciclo tarda lo que la fuente
+    más lenta y una fuente caída no bloquea a las demás.
+    """
+
+    def __init__(self):
+        self.collectors: Dict[str, CollectorSpec] = {}
+
+    def register(self, name: str, collector, timeout: float = 30, priority: float = 1.0, enabled: bool = True):
+        self.collectors[name] = CollectorSpec(name, collector, timeout, priority, enabled)
+
+    def enabled(self) -> List[CollectorSpec]:
+        return [spec for spec in self.collectors.values() if spec.enabled]
+
+    @property
+    def priorities(self) -> Dict[str, float]:
+        return {name: spec.priority for name, spec in self.collectors.items()}
+
+    async def _collect(self, spec: CollectorSpec):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            data = await asyncio.wait_for(spec.collector.fetch_air_quality_data(), spec.timeout)
+            if not data:
+                raise RuntimeError("sin datos")
+            outcome = "ok"
+            return data
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise RuntimeError(f"tiempo límite de {spec.timeout}s agotado")
+        finally:
+            COLLECTOR_DURATION.observe(time.perf_counter() - start, collector=spec.name, outcome=outcome)
+            if outcome != "ok":
+                COLLECTOR_ERRORS.inc(collector=spec.name)
+
+    async def collect(self):
+        """Consulta todas las fuentes habilitadas en paralelo.
+
+        Retorna (lecturas normalizadas, estado por fuente); el estado es el
+        número de lecturas obtenidas o el mensaje de error.
+        """
+        specs = self.enabled()
+        results = await asyncio.gather(
+            *(self._collect(spec) for spec in specs),
+            return_exceptions=True
+        )
+
+        readings = []
+        status = {}
+        for spec, result in zip(specs, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, Exception):
+                print(f"Error en el colector {spec.name}: {str(result)}")
+                status[spec.name] = str(result)
+                continue
+            normalized = [
+                reading for reading in (normalize_reading(spec.name, raw) for raw in result)
+                if reading is not None
+            ]
+            readings.extend(normalized)
+            status[spec.name] = len(normalized)
+        return readings, status
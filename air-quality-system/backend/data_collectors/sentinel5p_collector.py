@@ -1,32 +1,15 @@
-import requests
 from datetime import datetime, timedelta
+from typing import Optional
 import os
 from dotenv import load_dotenv
 import json
-import random
-# En sentinel5p_collector.py, modificar la generación de datos de ejemplo
-def get_fallback_data(limit: int = 24):  # Cambiado a 24 para tener datos cada hora
-    """Genera datos de ejemplo cuando no hay datos reales disponibles"""
-    now = datetime.now()
-    start_time = now.replace(hour=0, minute=0, second=0, microsecond=0)  # Inicio del día
-    
-    return [
-        {
-            "timestamp": (start_time + timedelta(hours=i)).isoformat(),
-            "latitude": 19.5438,
-            "longitude": -96.9102,
-            "pm25": random.uniform(10, 50),
-            "pm10": random.uniform(20, 70),
-            "no2": random.uniform(20, 60),
-            "o3": random.uniform(30, 80),
-            "co": random.uniform(0.5, 2.0)
-        }
-        for i in range(limit)
-    ]
+from data_collectors.http_client import AsyncHTTPClient, get_http_client
+from data_collectors.synthetic import get_fallback_data
 
 class Sentinel5PCollector:
-    def __init__(self):
+    def __init__(self, http_client: Optional[AsyncHTTPClient] = None):
         load_dotenv()
+        self.http_client = http_client or get_http_client()
         self.api_token = os.getenv('CAMS_API_KEY')
         self.base_url = "https://ads.atmosphere.copernicus.eu/api/v2"
         
@@ -40,10 +23,15 @@ class Sentinel5PCollector:
 
     async def get_air_quality_data(self):
         """Obtiene datos de calidad del aire de CAMS ADS"""
+        data = await self.fetch_air_quality_data()
+        return data if data else get_fallback_data()
+
+    async def fetch_air_quality_data(self):
+        """Obtiene datos reales de CAMS ADS; retorna None si la petición falla"""
         try:
             if not self.api_token:
                 print("API Token no encontrado en variables de entorno")
-                return get_fallback_data()
+                return None
 
             headers = {
                 'Authorization': f'Bearer {self.api_token}',
@@ -78,7 +66,7 @@ class Sentinel5PCollector:
             print(f"URL: {self.base_url}/requests")
             print(f"Parámetros: {json.dumps(params, indent=2)}")
 
-            response = requests.post(
+            response = await self.http_client.post(
                 f"{self.base_url}/requests",
                 headers=headers,
                 json=params
@@ -91,11 +79,11 @@ class Sentinel5PCollector:
                 return self.process_cams_data(data)
             else:
                 print(f"Error en la petición: {response.text}")
-                return get_fallback_data()
+                return None
 
         except Exception as e:
             print(f"Error obteniendo datos: {str(e)}")
-            return get_fallback_data()
+            return None
 
     def process_cams_data(self, raw_data):
         """Procesa los datos recibidos de CAMS"""
@@ -115,8 +103,8 @@ class Sentinel5PCollector:
                     'co': point.get('carbon_monoxide', {}).get('value')
                 })
 
-            return processed_data if processed_data else get_fallback_data()
+            return processed_data
 
         except Exception as e:
             print(f"Error procesando datos: {str(e)}")
-            return get_fallback_data()
+            return []
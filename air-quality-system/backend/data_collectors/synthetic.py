@@ -0,0 +1,158 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence
+import numpy as np
+import config
+from metrics import FALLBACK_DATA
+from aggregation import POLLUTANTS
+from estimator.pollution_estimator import XALAPA_BOUNDS
+
+# Punto de referencia (centro de Xalapa) usado por los datos de ejemplo
+DEFAULT_LATITUDE = 19.5438
+DEFAULT_LONGITUDE = -96.9102
+
+HOURS = np.arange(24)
+
+
+def _gaussian_peak(center: float, width: float) -> np.ndarray:
+    distance = np.minimum(np.abs(HOURS - center), 24 - np.abs(HOURS - center))
+    return np.exp(-0.5 * (distance / width) ** 2)
+
+
+# Perfil diurno relativo (24 valores) y rango de cada contaminante:
+# los contaminantes de tráfico tienen picos en las horas de mayor circulación
+# y el ozono un máximo a media tarde por la radiación solar.
+_TRAFFIC_PROFILE = 0.35 + 0.65 * np.maximum(_gaussian_peak(8, 1.5), _gaussian_peak(20, 2.0))
+DIURNAL_PROFILES: Dict[str, dict] = {
+    "pm25": {"low": 10.0, "high": 50.0, "profile": _TRAFFIC_PROFILE},
+    "pm10": {"low": 20.0, "high": 70.0, "profile": _TRAFFIC_PROFILE},
+    "no2": {"low": 20.0, "high": 60.0, "profile": _TRAFFIC_PROFILE},
+    "o3": {"low": 30.0, "high": 80.0, "profile": _gaussian_peak(14, 3.0)},
+    "co": {"low": 0.5, "high": 2.0, "profile": _TRAFFIC_PROFILE}
+}
+# Amplitud relativa del ruido alrededor del perfil
+NOISE = 0.15
+EPOCH_HOUR = np.datetime64("1970-01-01T00", "h")
+
+
+def _mix(keys: np.ndarray) -> np.ndarray:
+    """splitmix64 vectorizado: el mismo entero produce siempre el mismo hash"""
+    z = keys + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _uniform(hour_index: np.ndarray, lat_key: np.ndarray, lon_key: np.ndarray, stream: int, seed: int) -> np.ndarray:
+    """Valor pseudoaleatorio en [0, 1) determinado por (hora, ubicación, contaminante, semilla)"""
+    with np.errstate(over="ignore"):
+        key = _mix(np.full(hour_index.shape, seed * 1000 + stream, dtype=np.uint64))
+        key = _mix(key ^ hour_index.astype(np.uint64))
+        key = _mix(key ^ lat_key.astype(np.uint64))
+        key = _mix(key ^ lon_key.astype(np.uint64))
+    return (key >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def generate_columns(
+    timestamps: np.ndarray,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    seed: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """Genera valores de todos los contaminantes para arreglos alineados de lecturas.
+
+    ``timestamps`` se trunca a la hora; el resultado para una misma
+    (hora, ubicación, semilla) es siempre idéntico, sin importar cuántas
+    lecturas se generen a la vez.
+    """
+    seed = config.SYNTHETIC_SEED if seed is None else seed
+    hour_index = (np.asarray(timestamps, dtype="datetime64[h]") - EPOCH_HOUR).astype(np.int64)
+    hour_of_day = hour_index % 24
+    lat_key = np.round(np.asarray(latitudes, dtype=np.float64) * 1e4).astype(np.int64)
+    lon_key = np.round(np.asarray(longitudes, dtype=np.float64) * 1e4).astype(np.int64)
+
+    columns = {}
+    for stream, pollutant in enumerate(POLLUTANTS):
+        spec = DIURNAL_PROFILES[pollutant]
+        base = spec["low"] + (spec["high"] - spec["low"]) * spec["profile"][hour_of_day]
+        noise = 1 + NOISE * (2 * _uniform(hour_index, lat_key, lon_key, stream, seed) - 1)
+        columns[pollutant] = np.clip(base * noise, spec["low"] * 0.5, spec["high"] * 1.2)
+    return columns
+
+
+def generate_dataset(
+    start: datetime,
+    hours: int,
+    locations: Sequence[tuple],
+    seed: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """Genera un conjunto columnar de ``hours`` x ``len(locations)`` lecturas.
+
+    Pensado para pruebas de carga: millones de filas se generan en
+    segundos y sin objetos Python por fila.
+    """
+    hour_range = np.datetime64(start, "h") + np.arange(hours)
+    location_array = np.asarray(locations, dtype=np.float64)
+    timestamps = np.repeat(hour_range, len(location_array))
+    latitudes = np.tile(location_array[:, 0], hours)
+    longitudes = np.tile(location_array[:, 1], hours)
+    columns = generate_columns(timestamps, latitudes, longitudes, seed)
+    columns.update({"timestamp": timestamps, "latitude": latitudes, "longitude": longitudes})
+    return columns
+
+
+def grid_locations(count: int, bounds: Optional[dict] = None) -> List[tuple]:
+    """``count`` ubicaciones repartidas en una rejilla sobre la ciudad"""
+    bounds = bounds or XALAPA_BOUNDS
+    side = int(np.ceil(np.sqrt(count)))
+    lats = np.linspace(bounds["south"], bounds["north"], side)
+    lons = np.linspace(bounds["west"], bounds["east"], side)
+    points = [(float(lat), float(lon)) for lat in lats for lon in lons]
+    return points[:count]
+
+
+def iter_records(columns: Dict[str, np.ndarray], source: str = "synthetic", chunk_size: int = 10000) -> Iterator[List[dict]]:
+    """Convierte un conjunto columnar en bloques de lecturas (dict) para el repositorio"""
+    total = len(columns["timestamp"])
+    for offset in range(0, total, chunk_size):
+        window = slice(offset, offset + chunk_size)
+        timestamps = columns["timestamp"][window].astype(datetime).tolist()
+        values = {name: columns[name][window].tolist() for name in ["latitude", "longitude"] + POLLUTANTS}
+        yield [
+            {
+                "timestamp": timestamp,
+                "source": source,
+                **{name: values[name][i] for name in values}
+            }
+            for i, timestamp in enumerate(timestamps)
+        ]
+
+
+@lru_cache(maxsize=64)
+def _fallback_day(day: date, limit: int, latitude: float, longitude: float):
+    columns = generate_dataset(datetime.combine(day, datetime.min.time()), limit, [(latitude, longitude)])
+    return tuple(
+        {
+            "timestamp": (datetime.combine(day, datetime.min.time()) + timedelta(hours=i)).isoformat(),
+            "latitude": latitude,
+            "longitude": longitude,
+            **{pollutant: round(float(columns[pollutant][i]), 3) for pollutant in POLLUTANTS}
+        }
+        for i in range(limit)
+    )
+
+
+def get_fallback_data(
+    limit: int = 24,
+    day: Optional[date] = None,
+    latitude: float = DEFAULT_LATITUDE,
+    longitude: float = DEFAULT_LONGITUDE
+):
+    """Genera datos de ejemplo cuando no hay datos reales disponibles.
+
+    Los valores dependen solo de (día, hora, ubicación), así que peticiones
+    repetidas devuelven los mismos datos y pueden almacenarse en caché.
+    """
+    FALLBACK_DATA.inc()
+    day = day or datetime.now().date()
+    return [dict(reading) for reading in _fallback_day(day, limit, latitude, longitude)]
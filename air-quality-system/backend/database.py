@@ -1,20 +1,107 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.declarative import declarative_base
 import os
 from dotenv import load_dotenv
+import config
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Controladores asíncronos equivalentes a cada dialecto síncrono
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _engine_options(url):
+    """Parámetros del pool y de la caché de sentencias según el dialecto"""
+    options = {
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "query_cache_size": config.DB_STATEMENT_CACHE_SIZE
+    }
+    if _is_memory_sqlite(url):
+        # Cada conexión a SQLite en memoria es una base de datos distinta: una
+        # sola conexión compartida para que los hilos del pool (asyncio.to_thread)
+        # vean los mismos datos
+        options.update({
+            "poolclass": StaticPool,
+            "connect_args": {"check_same_thread": False}
+        })
+    else:
+        options.update({
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_recycle": config.DB_POOL_RECYCLE
+        })
+    return options
+
+
+def async_database_url(url: str):
+    """Convierte la URL síncrona a su controlador asíncrono (asyncpg / aiosqlite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"DB_ASYNC no soporta el dialecto '{backend}'")
+    if _is_memory_sqlite(parsed):
+        # El motor asíncrono abriría otra base de datos en memoria, vacía
+        raise RuntimeError("DB_ASYNC no soporta SQLite en memoria; use un archivo")
+    parsed = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if backend == "postgresql":
+        # Caché de sentencias preparadas por conexión de asyncpg
+        parsed = parsed.update_query_dict(
+            {"prepared_statement_cache_size": str(config.DB_STATEMENT_CACHE_SIZE)}
+        )
+    return parsed
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(make_url(DATABASE_URL)))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Motor asíncrono opcional: las peticiones esperan la base de datos sin
+# bloquear el event loop y la concurrencia escala con el tamaño del pool
+async_engine = None
+AsyncSessionLocal = None
+if config.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = async_database_url(DATABASE_URL)
+    try:
+        async_engine = create_async_engine(_async_url, **_engine_options(_async_url))
+    except ImportError as e:
+        raise RuntimeError(
+            f"DB_ASYNC requiere el controlador '{ASYNC_DRIVERS[_async_url.get_backend_name()]}'"
+        ) from e
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Sesión para endpoints asíncronos.
+
+    Con DB_ASYNC retorna una AsyncSession; sin él, una Session síncrona que
+    los repositorios awaitables usan desde un hilo del pool.
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import pandas as pd
+
+from aggregation import POLLUTANTS
+SEASON_LENGTH = 24
+
+
+class HoltWintersState:
+    """Suavizamiento exponencial aditivo con tendencia amortiguada y ciclo diario.
+
+    El estado (nivel, tendencia, estacionalidad por hora del día y error
+    medio) se actualiza una observación a la vez, así que un modelo ya
+    ajustado solo necesita incorporar las horas nuevas.
+    """
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.05, gamma: float = 0.1, phi: float = 0.9):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.phi = phi
+        self.level: Optional[float] = None
+        self.trend = 0.0
+        self.seasonal = [0.0] * SEASON_LENGTH
+        self.squared_error = 0.0
+        self.observations = 0
+
+    def update(self, hour_of_day: int, value: float):
+        if self.level is None:
+            self.level = value
+            self.observations = 1
+            return
+
+        season = self.seasonal[hour_of_day]
+        error = value - (self.level + self.phi * self.trend + season)
+        self.squared_error = 0.9 * self.squared_error + 0.1 * error * error
+
+        previous_level = self.level
+        self.level = self.alpha * (value - season) + (1 - self.alpha) * (previous_level + self.phi * self.trend)
+        self.trend = self.beta * (self.level - previous_level) + (1 - self.beta) * self.phi * self.trend
+        self.seasonal[hour_of_day] = self.gamma * (value - self.level) + (1 - self.gamma) * season
+        self.observations += 1
+
+    def forecast(self, hour_of_day: int, horizon: int) -> Optional[float]:
+        """Pronóstico a ``horizon`` horas de la última observación"""
+        if self.level is None:
+            return None
+        damped_trend = sum(self.phi ** step for step in range(1, horizon + 1)) * self.trend
+        value = self.level + damped_trend + self.seasonal[hour_of_day % SEASON_LENGTH]
+        return max(0.0, value)
+
+    def confidence(self) -> float:
+        """Confianza en [0, 1] a partir del error cuadrático medio reciente"""
+        if self.level is None or self.observations < SEASON_LENGTH:
+            return 0.0
+        scale = max(abs(self.level), 1e-6)
+        return max(0.0, 1.0 - math.sqrt(self.squared_error) / scale)
+
+
+class QuadrantForecaster:
+    """Mantiene un modelo por cuadrante y contaminante entre ciclos de pronóstico"""
+
+    def __init__(self, horizons: Iterable[int] = (1, 3, 6, 12, 24)):
+        self.horizons = list(horizons)
+        self.states: Dict[Tuple[str, str], HoltWintersState] = {}
+        self.last_hour: Dict[str, datetime] = {}
+
+    def expire(self, oldest: datetime):
+        """Descarta los cuadrantes sin observaciones desde ``oldest``.
+
+        Un cuadrante que dejó de reportar no debe seguir pronosticando desde
+        su última hora (objetivos ya vencidos) ni retrasar el inicio de la
+        consulta de cada ciclo; si vuelve a reportar, su modelo empieza de
+        nuevo con las horas dentro del historial.
+        """
+        for quadrant_name, last_hour in list(self.last_hour.items()):
+            if last_hour < oldest:
+                del self.last_hour[quadrant_name]
+                for pollutant in POLLUTANTS:
+                    self.states.pop((quadrant_name, pollutant), None)
+
+    def next_start(self, oldest: datetime) -> datetime:
+        """Primera hora que aún no se ha incorporado a los modelos, nunca antes de ``oldest``"""
+        if not self.last_hour:
+            return oldest
+        return max(oldest, min(self.last_hour.values()) + timedelta(hours=1))
+
+    def fold(self, hourly: pd.DataFrame):
+        """Incorpora promedios horarios (índice: quadrant_name, hour) aún no vistos"""
+        for (quadrant_name, hour), row in hourly.sort_index(level="hour").iterrows():
+            hour = pd.Timestamp(hour).to_pydatetime()
+            last_hour = self.last_hour.get(quadrant_name)
+            if last_hour is not None and hour <= last_hour:
+                continue
+            for pollutant in POLLUTANTS:
+                value = row[pollutant]
+                if pd.isna(value):
+                    continue
+                state = self.states.setdefault((quadrant_name, pollutant), HoltWintersState())
+                state.update(hour.hour, float(value))
+            self.last_hour[quadrant_name] = hour
+
+    def forecast(self, issued_at: datetime) -> List[dict]:
+        """Genera predicciones multi-horizonte para todos los cuadrantes con datos"""
+        predictions = []
+        for quadrant_name, last_hour in self.last_hour.items():
+            for horizon in self.horizons:
+                target = last_hour + timedelta(hours=horizon)
+                prediction = {
+                    "timestamp": target,
+                    "issued_at": issued_at,
+                    "horizon_hours": horizon,
+                    "quadrant_name": quadrant_name,
+                    "model_metadata": {
+                        "model": "holt_winters_damped",
+                        "last_observation": last_hour.isoformat()
+                    }
+                }
+                confidences = []
+                for pollutant in POLLUTANTS:
+                    state = self.states.get((quadrant_name, pollutant))
+                    prediction[f"predicted_{pollutant}"] = (
+                        state.forecast(target.hour, horizon) if state else None
+                    )
+                    if state:
+                        confidences.append(state.confidence())
+                prediction["confidence_level"] = (
+                    sum(confidences) / len(confidences) if confidences else 0.0
+                )
+                predictions.append(prediction)
+        return predictions
+
+
+def hourly_quadrant_means(rows, parent_of) -> pd.DataFrame:
+    """Promedios horarios por cuadrante y por cuadrante principal.
+
+    ``rows`` son tuplas (quadrant_name, timestamp, pm25, pm10, no2, o3, co).
+    """
+    frame = pd.DataFrame(rows, columns=["quadrant_name", "timestamp"] + POLLUTANTS)
+    if frame.empty:
+        return frame.set_index(["quadrant_name", "timestamp"]).rename_axis(["quadrant_name", "hour"])
+    frame["hour"] = pd.to_datetime(frame["timestamp"]).dt.floor("h")
+    parents = frame.assign(quadrant_name=frame["quadrant_name"].map(parent_of))
+    combined = pd.concat([frame, parents])
+    return combined.groupby(["quadrant_name", "hour"])[POLLUTANTS].mean()
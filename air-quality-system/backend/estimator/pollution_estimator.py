@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from typing import Optional, Sequence
+import numpy as np
+
+# Límites de la ciudad (mismos que el registro de cuadrantes)
+XALAPA_BOUNDS = {"north": 19.5800, "south": 19.5000, "east": -96.8000, "west": -97.0000}
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+
+
+class GridSpec:
+    """Rejilla regular de ``rows`` x ``cols`` puntos sobre un rectángulo lat/lon.
+
+    La fila 0 corresponde al borde norte y la columna 0 al borde oeste.
+    """
+
+    def __init__(self, rows: int = 100, cols: int = 100, bounds: Optional[dict] = None):
+        self.rows = rows
+        self.cols = cols
+        self.bounds = dict(bounds or XALAPA_BOUNDS)
+
+    def key(self):
+        return (self.rows, self.cols, tuple(sorted(self.bounds.items())))
+
+    def coordinates(self):
+        """Retorna los arreglos (lat, lon) de todos los puntos, en orden fila-mayor"""
+        lats = np.linspace(self.bounds["north"], self.bounds["south"], self.rows)
+        lons = np.linspace(self.bounds["west"], self.bounds["east"], self.cols)
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+        return lat_grid.ravel(), lon_grid.ravel()
+
+    def to_dict(self):
+        return {"rows": self.rows, "cols": self.cols, "bounds": self.bounds}
+
+
+def _project(lats: np.ndarray, lons: np.ndarray, reference_lat: float):
+    """Proyección equirectangular a kilómetros (suficiente a escala de ciudad)"""
+    x = lons * KM_PER_DEGREE_LON * np.cos(np.radians(reference_lat))
+    y = lats * KM_PER_DEGREE_LAT
+    return x, y
+
+
+def _squared_distances(grid: GridSpec, station_lats: np.ndarray, station_lons: np.ndarray):
+    """Matriz de distancias al cuadrado (km²) puntos de rejilla x estaciones, en float32"""
+    reference_lat = (grid.bounds["north"] + grid.bounds["south"]) / 2
+    grid_lats, grid_lons = grid.coordinates()
+    gx, gy = _project(grid_lats, grid_lons, reference_lat)
+    sx, sy = _project(station_lats, station_lons, reference_lat)
+    # Coordenadas relativas a la primera estación para conservar precisión en float32
+    dx = (gx - sx[0]).astype(np.float32)[:, None] - (sx - sx[0]).astype(np.float32)[None, :]
+    dy = (gy - sy[0]).astype(np.float32)[:, None] - (sy - sy[0]).astype(np.float32)[None, :]
+    dx *= dx
+    dy *= dy
+    dx += dy
+    return dx
+
+
+def _station_distances(station_lats: np.ndarray, station_lons: np.ndarray, reference_lat: float):
+    sx, sy = _project(station_lats, station_lons, reference_lat)
+    return np.hypot(sx[:, None] - sx[None, :], sy[:, None] - sy[None, :])
+
+
+def _exponential_variogram(h: np.ndarray, range_km: float, nugget: float):
+    gamma = nugget + (1.0 - nugget) * (1.0 - np.exp(-3.0 * h / range_km))
+    return np.where(h > 0, gamma, 0.0)
+
+
+class PollutionEstimator:
+    """Interpola lecturas puntuales sobre una rejilla (IDW o kriging ordinario).
+
+    Los pesos dependen solo de la disposición de las estaciones, la rejilla y
+    los parámetros del método, así que se calculan una vez y se guardan en una
+    caché LRU; cada estimación posterior es un producto matriz-vector.
+    """
+
+    def __init__(self, cache_size: int = 16):
+        self.cache_size = cache_size
+        self._weights: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+
+    def _cached(self, key, build):
+        weights = self._weights.get(key)
+        if weights is None:
+            weights = build()
+            self._weights[key] = weights
+            while len(self._weights) > self.cache_size:
+                self._weights.popitem(last=False)
+        else:
+            self._weights.move_to_end(key)
+        return weights
+
+    @staticmethod
+    def _idw_weights(grid: GridSpec, lats: np.ndarray, lons: np.ndarray, power: float):
+        squared = _squared_distances(grid, lats, lons)
+        with np.errstate(divide="ignore"):
+            if power == 2:
+                weights = np.reciprocal(squared)
+            else:
+                weights = squared ** np.float32(-power / 2)
+        # Un punto de rejilla sobre una estación toma exactamente su valor
+        if squared.min() < 1e-12:
+            exact = squared < 1e-12
+            rows_with_exact = exact.any(axis=1)
+            weights[rows_with_exact] = exact[rows_with_exact]
+        weights /= weights.sum(axis=1, keepdims=True)
+        return weights
+
+    @staticmethod
+    def _kriging_weights(grid: GridSpec, lats: np.ndarray, lons: np.ndarray, range_km: float, nugget: float):
+        n = len(lats)
+        reference_lat = (grid.bounds["north"] + grid.bounds["south"]) / 2
+        system = np.ones((n + 1, n + 1))
+        system[:n, :n] = _exponential_variogram(
+            _station_distances(lats, lons, reference_lat), range_km, nugget
+        )
+        system[n, n] = 0.0
+
+        rhs = np.ones((n + 1, grid.rows * grid.cols))
+        rhs[:n] = _exponential_variogram(
+            np.sqrt(_squared_distances(grid, lats, lons).T.astype(np.float64)), range_km, nugget
+        )
+        try:
+            solution = np.linalg.solve(system, rhs)
+        except np.linalg.LinAlgError:
+            # Estaciones duplicadas hacen singular el sistema
+            solution = np.linalg.lstsq(system, rhs, rcond=None)[0]
+        return solution[:n].T.astype(np.float32)
+
+    def estimate(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        values: Sequence[Optional[float]],
+        grid: GridSpec,
+        method: str = "idw",
+        power: float = 2.0,
+        range_km: float = 5.0,
+        nugget: float = 0.0
+    ) -> np.ndarray:
+        """Retorna la rejilla estimada (rows x cols, float32); NaN si no hay datos"""
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        vals = np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+
+        # Estaciones sin dato para este contaminante no participan
+        valid = ~np.isnan(vals)
+        lats, lons, vals = lats[valid], lons[valid], vals[valid]
+        if vals.size == 0:
+            return np.full((grid.rows, grid.cols), np.nan, dtype=np.float32)
+
+        layout = (tuple(np.round(lats, 6)), tuple(np.round(lons, 6)), grid.key())
+        if method == "kriging" and vals.size > 1:
+            weights = self._cached(
+                ("kriging", range_km, nugget) + layout,
+                lambda: self._kriging_weights(grid, lats, lons, range_km, nugget)
+            )
+        else:
+            weights = self._cached(
+                ("idw", power) + layout,
+                lambda: self._idw_weights(grid, lats, lons, power)
+            )
+        return (weights @ vals.astype(np.float32)).reshape(grid.rows, grid.cols)
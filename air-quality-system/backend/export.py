@@ -0,0 +1,59 @@
+import csv
+import io
+from datetime import datetime
+from typing import Optional
+from database import SessionLocal
+from repositories.crud import AirQualityRepository, READING_COLUMNS
+from serialization import dumps
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+def _serialize_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _ndjson_chunk(rows):
+    return b"".join(
+        dumps(dict(zip(READING_COLUMNS, row))) + b"\n"
+        for row in rows
+    )
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_serialize_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def stream_readings_export(
+    start_time: datetime,
+    end_time: datetime,
+    fmt: str = "ndjson",
+    source: Optional[str] = None,
+    chunk_size: int = 1000
+):
+    """Genera la exportación de lecturas por bloques (NDJSON o CSV).
+
+    Abre su propia sesión para que siga disponible mientras se transmite la
+    respuesta, y solo mantiene en memoria un bloque de filas a la vez. Sin
+    ``source`` se omiten las lecturas fusionadas; se piden con source=fused.
+    """
+    serialize = _csv_chunk if fmt == "csv" else _ndjson_chunk
+    db = SessionLocal()
+    try:
+        if fmt == "csv":
+            yield ",".join(READING_COLUMNS) + "\r\n"
+        for rows in AirQualityRepository.iter_readings_in_timeframe(
+            db, start_time, end_time, source, chunk_size
+        ):
+            yield serialize(rows)
+    except Exception as e:
+        print(f"Error exportando lecturas: {str(e)}")
+        raise
+    finally:
+        db.close()
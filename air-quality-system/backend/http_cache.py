@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+class IngestionWatermark:
+    """Versión de las lecturas guardadas, base de ETag y Last-Modified.
+
+    ``loader`` lee de la base de datos (versión, fecha UTC de la última
+    escritura); la versión se incrementa en la misma transacción que las
+    lecturas, así que es la misma para todos los workers y procesos (incluida
+    la recarga por CLI) y sobrevive a reinicios. ``on_change`` se llama cuando
+    este proceso nota que la versión cambió, p. ej. para invalidar su caché.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Tuple[int, Optional[datetime]]],
+        on_change: Optional[Callable[[], Awaitable]] = None
+    ):
+        self.loader = loader
+        self.on_change = on_change
+        self.version: Optional[int] = None
+        self.updated_at: Optional[datetime] = None
+
+    async def refresh(self):
+        version, updated_at = await asyncio.to_thread(self.loader)
+        if updated_at is not None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+        changed = self.version is not None and version != self.version
+        self.version, self.updated_at = version, updated_at
+        if changed and self.on_change is not None:
+            await self.on_change()
+
+    def etag(self, key: str) -> str:
+        stamp = self.updated_at.isoformat() if self.updated_at else ""
+        digest = hashlib.blake2b(
+            f"{stamp}:{self.version}:{key}".encode(),
+            digest_size=12
+        ).hexdigest()
+        return f'W/"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        return last_modified <= parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+
+
+class ConditionalGetMiddleware:
+    """Agrega ETag/Last-Modified/Cache-Control y responde 304 si nada cambió.
+
+    Solo aplica a peticiones GET cuyo path empieza con alguno de ``paths`` y
+    no con alguno de ``exclude_paths``: las respuestas excluidas dependen de
+    algo más que la versión de los datos (p. ej. de la hora actual). Es un
+    middleware ASGI puro para no convertir cada respuesta en streaming (lo
+    que impediría a la compresión respetar su tamaño mínimo).
+    """
+
+    def __init__(
+        self,
+        app,
+        watermark: IngestionWatermark,
+        paths: Iterable[str],
+        exclude_paths: Iterable[str] = (),
+        max_age: int = 60
+    ):
+        self.app = app
+        self.watermark = watermark
+        self.paths = tuple(paths)
+        self.exclude_paths = tuple(exclude_paths)
+        self.max_age = max_age
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http" or scope["method"] != "GET"
+            or not scope["path"].startswith(self.paths)
+            or scope["path"].startswith(self.exclude_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.watermark.refresh()
+        except Exception as e:
+            print(f"Error leyendo la versión de los datos: {str(e)}")
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        etag = self.watermark.etag(f"{request.url.path}?{request.url.query}")
+        last_modified = self.watermark.updated_at
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age}"
+        }
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if (if_none_match and _etag_matches(if_none_match, etag)) or (
+            not if_none_match and if_modified_since and last_modified is not None
+            and _not_modified_since(if_modified_since, last_modified)
+        ):
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    response_headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class CompressionMiddleware:
+    """Aplica un middleware de compresión excepto en los paths excluidos.
+
+    Los flujos SSE deben enviarse sin comprimir para que cada evento llegue
+    al cliente en cuanto se publica.
+    """
+
+    def __init__(self, app, compressor, exclude_paths: Iterable[str] = (), **options):
+        self.app = app
+        self.compressed_app = compressor(app, **options)
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+        else:
+            await self.compressed_app(scope, receive, send)
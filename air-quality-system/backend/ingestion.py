@@ -0,0 +1,33 @@
+import asyncio
+from database import SessionLocal
+from repositories.crud import AirQualityRepository
+from data_collectors.registry import fuse_readings
+
+
+def _store_readings(readings):
+    """Guarda un lote de lecturas usando una sesión propia (fuera del event loop)"""
+    db = SessionLocal()
+    try:
+        return AirQualityRepository.store_batch_readings(db, readings)
+    finally:
+        db.close()
+
+
+async def ingest_all(registry):
+    """Tarea de ingesta: consulta todas las fuentes en paralelo y guarda un solo lote.
+
+    Además de las lecturas de cada fuente se guardan lecturas fusionadas
+    (fuente 'fused') donde varias fuentes coinciden en hora y ubicación.
+    """
+    readings, status = await registry.collect()
+    if not readings:
+        raise RuntimeError(f"Ninguna fuente devolvió datos: {status}")
+
+    readings.extend(fuse_readings(readings, registry.priorities))
+
+    counts = await asyncio.to_thread(_store_readings, readings)
+    if counts is None:
+        raise RuntimeError("No se pudieron guardar las lecturas")
+    counts["sources"] = status
+    print(f"Ingesta: {counts}")
+    return counts
@@ -1,22 +1,385 @@
-from typing import Optional, List
+import asyncio
+import threading
+from typing import Dict, Optional, List, Literal
+from contextlib import asynccontextmanager
 from datetime import datetime, date, time, timedelta
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
 import random
 from sqlalchemy import func
 from sqlalchemy.orm import Session
-from data_collectors.air_quality_collector import OpenMeteoCollector, get_fallback_data
+from data_collectors.air_quality_collector import OpenMeteoCollector
+from data_collectors.synthetic import get_fallback_data
+from data_collectors.sentinel5p_collector import Sentinel5PCollector
+from data_collectors.registry import CollectorRegistry
+from data_collectors.http_client import close_http_client
 import models
-from database import get_db, engine
+from database import get_async_db, engine, async_engine, SessionLocal
 from repositories.crud import (
     AirQualityRepository,
-    TrafficRepository,
     QuadrantStatsRepository,
-    PredictionRepository
+    PredictionRepository,
+    WatermarkRepository
 )
+from repositories.awaitable import (
+    AsyncAirQualityRepository,
+    AsyncTrafficRepository,
+    AsyncQuadrantStatsRepository,
+    AsyncRollupRepository,
+    AsyncRawPayloadRepository,
+    AsyncBackfillRepository,
+    DBSession,
+    run_sync
+)
+from scheduler import IngestionScheduler, ScheduledJob
+from ingestion import ingest_all
+from migrations import run_migrations
+from partitions import run_maintenance
+from backfill import (
+    BackfillConflictError,
+    claim_job as claim_backfill_job,
+    create_job as create_backfill_job,
+    run_job as run_backfill_job
+)
+from pagination import InvalidCursorError
+from export import stream_readings_export, EXPORT_MEDIA_TYPES
+from serialization import Layout, readings_response, serialize_rows, dicts_to_rows, dumps
+from cache import AsyncCache, create_backend
+from http_cache import ConditionalGetMiddleware, CompressionMiddleware, IngestionWatermark
+from broadcast import Broadcaster
+from metrics import REGISTRY, CONTENT_TYPE, INGESTED_ROWS, MetricsMiddleware, instrument_engine
+from aggregation import POLLUTANTS
+from estimator.pollution_estimator import PollutionEstimator, GridSpec
+from estimator.forecaster import QuadrantForecaster, hourly_quadrant_means
+from quadrants import parent_quadrant
+import numpy as np
+import orjson
+import config
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Inicializar el colector
+openmeteo_collector = OpenMeteoCollector()
+
+# Fuentes consultadas en paralelo en cada ciclo de ingesta
+collector_registry = CollectorRegistry()
+collector_registry.register(
+    "openmeteo",
+    openmeteo_collector,
+    timeout=config.COLLECTOR_TIMEOUT,
+    priority=config.OPENMETEO_PRIORITY
+)
+collector_registry.register(
+    "sentinel5p",
+    Sentinel5PCollector(),
+    timeout=config.COLLECTOR_TIMEOUT,
+    priority=config.SENTINEL5P_PRIORITY,
+    enabled=config.SENTINEL5P_ENABLED
+)
+
+# Estimador espacial con caché de pesos por disposición de estaciones
+pollution_estimator = PollutionEstimator()
+
+# Serializa las actualizaciones de estadísticas por cuadrante
+quadrant_stats_lock = threading.Lock()
+
+# Modelos de pronóstico por cuadrante; conservan su estado entre ciclos
+quadrant_forecaster = QuadrantForecaster()
+
+# Caché de resultados de colectores y respuestas frecuentes
+response_cache = AsyncCache(
+    create_backend(),
+    ttl=config.AIR_QUALITY_CACHE_TTL,
+    stale_ttl=config.AIR_QUALITY_STALE_TTL
+)
+
+def _load_watermark():
+    db = SessionLocal()
+    try:
+        return WatermarkRepository.get(db, "air_quality_readings")
+    finally:
+        db.close()
+
+# Versión de las lecturas en la base de datos, base de ETag/Last-Modified; si
+# otro proceso (worker, recarga por CLI) escribió lecturas, se invalida la caché
+watermark = IngestionWatermark(
+    _load_watermark,
+    on_change=lambda: response_cache.invalidate("air-quality")
+)
+
+# Difusión de actualizaciones en vivo a los clientes suscritos
+broadcaster = Broadcaster(config.STREAM_MAX_QUEUE)
+
+# Métricas de consultas SQL, caché y canal en vivo expuestas en /metrics
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine, "async")
+REGISTRY.callback(
+    "cache_requests_total",
+    "Consultas a la caché de respuestas por resultado",
+    lambda: [((outcome,), response_cache.stats()[outcome]) for outcome in ("hits", "stale_hits", "misses")],
+    ["outcome"],
+    type="counter"
+)
+REGISTRY.callback(
+    "cache_hit_ratio",
+    "Proporción de consultas a la caché servidas sin ir al origen",
+    lambda: [((), response_cache.stats()["hit_ratio"])]
+)
+REGISTRY.callback(
+    "stream_subscribers",
+    "Clientes suscritos a actualizaciones en vivo",
+    lambda: [((), len(broadcaster.subscribers))]
+)
+
+async def run_ingestion():
+    counts = await ingest_all(collector_registry)
+    for result in ("inserted", "updated", "skipped"):
+        INGESTED_ROWS.inc(counts[result], result=result)
+    # Las respuestas de lecturas cambian solo tras una ingesta con cambios; las
+    # lecturas ya están guardadas, así que publicar no puede hacer fallar la ingesta
+    if counts["inserted"] or counts["updated"]:
+        await publish_updates()
+    return counts
+
+async def publish_updates():
+    """Invalida la caché de lecturas y difunde lecturas, estadísticas por cuadrante y clima.
+
+    Cada paso captura sus propios errores: un fallo en las estadísticas o en
+    el clima se registra sin impedir los demás pasos ni marcar la ingesta
+    como fallida (lo que activaría el backoff del programador).
+    """
+    async def publish_readings():
+        readings = await asyncio.to_thread(_latest_readings_body, "openmeteo", 24, "records")
+        broadcaster.publish("readings", readings or _fallback_readings_body("records"))
+
+    async def publish_quadrant_stats():
+        stats = await asyncio.to_thread(_update_quadrant_stats_body)
+        broadcaster.publish("quadrant_stats", stats)
+
+    async def publish_weather():
+        weather_data = await response_cache.get_or_fetch(
+            "weather",
+            openmeteo_collector.get_weather_data,
+            ttl=config.WEATHER_CACHE_TTL,
+            stale_ttl=config.WEATHER_STALE_TTL,
+            negative_ttl=config.WEATHER_NEGATIVE_TTL
+        )
+        if weather_data:
+            broadcaster.publish("weather", dumps(weather_data))
+
+    steps = [
+        ("caché de lecturas", lambda: response_cache.invalidate("air-quality")),
+        ("lecturas", publish_readings),
+        ("estadísticas por cuadrante", publish_quadrant_stats),
+        ("clima", publish_weather),
+    ]
+    for name, step in steps:
+        try:
+            await step()
+        except Exception as e:
+            print(f"Error publicando {name}: {str(e)}")
+
+async def run_forecast():
+    stored = await asyncio.to_thread(_run_forecast_cycle)
+    if stored is None:
+        raise RuntimeError("No se pudieron guardar las predicciones")
+    if stored:
+        await response_cache.invalidate("predictions")
+    return {"predictions": stored}
+
+def _run_forecast_cycle():
+    """Incorpora las horas completas nuevas a los modelos y guarda una corrida.
+
+    Solo se consultan las lecturas posteriores a la última hora incorporada,
+    y nunca más allá de FORECAST_HISTORY_DAYS, así que el costo de cada ciclo
+    no crece con el historial. Los cuadrantes sin lecturas en ese periodo se
+    descartan.
+    """
+    now = datetime.now()
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+    oldest = current_hour - timedelta(days=config.FORECAST_HISTORY_DAYS)
+    quadrant_forecaster.expire(oldest)
+    start = quadrant_forecaster.next_start(oldest)
+    db = SessionLocal()
+    try:
+        rows = PredictionRepository.get_forecast_inputs(db, start, current_hour)
+        quadrant_forecaster.fold(hourly_quadrant_means(rows, parent_quadrant))
+        predictions = quadrant_forecaster.forecast(now)
+        return PredictionRepository.store_predictions(db, predictions)
+    finally:
+        db.close()
+
+async def run_partition_maintenance():
+    """Crea las particiones de los próximos meses y aplica la retención"""
+    result = await asyncio.to_thread(run_maintenance, engine)
+    return {"partitions": len(result["created"]), "retention": len(result["retention"])}
+
+def _predictions_body(quadrant_name: Optional[str]) -> bytes:
+    db = SessionLocal()
+    try:
+        predictions = PredictionRepository.get_latest_predictions(db, quadrant_name)
+        return dumps([pred.to_dict() for pred in predictions])
+    finally:
+        db.close()
+
+def _latest_readings_body(source: str, limit: int, layout: str) -> Optional[bytes]:
+    """Serializa las últimas lecturas de una fuente usando una sesión propia.
+
+    Retorna None si no hay lecturas, para que la caché no guarde los datos de
+    ejemplo bajo la clave de las lecturas reales.
+    """
+    db = SessionLocal()
+    try:
+        rows = AirQualityRepository.get_latest_readings_by_source(db, source, limit)
+        return dumps(serialize_rows(rows, layout)) if rows else None
+    finally:
+        db.close()
+
+def _fallback_readings_body(layout: str) -> bytes:
+    """Datos de ejemplo para cuando no hay lecturas en absoluto (nunca se guardan en caché)"""
+    return dumps(serialize_rows(dicts_to_rows(get_fallback_data()), layout))
+
+def _latest_readings_all_sources_body(limit: int) -> bytes:
+    db = SessionLocal()
+    try:
+        readings = AirQualityRepository.get_latest_readings(db, limit=limit)
+        return dumps([reading.to_dict() for reading in readings])
+    finally:
+        db.close()
+
+def _update_quadrant_stats() -> List[dict]:
+    """Recalcula las estadísticas por cuadrante de la ventana reciente"""
+    # La ingesta y el endpoint no deben insertar el mismo resumen dos veces
+    with quadrant_stats_lock:
+        db = SessionLocal()
+        try:
+            stats = QuadrantStatsRepository.update_running_stats(
+                db, config.QUADRANT_STATS_WINDOW_HOURS
+            )
+            return [stat.to_dict() for stat in stats]
+        finally:
+            db.close()
+
+def _update_quadrant_stats_body() -> bytes:
+    return dumps(_update_quadrant_stats())
+
+def _estimated_grid_body(
+    pollutant: str,
+    method: str,
+    rows: int,
+    cols: int,
+    power: float,
+    range_km: float
+) -> bytes:
+    """Interpola las últimas lecturas de cada estación sobre la rejilla de Xalapa"""
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        stations = AirQualityRepository.get_latest_station_readings(
+            db, now - timedelta(hours=config.ESTIMATOR_LOOKBACK_HOURS), now
+        )
+    finally:
+        db.close()
+
+    grid = GridSpec(rows, cols)
+    values = pollution_estimator.estimate(
+        [station.latitude for station in stations],
+        [station.longitude for station in stations],
+        [getattr(station, pollutant) for station in stations],
+        grid,
+        method=method,
+        power=power,
+        range_km=range_km
+    )
+    return orjson.dumps(
+        {
+            "pollutant": pollutant,
+            "method": method,
+            "stations": len(stations),
+            "grid": grid.to_dict(),
+            "values": np.round(values, 2).ravel()
+        },
+        option=orjson.OPT_SERIALIZE_NUMPY
+    )
+
+# Programador de ingesta en segundo plano
+scheduler = IngestionScheduler()
+scheduler.add_job(ScheduledJob(
+    "collectors",
+    run_ingestion,
+    interval=config.INGESTION_INTERVAL,
+    jitter=config.INGESTION_JITTER,
+    max_backoff=config.INGESTION_MAX_BACKOFF
+))
+scheduler.add_job(ScheduledJob(
+    "forecast",
+    run_forecast,
+    interval=config.FORECAST_INTERVAL,
+    jitter=config.INGESTION_JITTER,
+    max_backoff=config.INGESTION_MAX_BACKOFF
+))
+scheduler.add_job(ScheduledJob(
+    "maintenance",
+    run_partition_maintenance,
+    interval=config.MAINTENANCE_INTERVAL,
+    jitter=config.INGESTION_JITTER,
+    max_backoff=config.INGESTION_MAX_BACKOFF
+))
+
+# Recargas históricas en curso por id de trabajo
+backfill_tasks: Dict[int, asyncio.Task] = {}
+
+async def _on_backfill_chunk(counts: dict):
+    for result in ("inserted", "updated", "skipped"):
+        INGESTED_ROWS.inc(counts[result], result=result)
+    if counts["inserted"] or counts["updated"]:
+        await response_cache.invalidate("air-quality")
+
+def _start_backfill(job_id: int):
+    task = asyncio.create_task(
+        run_backfill_job(job_id, openmeteo_collector, on_chunk=_on_backfill_chunk, claimed=True)
+    )
+    backfill_tasks[job_id] = task
+    task.add_done_callback(lambda _: backfill_tasks.pop(job_id, None))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.INGESTION_ENABLED:
+        scheduler.start()
+    yield
+    await scheduler.stop()
+    # Las recargas interrumpidas quedan registradas y se pueden reanudar
+    tasks = list(backfill_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_http_client()
 
 # Crear la aplicación FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Peticiones condicionales (ETag/Last-Modified) en los endpoints de lecturas
+app.add_middleware(
+    ConditionalGetMiddleware,
+    watermark=watermark,
+    paths=["/api/air-quality"],
+    exclude_paths=["/api/air-quality/export", "/api/air-quality/grid"],
+    max_age=config.HTTP_CACHE_MAX_AGE
+)
+
+# Compresión de respuestas grandes (brotli si está instalado, si no gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    compressor=BrotliMiddleware or GZipMiddleware,
+    exclude_paths=["/api/stream"],
+    minimum_size=config.COMPRESSION_MIN_SIZE
+)
 
 # Configurar CORS
 app.add_middleware(
@@ -24,41 +387,46 @@ app.add_middleware(
     allow_origins=["*"],
     allow_credentials=False,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"]
 )
 
-# Crear las tablas de la base de datos
+# Latencia por ruta (el canal SSE es de larga duración y no se mide)
+app.add_middleware(MetricsMiddleware, exclude_paths=["/api/stream", "/metrics"])
+
+# Crear las tablas de la base de datos y aplicar migraciones pendientes
 models.Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
-# Inicializar el colector
-openmeteo_collector = OpenMeteoCollector()
+def _test_database(db: Session):
+    # Intentar crear un registro de prueba
+    test_reading = models.AirQualityReading(
+        latitude=19.5438,
+        longitude=-96.9102,
+        pm25=25.0,
+        pm10=50.0,
+        no2=30.0,
+        o3=40.0,
+        co=1.0,
+        source="test"
+    )
+    db.add(test_reading)
+    db.commit()
+    
+    # Leer el registro
+    latest = db.query(models.AirQualityReading)\
+        .order_by(models.AirQualityReading.timestamp.desc())\
+        .first()
+    
+    return {
+        "message": "Database test successful", 
+        "data": latest.to_dict() if latest else None
+    }
 
 @app.get("/api/test-db")
-async def test_database(db: Session = Depends(get_db)):
+async def test_database(db: DBSession = Depends(get_async_db)):
     try:
-        # Intentar crear un registro de prueba
-        test_reading = models.AirQualityReading(
-            latitude=19.5438,
-            longitude=-96.9102,
-            pm25=25.0,
-            pm10=50.0,
-            no2=30.0,
-            o3=40.0,
-            co=1.0,
-            source="test"
-        )
-        db.add(test_reading)
-        db.commit()
-        
-        # Leer el registro
-        latest = db.query(models.AirQualityReading)\
-            .order_by(models.AirQualityReading.timestamp.desc())\
-            .first()
-        
-        return {
-            "message": "Database test successful", 
-            "data": latest.to_dict() if latest else None
-        }
+        return await run_sync(db, _test_database)
     except Exception as e:
         return {"error": f"Database test failed: {str(e)}"}
 
@@ -69,12 +437,71 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas en formato de exposición de Prometheus"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/ingestion/status")
+async def get_ingestion_status():
+    """Estado de las tareas de ingesta en segundo plano"""
+    return scheduler.status()
+
+@app.get("/api/stream")
+async def stream_updates(request: Request):
+    """Canal SSE: envía 'readings', 'weather' y 'quadrant_stats' tras cada ingesta"""
+    async def event_stream():
+        subscription = broadcaster.subscribe()
+        try:
+            yield b"retry: 10000\n\n"
+            while not await request.is_disconnected():
+                message = await subscription.next(timeout=config.STREAM_KEEPALIVE)
+                yield message.sse if message else b": keepalive\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/ws")
+async def websocket_updates(websocket: WebSocket):
+    """Canal WebSocket con los mismos eventos que /api/stream"""
+    await websocket.accept()
+    subscription = broadcaster.subscribe()
+
+    async def wait_disconnect():
+        while True:
+            await websocket.receive_text()
+
+    receiver = asyncio.create_task(wait_disconnect())
+    try:
+        while True:
+            next_message = asyncio.create_task(subscription.next())
+            done, _ = await asyncio.wait(
+                {receiver, next_message}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if receiver in done:
+                next_message.cancel()
+                break
+            await websocket.send_text(next_message.result().text)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(subscription)
+        receiver.cancel()
+
 @app.get("/api/air-quality/latest")
-async def get_latest_readings(db: Session = Depends(get_db)):
+async def get_latest_readings():
     """Endpoint para obtener las últimas lecturas"""
     try:
-        readings = AirQualityRepository.get_latest_readings(db, limit=10)
-        return [reading.to_dict() for reading in readings]
+        body = await response_cache.get_or_fetch(
+            "air-quality:latest",
+            lambda: asyncio.to_thread(_latest_readings_all_sources_body, 10)
+        )
+        return Response(body, media_type="application/json")
     except Exception as e:
         print(f"Error obteniendo últimas lecturas: {str(e)}")
         raise HTTPException(
@@ -86,14 +513,16 @@ async def get_latest_readings(db: Session = Depends(get_db)):
 async def get_air_quality_history(
     start_time: datetime,
     end_time: datetime,
-    db: Session = Depends(get_db)
+    layout: Layout = "records",
+    source: Optional[str] = None,
+    db: DBSession = Depends(get_async_db)
 ):
     """Endpoint para obtener datos históricos de calidad del aire"""
     try:
-        readings = AirQualityRepository.get_readings_in_timeframe(
-            db, start_time, end_time
+        readings = await AsyncAirQualityRepository.get_readings_in_timeframe(
+            db, start_time, end_time, source=source
         )
-        return [reading.to_dict() for reading in readings]
+        return readings_response(readings, layout)
     except Exception as e:
         print(f"Error en get_air_quality_history: {str(e)}")
         raise HTTPException(
@@ -101,11 +530,109 @@ async def get_air_quality_history(
             detail={"error": "Error al obtener datos históricos"}
         )
 
+@app.get("/api/air-quality/export")
+async def export_air_quality_history(
+    start_time: datetime,
+    end_time: datetime,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    source: Optional[str] = None
+):
+    """Exporta lecturas históricas en streaming (NDJSON o CSV).
+
+    Las filas se leen y envían por bloques, por lo que la memoria del
+    proceso no depende del tamaño del rango solicitado.
+    """
+    filename = f"air_quality_{start_time:%Y%m%d}_{end_time:%Y%m%d}.{format}"
+    return StreamingResponse(
+        stream_readings_export(start_time, end_time, format, source),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/air-quality/aggregate")
+async def get_air_quality_aggregate(
+    start_time: datetime,
+    end_time: datetime,
+    bucket: Literal["hour", "day", "week"] = "hour",
+    pollutants: List[Literal["pm25", "pm10", "no2", "o3", "co"]] = Query(POLLUTANTS),
+    percentiles: List[int] = Query([]),
+    source: Optional[str] = None,
+    db: DBSession = Depends(get_async_db)
+):
+    """Endpoint para obtener promedios, máximos y percentiles por hora/día/semana"""
+    if any(not 1 <= percentile <= 99 for percentile in percentiles):
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Los percentiles deben estar entre 1 y 99"}
+        )
+    try:
+        buckets = await AsyncAirQualityRepository.aggregate_readings(
+            db, start_time, end_time, bucket, pollutants, percentiles, source
+        )
+        return ORJSONResponse(buckets)
+    except Exception as e:
+        print(f"Error en get_air_quality_aggregate: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Error al obtener datos agregados"}
+        )
+
+@app.get("/api/air-quality/rollups")
+async def get_air_quality_rollups(
+    start_time: datetime,
+    end_time: datetime,
+    granularity: Literal["hour", "day"] = "day",
+    pollutants: List[Literal["pm25", "pm10", "no2", "o3", "co"]] = Query(POLLUTANTS),
+    source: Optional[str] = None,
+    db: DBSession = Depends(get_async_db)
+):
+    """Endpoint para consultar rangos largos desde los rollups precalculados"""
+    try:
+        rollups = await AsyncRollupRepository.get_rollups(
+            db, granularity, start_time, end_time, source, pollutants
+        )
+        return ORJSONResponse(rollups)
+    except Exception as e:
+        print(f"Error en get_air_quality_rollups: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Error al obtener rollups"}
+        )
+
+@app.get("/api/air-quality/grid")
+async def get_estimated_grid(
+    pollutant: Literal["pm25", "pm10", "no2", "o3", "co"] = "pm25",
+    method: Literal["idw", "kriging"] = "idw",
+    rows: int = Query(100, ge=2, le=config.ESTIMATOR_MAX_GRID),
+    cols: int = Query(100, ge=2, le=config.ESTIMATOR_MAX_GRID),
+    power: float = Query(2.0, gt=0, le=6),
+    range_km: float = Query(5.0, gt=0)
+):
+    """Rejilla interpolada para el mapa de calor.
+
+    ``values`` es la rejilla aplanada fila por fila (fila 0 = borde norte,
+    columna 0 = borde oeste); null donde no hay datos.
+    """
+    try:
+        body = await response_cache.get_or_fetch(
+            f"air-quality:grid:{pollutant}:{method}:{rows}:{cols}:{power}:{range_km}",
+            lambda: asyncio.to_thread(
+                _estimated_grid_body, pollutant, method, rows, cols, power, range_km
+            )
+        )
+        return Response(body, media_type="application/json")
+    except Exception as e:
+        print(f"Error en get_estimated_grid: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Error al estimar la rejilla de contaminación"}
+        )
+
 @app.get("/api/traffic")
-async def get_traffic_data(db: Session = Depends(get_db)):
+async def get_traffic_data(db: DBSession = Depends(get_async_db)):
     """Endpoint para obtener datos de tráfico"""
     try:
-        traffic_data = TrafficRepository.get_latest_traffic_data(db)
+        traffic_data = await AsyncTrafficRepository.get_latest_traffic_data(db)
         return [data.to_dict() for data in traffic_data]
     except Exception as e:
         print(f"Error en get_traffic_data: {str(e)}")
@@ -117,11 +644,11 @@ async def get_traffic_data(db: Session = Depends(get_db)):
 @app.get("/api/quadrants/{quadrant_name}/stats")
 async def get_quadrant_stats(
     quadrant_name: str,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_async_db)
 ):
     """Endpoint para obtener estadísticas por cuadrante"""
     try:
-        stats = QuadrantStatsRepository.get_latest_stats_by_quadrant(
+        stats = await AsyncQuadrantStatsRepository.get_latest_stats_by_quadrant(
             db, quadrant_name
         )
         return stats.to_dict() if stats else None
@@ -134,15 +661,19 @@ async def get_quadrant_stats(
 
 @app.get("/api/predictions")
 async def get_predictions(
-    quadrant_name: Optional[str] = None,
-    db: Session = Depends(get_db)
+    quadrant_name: Optional[str] = None
 ):
-    """Endpoint para obtener predicciones de calidad del aire"""
+    """Endpoint para obtener predicciones de calidad del aire.
+
+    Sirve la última corrida del pronóstico programado; no entrena modelos
+    durante la petición.
+    """
     try:
-        predictions = PredictionRepository.get_latest_predictions(
-            db, quadrant_name
+        body = await response_cache.get_or_fetch(
+            f"predictions:{quadrant_name or ''}",
+            lambda: asyncio.to_thread(_predictions_body, quadrant_name)
         )
-        return [pred.to_dict() for pred in predictions]
+        return Response(body, media_type="application/json")
     except Exception as e:
         print(f"Error en get_predictions: {str(e)}")
         raise HTTPException(
@@ -151,19 +682,16 @@ async def get_predictions(
         )
 
 @app.get("/api/quadrants/update-stats")
-async def update_quadrant_stats(db: Session = Depends(get_db)):
+async def update_quadrant_stats():
     """Endpoint para actualizar estadísticas de todos los cuadrantes"""
     try:
-        # Obtener los últimos datos de calidad del aire
-        latest_readings = AirQualityRepository.get_latest_readings(db, limit=100)
+        # Sin lecturas nuevas ni cambio de hora no se vuelve a leer la ventana
+        stats = await asyncio.to_thread(_update_quadrant_stats)
         
-        # Actualizar estadísticas para cada cuadrante
-        for quadrant in ["Noroeste", "Noreste", "Suroeste", "Sureste"]:
-            QuadrantStatsRepository.calculate_quadrant_stats(
-                db, quadrant, latest_readings
-            )
-        
-        return {"message": "Estadísticas actualizadas correctamente"}
+        return {
+            "message": "Estadísticas actualizadas correctamente",
+            "quadrants": [stat["quadrant_name"] for stat in stats]
+        }
     except Exception as e:
         print(f"Error en update_quadrant_stats: {str(e)}")
         raise HTTPException(
@@ -171,10 +699,17 @@ async def update_quadrant_stats(db: Session = Depends(get_db)):
             detail={"error": "Error al actualizar estadísticas"}
         )
 @app.get("/api/weather")
-async def get_weather(db: Session = Depends(get_db)):
+async def get_weather():
     """Endpoint para obtener datos meteorológicos"""
     try:
-        weather_data = await openmeteo_collector.get_weather_data()
+        # Una sola consulta a Open Meteo por TTL, sin importar cuántos clientes consulten
+        weather_data = await response_cache.get_or_fetch(
+            "weather",
+            openmeteo_collector.get_weather_data,
+            ttl=config.WEATHER_CACHE_TTL,
+            stale_ttl=config.WEATHER_STALE_TTL,
+            negative_ttl=config.WEATHER_NEGATIVE_TTL
+        )
         if weather_data:
             return weather_data
         raise HTTPException(
@@ -190,61 +725,48 @@ async def get_weather(db: Session = Depends(get_db)):
 
 @app.get("/api/air-quality")
 async def get_air_quality(
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_async_db),
     source: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
-    limit: int = 10,
-    offset: int = 0
+    limit: int = Query(24, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    layout: Layout = "records"
 ):
-    """Endpoint para obtener datos de calidad del aire"""
+    """Endpoint para obtener datos de calidad del aire.
+
+    Solo lee de la base de datos: la consulta a Open Meteo la realiza el
+    programador de ingesta en segundo plano. Con ``start_time``/``end_time``
+    la paginación es por cursor: la cabecera ``X-Next-Cursor`` trae el valor
+    de ``cursor`` para la página siguiente.
+    """
     try:
         # Si se solicitan datos históricos
         if start_time and end_time:
-            readings = AirQualityRepository.get_readings_in_timeframe(
-                db, start_time, end_time, limit, offset
+            readings, next_cursor = await AsyncAirQualityRepository.get_readings_page(
+                db, start_time, end_time, limit, cursor, source
             )
-            if readings:
-                return [reading.to_dict() for reading in readings]
+            if readings or cursor:
+                response = readings_response(readings, layout)
+                if next_cursor:
+                    response.headers["X-Next-Cursor"] = next_cursor
+                return response
 
-        # Obtener nuevos datos de Open Meteo
-        openmeteo_data = await openmeteo_collector.get_air_quality_data()
-        
-        if openmeteo_data:
-            # Guardar los datos en la base de datos
-            try:
-                success = AirQualityRepository.store_batch_readings(
-                    db,
-                    [{
-                        "latitude": reading["latitude"],
-                        "longitude": reading["longitude"],
-                        "pm25": reading["pm25"],
-                        "pm10": reading["pm10"],
-                        "no2": reading["no2"],
-                        "o3": reading["o3"],
-                        "co": reading["co"],
-                        "source": "openmeteo",
-                        "raw_data": reading,
-                        "timestamp": datetime.now()
-                    } for reading in openmeteo_data]
-                )
-                print(f"Datos almacenados en la base de datos: {success}")
-            except Exception as e:
-                print(f"Error guardando datos en la base de datos: {str(e)}")
-            
-            return openmeteo_data
-        
-        # Si no hay datos nuevos, obtener los últimos datos almacenados
-        latest_readings = AirQualityRepository.get_latest_readings_by_source(
-            db, source or "openmeteo", limit
+        # Obtener los últimos datos almacenados (respuesta en caché hasta la siguiente ingesta)
+        source = source or "openmeteo"
+        body = await response_cache.get_or_fetch(
+            f"air-quality:{source}:{limit}:{layout}",
+            lambda: asyncio.to_thread(_latest_readings_body, source, limit, layout)
         )
+        if body is None:
+            body = _fallback_readings_body(layout)
+        return Response(body, media_type="application/json")
         
-        if latest_readings:
-            return [reading.to_dict() for reading in latest_readings]
-            
-        # Si no hay datos en absoluto, usar datos de ejemplo
-        return get_fallback_data()
-        
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": str(e)}
+        )
     except Exception as e:
         print(f"Error en get_air_quality: {str(e)}")
         raise HTTPException(
@@ -255,34 +777,146 @@ async def get_air_quality(
 @app.get("/api/air-quality/history/daily")
 async def get_daily_history(
     date: date,
-    limit: Optional[int] = 100,
-    offset: Optional[int] = 0,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Literal["none", "approximate", "exact"] = "none",
+    layout: Layout = "records",
+    source: Optional[str] = None,
+    db: DBSession = Depends(get_async_db)
 ):
-    """Obtiene el historial de un día específico"""
+    """Obtiene el historial de un día específico.
+
+    La paginación es por cursor: cada respuesta incluye ``next_cursor``, que
+    se envía en la siguiente petición para obtener la página siguiente. El
+    total es opcional (``total=exact`` o ``total=approximate``).
+    """
     try:
         start_time = datetime.combine(date, time.min)
         end_time = datetime.combine(date, time.max)
         
-        # Obtener el total de registros para este día
-        total_count = AirQualityRepository.get_readings_count_in_timeframe(
-            db, start_time, end_time
-        )
+        # Obtener el total de registros para este día solo si se solicita
+        total_count = None
+        if total == "exact":
+            total_count = await AsyncAirQualityRepository.get_readings_count_in_timeframe(
+                db, start_time, end_time, source
+            )
+        elif total == "approximate":
+            total_count = await AsyncAirQualityRepository.get_readings_count_estimate(
+                db, start_time, end_time, source
+            )
         
-        # Obtener los registros con paginación
-        readings = AirQualityRepository.get_readings_in_timeframe(
-            db, start_time, end_time, limit, offset
+        # Obtener los registros de la página solicitada
+        readings, next_cursor = await AsyncAirQualityRepository.get_readings_page(
+            db, start_time, end_time, limit, cursor, source
         )
         
-        return {
+        return ORJSONResponse({
             "total": total_count,
             "limit": limit,
-            "offset": offset,
-            "data": [reading.to_dict() for reading in readings]
-        }
+            "next_cursor": next_cursor,
+            "data": serialize_rows(readings, layout)
+        })
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": str(e)}
+        )
     except Exception as e:
         print(f"Error getting daily history: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail={"error": "Error al obtener historial diario"}
         )
+
+@app.post("/api/backfill")
+async def start_backfill(
+    start_date: date,
+    end_date: date,
+    chunk_days: int = Query(config.BACKFILL_CHUNK_DAYS, ge=1, le=92),
+    db: DBSession = Depends(get_async_db)
+):
+    """Inicia en segundo plano la recarga histórica de un rango de fechas.
+
+    ``end_date`` se recorta a la fecha actual; solo una recarga corre a la vez.
+    """
+    try:
+        job_id = await asyncio.to_thread(create_backfill_job, start_date, end_date, chunk_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": str(e)})
+    except BackfillConflictError as e:
+        raise HTTPException(status_code=409, detail={"error": str(e)})
+    if job_id is None:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Error al crear la recarga histórica"}
+        )
+    if not await asyncio.to_thread(claim_backfill_job, job_id):
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "Otra recarga histórica está en curso"}
+        )
+    _start_backfill(job_id)
+    job = await AsyncBackfillRepository.get_job(db, job_id)
+    return {**job.to_dict(), "running": True}
+
+@app.get("/api/backfill/{job_id}")
+async def get_backfill(job_id: int, db: DBSession = Depends(get_async_db)):
+    """Estado y progreso de una recarga histórica"""
+    job = await AsyncBackfillRepository.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "La recarga histórica no existe"}
+        )
+    # El estado está en la base de datos: la recarga puede correr en otro proceso
+    return {**job.to_dict(), "running": job.status == "running"}
+
+@app.post("/api/backfill/{job_id}/resume")
+async def resume_backfill(job_id: int, db: DBSession = Depends(get_async_db)):
+    """Reanuda una recarga histórica pidiendo solo los fragmentos pendientes"""
+    job = await AsyncBackfillRepository.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "La recarga histórica no existe"}
+        )
+    # La asignación en la base de datos cubre también recargas de otros procesos
+    if not await asyncio.to_thread(claim_backfill_job, job_id):
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "Hay una recarga histórica en curso"}
+        )
+    _start_backfill(job_id)
+    return {**job.to_dict(), "status": "running", "running": True}
+
+@app.get("/api/air-quality/{reading_id}/raw")
+async def get_air_quality_raw(
+    reading_id: int,
+    db: DBSession = Depends(get_async_db)
+):
+    """Payload crudo de una lectura, leído bajo demanda del almacenamiento comprimido"""
+    payload = await AsyncRawPayloadRepository.get_payload(
+        db, models.AirQualityReading, reading_id
+    )
+    if payload is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "La lectura no existe o no tiene payload crudo"}
+        )
+    return {"id": reading_id, "raw_data": payload}
+
+@app.get("/api/traffic/{traffic_id}/raw")
+async def get_traffic_raw(
+    traffic_id: int,
+    db: DBSession = Depends(get_async_db)
+):
+    """Payload crudo de un registro de tráfico, leído bajo demanda"""
+    payload = await AsyncRawPayloadRepository.get_payload(
+        db, models.TrafficData, traffic_id
+    )
+    if payload is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "El registro no existe o no tiene payload crudo"}
+        )
+    return {"id": traffic_id, "raw_data": payload}
@@ -0,0 +1,306 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Buckets de latencia (segundos) compartidos por los histogramas
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Contador monótono con etiquetas"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self.labelnames, key, "", value) for key, value in items]
+
+
+class Histogram:
+    """Histograma acumulado por buckets con etiquetas"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Por etiqueta: [conteos por bucket (+Inf al final), suma]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((
+                    f"{self.name}_bucket", self.labelnames, key,
+                    f'le="{_format_value(bound)}"', cumulative
+                ))
+            samples.append((f"{self.name}_sum", self.labelnames, key, "", total))
+            samples.append((f"{self.name}_count", self.labelnames, key, "", cumulative))
+        return samples
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class CallbackMetric:
+    """Métrica cuyo valor se lee al momento de exportar (gauges de pool, caché, etc.)"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Tuple[tuple, float]]],
+        labelnames: Sequence[str] = (),
+        type: str = "gauge"
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.type = type
+
+    def samples(self):
+        try:
+            return [
+                (self.name, self.labelnames, key, "", value)
+                for key, value in self.callback() if value is not None
+            ]
+        except Exception as e:
+            print(f"Error leyendo la métrica {self.name}: {str(e)}")
+            return []
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, callback, labelnames: Sequence[str] = (), type: str = "gauge"):
+        return self.register(CallbackMetric(name, documentation, callback, labelnames, type))
+
+    def render(self) -> str:
+        """Texto en el formato de exposición de Prometheus"""
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for sample_name, labelnames, values, extra, value in metric.samples():
+                lines.append(
+                    f"{sample_name}{_format_labels(labelnames, values, extra)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta",
+    ["method", "route", "status"]
+)
+UPSTREAM_REQUEST_DURATION = REGISTRY.histogram(
+    "upstream_request_duration_seconds",
+    "Latencia de las peticiones a APIs externas por host",
+    ["host", "status"]
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "upstream_retries_total",
+    "Reintentos de peticiones a APIs externas",
+    ["host", "reason"]
+)
+COLLECTOR_DURATION = REGISTRY.histogram(
+    "collector_duration_seconds",
+    "Duración de cada colector en un ciclo de ingesta",
+    ["collector", "outcome"]
+)
+COLLECTOR_ERRORS = REGISTRY.counter(
+    "collector_errors_total",
+    "Ciclos en los que un colector falló o agotó su tiempo límite",
+    ["collector"]
+)
+FALLBACK_DATA = REGISTRY.counter(
+    "fallback_data_total",
+    "Respuestas servidas con datos sintéticos de respaldo"
+)
+INGESTED_ROWS = REGISTRY.counter(
+    "ingested_rows_total",
+    "Lecturas procesadas por la ingesta según resultado",
+    ["result"]
+)
+JOB_RUNS = REGISTRY.counter(
+    "scheduler_job_runs_total",
+    "Ejecuciones de tareas programadas según resultado",
+    ["job", "outcome"]
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "Duración de las sentencias SQL por tipo",
+    ["operation"]
+)
+
+
+# Motores instrumentados por nombre ('sync', 'async'), para el uso de sus pools
+_INSTRUMENTED_ENGINES: Dict[str, object] = {}
+
+
+def _pool_stats():
+    for engine_name, engine in _INSTRUMENTED_ENGINES.items():
+        pool = engine.pool
+        for name in ("size", "checkedout", "overflow", "checkedin"):
+            method = getattr(pool, name, None)
+            if method is not None:
+                yield (engine_name, name), method()
+
+
+def instrument_engine(engine, name: str = "sync"):
+    """Mide cada sentencia SQL con eventos de SQLAlchemy y expone el uso del pool.
+
+    Con DB_ASYNC se instrumenta también ``async_engine.sync_engine``; los
+    eventos de sentencias se disparan igual sobre el controlador asíncrono.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            DB_QUERY_DURATION.observe(time.perf_counter() - starts.pop(), operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Descartar el inicio pendiente para no desalinear la pila de la conexión
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+    _INSTRUMENTED_ENGINES[name] = engine
+    REGISTRY.callback(
+        "db_pool_connections",
+        "Conexiones del pool de la base de datos por motor y estado",
+        _pool_stats,
+        ["engine", "state"]
+    )
+
+
+class MetricsMiddleware:
+    """Registra la latencia de cada petición HTTP por plantilla de ruta.
+
+    Se usa la plantilla (``/api/air-quality/{id}``) y no el path real para
+    mantener acotado el número de series.
+    """
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ()):
+        self.app = app
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status
+            )
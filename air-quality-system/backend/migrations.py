@@ -0,0 +1,243 @@
+from typing import Iterable
+from sqlalchemy import JSON, DateTime, Integer, inspect, text
+from sqlalchemy.engine import Engine
+from data_collectors.registry import PROMOTED_FIELDS
+
+
+def add_column(table: str, column: str, column_type: str):
+    """Paso de migración que agrega una columna si aún no existe.
+
+    create_all() ya crea la columna en bases de datos nuevas, por lo que
+    ALTER TABLE solo debe ejecutarse en tablas existentes.
+    """
+    def step(conn):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if column not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+    return step
+
+
+def offload_raw_data(table: str, chunk_size: int = 10000, promoted_fields: Iterable[str] = ()):
+    """Paso de migración que mueve la columna JSON raw_data a raw_payload_batches.
+
+    Los payloads existentes se comprimen en lotes de ``chunk_size`` filas,
+    sin los campos de ``promoted_fields`` que ya tienen columna propia (como
+    hace normalize_reading al ingerir). Solo las filas con payload quedan
+    apuntando a su lote; un raw_data JSON null o que queda vacío no cuenta
+    como payload. Al final la columna se elimina.
+    """
+    def step(conn):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "raw_data" not in columns:
+            return
+        import models
+        from raw_payloads import encode_payloads
+
+        batches = models.RawPayloadBatch.__table__
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                text(
+                    f"SELECT id, timestamp, raw_data FROM {table} "
+                    "WHERE id > :last_id AND raw_data IS NOT NULL ORDER BY id LIMIT :limit"
+                ).columns(id=Integer, timestamp=DateTime, raw_data=JSON),
+                {"last_id": last_id, "limit": chunk_size}
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            payloads = {}
+            for row in rows:
+                if isinstance(row.raw_data, dict):
+                    payload = {
+                        key: value for key, value in row.raw_data.items()
+                        if key not in promoted_fields
+                    }
+                else:
+                    payload = row.raw_data
+                if payload:
+                    payloads[row.id] = payload
+            if not payloads:
+                continue
+
+            codec, blob = encode_payloads(payloads)
+            batch_id = conn.execute(
+                batches.insert().returning(batches.c.id),
+                {
+                    "table_name": table,
+                    "codec": codec,
+                    "row_count": len(payloads),
+                    "end_time": max(
+                        (row.timestamp for row in rows if row.id in payloads and row.timestamp),
+                        default=None
+                    ),
+                    "payload": blob
+                }
+            ).scalar_one()
+            conn.execute(
+                text(f"UPDATE {table} SET raw_batch_id = :batch_id WHERE id = :id"),
+                [{"batch_id": batch_id, "id": row_id} for row_id in payloads]
+            )
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN raw_data"))
+    return step
+
+def assign_quadrants(conn):
+    """Paso de migración que asigna quadrant_name a las lecturas que no lo tienen.
+
+    Las lecturas anteriores a 0004 quedaron sin cuadrante; se resuelven por
+    par de coordenadas distinto con el mismo índice que usa la ingesta.
+    """
+    from quadrants import QUADRANT_INDEX
+
+    points = conn.execute(text(
+        "SELECT DISTINCT latitude, longitude FROM air_quality_readings "
+        "WHERE quadrant_name IS NULL"
+    )).all()
+    if not points:
+        return
+    names = QUADRANT_INDEX.lookup(
+        [latitude for latitude, _ in points],
+        [longitude for _, longitude in points]
+    )
+    updates = [
+        {"quadrant_name": name, "latitude": latitude, "longitude": longitude}
+        for (latitude, longitude), name in zip(points, names) if name is not None
+    ]
+    if updates:
+        conn.execute(
+            text(
+                "UPDATE air_quality_readings SET quadrant_name = :quadrant_name "
+                "WHERE quadrant_name IS NULL AND latitude = :latitude AND longitude = :longitude"
+            ),
+            updates
+        )
+
+
+# Migraciones idempotentes aplicadas en orden al iniciar la aplicación.
+# create_all() crea las tablas nuevas, pero no modifica las existentes.
+MIGRATIONS = [
+    (
+        "0001_air_quality_natural_key",
+        [
+            # Eliminar duplicados antes de crear el índice único
+            """
+            DELETE FROM air_quality_readings
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM air_quality_readings
+                GROUP BY source, timestamp, latitude, longitude
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_air_quality_natural_key
+            ON air_quality_readings (source, timestamp, latitude, longitude)
+            """,
+        ]
+    ),
+    (
+        "0002_time_series_indexes",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_air_quality_timestamp "
+            "ON air_quality_readings (timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_traffic_data_timestamp "
+            "ON traffic_data (timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_quadrant_stats_quadrant_timestamp "
+            "ON quadrant_statistics (quadrant_name, timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_predictions_quadrant_timestamp "
+            "ON air_quality_predictions (quadrant_name, timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_predictions_timestamp "
+            "ON air_quality_predictions (timestamp)",
+        ]
+    ),
+    (
+        "0003_keyset_pagination_index",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_air_quality_timestamp_id "
+            "ON air_quality_readings (timestamp, id)",
+            "DROP INDEX IF EXISTS ix_air_quality_timestamp",
+        ]
+    ),
+    (
+        "0004_air_quality_quadrant",
+        [
+            add_column("air_quality_readings", "quadrant_name", "VARCHAR"),
+            "CREATE INDEX IF NOT EXISTS ix_air_quality_quadrant_timestamp "
+            "ON air_quality_readings (quadrant_name, timestamp)",
+        ]
+    ),
+    (
+        "0005_prediction_runs",
+        [
+            add_column("air_quality_predictions", "issued_at", "TIMESTAMP"),
+            add_column("air_quality_predictions", "horizon_hours", "INTEGER"),
+            "CREATE INDEX IF NOT EXISTS ix_predictions_issued_at "
+            "ON air_quality_predictions (issued_at)",
+        ]
+    ),
+    # 0006 (particiones mensuales en PostgreSQL) ya no corre al arrancar: copiar
+    # la tabla completa requiere una ventana de mantenimiento y se ejecuta con
+    # `python partitions.py migrate`
+    (
+        # Payloads crudos comprimidos fuera de las tablas calientes
+        "0007_raw_payload_batches",
+        [
+            add_column("air_quality_readings", "raw_batch_id", "INTEGER"),
+            add_column("traffic_data", "raw_batch_id", "INTEGER"),
+            offload_raw_data("air_quality_readings", promoted_fields=PROMOTED_FIELDS),
+            offload_raw_data("traffic_data"),
+        ]
+    ),
+    (
+        # Historial anterior a 0004, invisible para estadísticas y pronósticos
+        "0008_backfill_reading_quadrants",
+        [
+            assign_quadrants,
+        ]
+    ),
+    (
+        "0009_backfill_single_running_job",
+        [
+            # Conservar solo la recarga 'running' más reciente antes del índice
+            """
+            UPDATE backfill_jobs SET status = 'interrupted'
+            WHERE status = 'running' AND id < (
+                SELECT MAX(id) FROM backfill_jobs WHERE status = 'running'
+            )
+            """,
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_backfill_jobs_running "
+            "ON backfill_jobs (status) WHERE status = 'running'",
+        ]
+    ),
+    (
+        "0010_rollup_data_version",
+        [
+            add_column("air_quality_rollups", "data_version", "INTEGER"),
+        ]
+    ),
+]
+
+
+def run_migrations(engine: Engine):
+    """Aplica las migraciones pendientes y las registra en schema_migrations"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR PRIMARY KEY)"
+        ))
+        applied = {
+            row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))
+        }
+
+    for version, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                {"version": version}
+            )
+        print(f"Migración aplicada: {version}")
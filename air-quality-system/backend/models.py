@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, JSON, ForeignKey, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -15,7 +15,21 @@ class AirQualityReading(Base):
     o3 = Column(Float)
     co = Column(Float)
     source = Column(String)
-    raw_data = Column(JSON)
+    quadrant_name = Column(String)  # asignado al ingerir según quadrants.XALAPA_QUADRANTS
+    raw_batch_id = Column(Integer)  # payload crudo en raw_payload_batches, se lee bajo demanda
+
+    __table_args__ = (
+        # Clave natural: una lectura por fuente, hora de observación y ubicación
+        Index(
+            "uq_air_quality_natural_key",
+            "source", "timestamp", "latitude", "longitude",
+            unique=True
+        ),
+        # Consultas por rango de tiempo y paginación por cursor (timestamp, id);
+        # las consultas por fuente usan el prefijo (source, timestamp) de la clave natural
+        Index("ix_air_quality_timestamp_id", "timestamp", "id"),
+        Index("ix_air_quality_quadrant_timestamp", "quadrant_name", "timestamp"),
+    )
 
     def to_dict(self):
         return {
@@ -28,9 +42,79 @@ class AirQualityReading(Base):
             "no2": self.no2,
             "o3": self.o3,
             "co": self.co,
-            "source": self.source
+            "source": self.source,
+            "quadrant_name": self.quadrant_name
         }
 
+class AirQualityRollup(Base):
+    """Agregados precalculados (por hora y por día) de las lecturas por fuente"""
+    __tablename__ = "air_quality_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String, nullable=False)  # 'hour', 'day'
+    bucket_start = Column(DateTime, nullable=False)
+    source = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    pm25_count = Column(Integer, nullable=False, default=0)
+    pm25_sum = Column(Float)
+    pm25_min = Column(Float)
+    pm25_max = Column(Float)
+    pm10_count = Column(Integer, nullable=False, default=0)
+    pm10_sum = Column(Float)
+    pm10_min = Column(Float)
+    pm10_max = Column(Float)
+    no2_count = Column(Integer, nullable=False, default=0)
+    no2_sum = Column(Float)
+    no2_min = Column(Float)
+    no2_max = Column(Float)
+    o3_count = Column(Integer, nullable=False, default=0)
+    o3_sum = Column(Float)
+    o3_min = Column(Float)
+    o3_max = Column(Float)
+    co_count = Column(Integer, nullable=False, default=0)
+    co_sum = Column(Float)
+    co_min = Column(Float)
+    co_max = Column(Float)
+    # Versión de las lecturas (data_watermarks) con la que se recalculó el
+    # bucket horario; las estadísticas por cuadrante releen solo las horas nuevas
+    data_version = Column(Integer)
+
+    __table_args__ = (
+        Index(
+            "uq_air_quality_rollups_bucket",
+            "granularity", "bucket_start", "source",
+            unique=True
+        ),
+    )
+
+class RawPayloadBatch(Base):
+    """Payloads crudos de un lote de ingesta, comprimidos en un solo blob.
+
+    El blob contiene ``{id de fila: payload}`` para las filas de
+    ``table_name`` cuyo raw_batch_id apunta a este lote (ver raw_payloads.py).
+    """
+    __tablename__ = "raw_payload_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    table_name = Column(String, nullable=False)
+    codec = Column(String, nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    end_time = Column(DateTime)  # timestamp más reciente de las filas del lote
+    payload = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index("ix_raw_payload_batches_table_end_time", "table_name", "end_time"),
+    )
+
+class DataWatermark(Base):
+    """Versión de los datos de una tabla; se incrementa en la misma transacción que sus escrituras"""
+    __tablename__ = "data_watermarks"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class TrafficData(Base):
     __tablename__ = "traffic_data"
 
@@ -41,7 +125,11 @@ class TrafficData(Base):
     speed = Column(Float)
     road_name = Column(String)
     traffic_level = Column(String)  # 'low', 'medium', 'high'
-    raw_data = Column(JSON)
+    raw_batch_id = Column(Integer)  # payload crudo en raw_payload_batches, se lee bajo demanda
+
+    __table_args__ = (
+        Index("ix_traffic_data_timestamp", "timestamp"),
+    )
 
     def to_dict(self):
         return {
@@ -68,6 +156,10 @@ class QuadrantStatistics(Base):
     traffic_intensity = Column(Float)
     additional_metrics = Column(JSON)
 
+    __table_args__ = (
+        Index("ix_quadrant_stats_quadrant_timestamp", "quadrant_name", "timestamp"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -95,6 +187,15 @@ class AirQualityPrediction(Base):
     predicted_co = Column(Float)
     confidence_level = Column(Float)
     model_metadata = Column(JSON)
+    # Corrida de pronóstico que generó la fila y horas de anticipación
+    issued_at = Column(DateTime)
+    horizon_hours = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_predictions_quadrant_timestamp", "quadrant_name", "timestamp"),
+        Index("ix_predictions_timestamp", "timestamp"),
+        Index("ix_predictions_issued_at", "issued_at"),
+    )
 
     def to_dict(self):
         return {
@@ -107,5 +208,48 @@ class AirQualityPrediction(Base):
             "predicted_o3": self.predicted_o3,
             "predicted_co": self.predicted_co,
             "confidence_level": self.confidence_level,
-            "model_metadata": self.model_metadata
+            "model_metadata": self.model_metadata,
+            "issued_at": self.issued_at.isoformat() if self.issued_at else None,
+            "horizon_hours": self.horizon_hours
+        }
+
+class BackfillJob(Base):
+    """Recarga histórica de una fuente por fragmentos de fechas (ver backfill.py)"""
+    __tablename__ = "backfill_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    chunk_days = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # 'pending', 'running', 'completed', 'failed', 'interrupted'
+    completed_chunks = Column(JSON)  # fecha de inicio (ISO) de cada fragmento guardado
+    counts = Column(JSON)  # inserted/updated/skipped acumulados
+    error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # A lo sumo una recarga 'running': la base de datos serializa claim_job
+        Index(
+            "uq_backfill_jobs_running", "status",
+            unique=True,
+            sqlite_where=text("status = 'running'"),
+            postgresql_where=text("status = 'running'")
+        ),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "source": self.source,
+            "start_date": self.start_date.isoformat(),
+            "end_date": self.end_date.isoformat(),
+            "chunk_days": self.chunk_days,
+            "status": self.status,
+            "completed_chunks": len(self.completed_chunks or []),
+            "counts": self.counts,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
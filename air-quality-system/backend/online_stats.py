@@ -0,0 +1,160 @@
+import math
+from typing import Dict, Optional
+import numpy as np
+
+# Error relativo de los cuantiles estimados por el sketch
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """Sketch de cuantiles con buckets logarítmicos (estilo DDSketch).
+
+    Cada valor positivo cae en el bucket ``ceil(log_gamma(x))``; el cuantil
+    estimado tiene error relativo acotado por ``relative_accuracy``. Dos
+    sketches con la misma precisión se combinan sumando conteos, así que el
+    estado de un cuadrante principal es la suma del de sus subcuadrantes.
+    """
+
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.bins.values())
+
+    def update(self, values: np.ndarray):
+        """Agrega un lote de valores (no negativos) con una sola pasada vectorizada"""
+        positive = values[values > 0]
+        self.zeros += int(values.size - positive.size)
+        if positive.size == 0:
+            return
+        keys, counts = np.unique(
+            np.ceil(np.log(positive) / self._log_gamma).astype(np.int64),
+            return_counts=True
+        )
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def merge(self, other: "QuantileSketch"):
+        self.zeros += other.zeros
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self):
+        keys = sorted(self.bins)
+        return {
+            "accuracy": self.relative_accuracy,
+            "zeros": self.zeros,
+            "keys": keys,
+            "counts": [self.bins[key] for key in keys]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data.get("accuracy", SKETCH_RELATIVE_ACCURACY))
+        sketch.zeros = data.get("zeros", 0)
+        sketch.bins = dict(zip(data.get("keys", []), data.get("counts", [])))
+        return sketch
+
+
+class RunningStats:
+    """Estado agregado de un contaminante: conteo, media, M2 (Welford), mín/máx y cuantiles.
+
+    Los lotes se incorporan con la fórmula de combinación de Chan et al., de
+    modo que actualizar cuesta O(lote) y no requiere volver a leer el historial.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sketch = QuantileSketch()
+
+    def _combine(self, count: int, mean: float, m2: float, minimum: float, maximum: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = minimum if self.min is None else min(self.min, minimum)
+        self.max = maximum if self.max is None else max(self.max, maximum)
+
+    def update(self, values):
+        """Incorpora un lote de valores; los None/NaN se ignoran"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        mean = float(values.mean())
+        self._combine(
+            int(values.size),
+            mean,
+            float(((values - mean) ** 2).sum()),
+            float(values.min()),
+            float(values.max())
+        )
+        self.sketch.update(values)
+
+    def merge(self, other: "RunningStats"):
+        if other.count == 0:
+            return
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def summary(self):
+        """Resumen legible para la API"""
+        variance = self.variance
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "std": math.sqrt(variance) if variance is not None else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.sketch.quantile(0.5),
+            "p95": self.sketch.quantile(0.95)
+        }
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+            "sketch": self.sketch.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunningStats":
+        stats = cls()
+        stats.count = data.get("count", 0)
+        stats.mean = data.get("mean", 0.0)
+        stats.m2 = data.get("m2", 0.0)
+        stats.min = data.get("min")
+        stats.max = data.get("max")
+        stats.sketch = QuantileSketch.from_dict(data.get("sketch", {}))
+        return stats
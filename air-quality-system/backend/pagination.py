@@ -0,0 +1,23 @@
+import base64
+import json
+from datetime import datetime
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime, reading_id: int) -> str:
+    """Codifica la posición (timestamp, id) de la última fila como cursor opaco"""
+    payload = json.dumps({"t": timestamp.isoformat(), "i": reading_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decodifica un cursor y retorna la tupla (timestamp, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Cursor inválido: {cursor}") from e
@@ -0,0 +1,363 @@
+"""Particionado mensual, retención y reducción de resolución del historial.
+
+En PostgreSQL ``air_quality_readings`` y ``traffic_data`` se convierten en
+tablas particionadas por rango de ``timestamp`` (una partición por mes más
+una partición DEFAULT) con ``python partitions.py migrate``, en una ventana
+de mantenimiento; no se hace al arrancar la aplicación. La retención
+elimina particiones completas con DROP TABLE.
+
+En SQLite, que no tiene particiones, la retención borra el mismo rango
+mensual día por día con el índice de timestamp, cada día en su propia
+transacción, para no retener el bloqueo de escritura de la base de datos
+mientras la ingesta sigue activa; las páginas liberadas se reutilizan en
+inserciones posteriores. No se usa una tabla por periodo porque la clave
+natural del upsert y todas las consultas de lecturas suponen una sola
+tabla; SQLite se usa en instalaciones pequeñas, donde el borrado de un mes
+es barato.
+
+Antes de eliminar lecturas crudas se recalculan sus rollups horarios y
+diarios, que conservan el historial agregado; después se eliminan los lotes
+de payloads crudos que solo contenían filas borradas.
+
+Uso:
+    python partitions.py migrate [--chunk-size 50000]
+    python partitions.py ensure
+    python partitions.py retention [--dry-run]
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy import DateTime, column, func, select, table as sql_table, text
+from sqlalchemy.engine import Connection, Engine
+import config
+
+# Tablas de series de tiempo particionadas por mes en PostgreSQL
+PARTITIONED_TABLES = ("air_quality_readings", "traffic_data")
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    month_index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def month_ranges(start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Meses [inicio, fin) que cubren el rango [start, end]"""
+    ranges = []
+    current = month_start(start)
+    while current <= end:
+        following = add_months(current, 1)
+        ranges.append((current, following))
+        current = following
+    return ranges
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+        ),
+        {"table": table}
+    ).first() is not None
+
+
+def list_partitions(conn: Connection, table: str) -> Dict[str, str]:
+    """Particiones de ``table`` con su expresión de rango (PostgreSQL)"""
+    rows = conn.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table}
+    )
+    return {name: bound for name, bound in rows}
+
+
+def ensure_partitions(conn: Connection, table: str, start: datetime, end: datetime) -> List[str]:
+    """Crea las particiones mensuales que falten para el rango [start, end].
+
+    Si la partición DEFAULT ya contiene filas de un mes nuevo (p. ej. por un
+    backfill), se mueven a la partición recién creada. No hace nada fuera de
+    PostgreSQL. Retorna los nombres de las particiones creadas.
+    """
+    if not is_partitioned(conn, table):
+        return []
+
+    existing = list_partitions(conn, table)
+    default = f"{table}_default"
+    created = []
+    for month, following in month_ranges(start, end):
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        bounds = {"start": month, "end": following}
+        pending = conn.execute(
+            text(
+                f"SELECT 1 FROM {default} "
+                "WHERE timestamp >= :start AND timestamp < :end LIMIT 1"
+            ),
+            bounds
+        ).first()
+        if pending:
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        ))
+        if pending:
+            conn.execute(
+                text(
+                    f"INSERT INTO {table} SELECT * FROM {default} "
+                    "WHERE timestamp >= :start AND timestamp < :end"
+                ),
+                bounds
+            )
+            conn.execute(
+                text(f"DELETE FROM {default} WHERE timestamp >= :start AND timestamp < :end"),
+                bounds
+            )
+            conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+        created.append(name)
+    return created
+
+
+def partition_table(engine: Engine, table: str, chunk_size: int = 50000) -> int:
+    """Convierte ``table`` en una tabla particionada por mes (solo PostgreSQL).
+
+    No es una migración automática: se ejecuta con ``python partitions.py
+    migrate``. Las filas se copian por bloques de ids, cada bloque en su
+    propia transacción, a ``<table>_partitioned`` mientras la tabla original
+    sigue en uso. Al final, con la tabla original bloqueada solo para
+    escrituras (EXCLUSIVE permite lecturas), se copian las filas nuevas, se
+    reaplican las actualizaciones y borrados ocurridos durante la copia y se
+    intercambian los nombres. Los índices se crean antes de copiar, así que
+    el bloqueo final no reconstruye ninguno. La clave primaria pasa a ser
+    (id, timestamp) porque debe incluir la clave de partición. Retorna el
+    número de filas copiadas (0 si no había nada que hacer).
+    """
+    import models
+
+    staging = f"{table}_partitioned"
+    model_table = models.Base.metadata.tables[table]
+    with engine.begin() as conn:
+        if conn.dialect.name != "postgresql" or is_partitioned(conn, table):
+            return 0
+        # Restos de un intento interrumpido
+        conn.execute(text(f"DROP TABLE IF EXISTS {staging} CASCADE"))
+        conn.execute(text(f"UPDATE {table} SET timestamp = now() WHERE timestamp IS NULL"))
+        conn.execute(text(
+            f"CREATE TABLE {staging} ("
+            f"LIKE {table} INCLUDING DEFAULTS, PRIMARY KEY (id, timestamp)"
+            f") PARTITION BY RANGE (timestamp)"
+        ))
+        conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {staging} DEFAULT"))
+
+        first, last, max_id = conn.execute(
+            text(f"SELECT MIN(timestamp), MAX(timestamp), MAX(id) FROM {table}")
+        ).one()
+        now = datetime.now()
+        for month, following in month_ranges(
+            min(first or now, now),
+            add_months(max(last or now, now), config.PARTITION_MONTHS_AHEAD)
+        ):
+            conn.execute(text(
+                f"CREATE TABLE {partition_name(table, month)} PARTITION OF {staging} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+            ))
+        for index in model_table.indexes:
+            unique = "UNIQUE " if index.unique else ""
+            columns = ", ".join(column.name for column in index.columns)
+            conn.execute(text(f"CREATE {unique}INDEX {index.name}_new ON {staging} ({columns})"))
+
+    copied = 0
+    max_id = max_id or 0
+    for chunk_start in range(0, max_id, chunk_size):
+        with engine.begin() as conn:
+            copied += conn.execute(
+                text(
+                    f"INSERT INTO {staging} SELECT * FROM {table} "
+                    "WHERE id > :start AND id <= :end"
+                ),
+                {"start": chunk_start, "end": chunk_start + chunk_size}
+            ).rowcount
+        print(f"Particionado {table}: {copied} filas copiadas")
+
+    with engine.begin() as conn:
+        conn.execute(text(f"LOCK TABLE {table} IN EXCLUSIVE MODE"))
+        copied += conn.execute(
+            text(f"INSERT INTO {staging} SELECT * FROM {table} WHERE id > :max_id"),
+            {"max_id": max_id}
+        ).rowcount
+        # Upserts en sitio y borrados ocurridos mientras se copiaba
+        columns = [column.name for column in model_table.columns if column.name != "id"]
+        conn.execute(text(
+            f"UPDATE {staging} AS n SET ({', '.join(columns)}) = "
+            f"({', '.join(f'o.{column}' for column in columns)}) "
+            f"FROM {table} AS o WHERE n.id = o.id AND ROW(n.*) IS DISTINCT FROM ROW(o.*)"
+        ))
+        conn.execute(text(
+            f"DELETE FROM {staging} AS n WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {table} AS o WHERE o.id = n.id)"
+        ))
+
+        conn.execute(text(f"ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY {staging}.id"))
+        conn.execute(text(f"DROP TABLE {table}"))
+        conn.execute(text(f"ALTER TABLE {staging} RENAME TO {table}"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME CONSTRAINT {staging}_pkey TO {table}_pkey"))
+        for index in model_table.indexes:
+            conn.execute(text(f"ALTER INDEX {index.name}_new RENAME TO {index.name}"))
+    return copied
+
+
+def _downsample(engine: Engine, start: datetime, end: datetime):
+    """Asegura los rollups horarios/diarios del rango antes de borrar lecturas"""
+    from database import SessionLocal
+    from repositories.crud import RollupRepository
+
+    db = SessionLocal(bind=engine)
+    try:
+        RollupRepository.backfill(db, start, end - timedelta(microseconds=1))
+    finally:
+        db.close()
+
+
+def _purge_payloads(engine: Engine, table: str, cutoff: datetime):
+    """Elimina los lotes de payloads crudos que solo contenían filas ya borradas"""
+    from database import SessionLocal
+    from repositories.crud import RawPayloadRepository
+
+    db = SessionLocal(bind=engine)
+    try:
+        RawPayloadRepository.purge_batches(db, table, cutoff)
+    finally:
+        db.close()
+
+
+def _bump_watermark(engine: Engine, table: str):
+    """Marca la tabla como modificada para invalidar ETag y cachés de respuestas"""
+    from database import SessionLocal
+    from repositories.crud import WatermarkRepository
+
+    db = SessionLocal(bind=engine)
+    try:
+        WatermarkRepository.bump(db, table)
+        db.commit()
+    finally:
+        db.close()
+
+
+def apply_retention(engine: Engine, now: datetime = None, dry_run: bool = False) -> List[dict]:
+    """Elimina los meses completos más antiguos que la retención configurada.
+
+    Retorna la lista de acciones (tabla, mes, acción) realizadas o, con
+    ``dry_run``, las que se realizarían.
+    """
+    now = now or datetime.now()
+    retention = {
+        "air_quality_readings": config.RETENTION_READINGS_MONTHS,
+        "traffic_data": config.RETENTION_TRAFFIC_MONTHS
+    }
+    actions = []
+    for table, months in retention.items():
+        if months <= 0:
+            continue
+        cutoff = add_months(month_start(now), -months)
+        with engine.connect() as conn:
+            first = conn.execute(
+                select(func.min(column("timestamp", DateTime))).select_from(sql_table(table))
+            ).scalar()
+        if first is None or first >= cutoff:
+            continue
+
+        for month, following in month_ranges(first, cutoff):
+            if following > cutoff:
+                break
+            name = partition_name(table, month)
+            action = {"table": table, "month": month.strftime("%Y-%m")}
+            if dry_run:
+                actions.append({**action, "action": "pending"})
+                continue
+
+            if table == "air_quality_readings":
+                _downsample(engine, month, following)
+            with engine.begin() as conn:
+                partitions = list_partitions(conn, table) if is_partitioned(conn, table) else {}
+                if name in partitions:
+                    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    conn.execute(text(f"DROP TABLE {name}"))
+                    action["action"] = "drop_partition"
+            if "action" not in action:
+                # Sin partición propia (SQLite o filas en DEFAULT): borrar por rango
+                # indexado, un día por transacción
+                deleted = 0
+                day = month
+                while day < following:
+                    with engine.begin() as conn:
+                        deleted += conn.execute(
+                            text(f"DELETE FROM {table} WHERE timestamp >= :start AND timestamp < :end"),
+                            {"start": day, "end": day + timedelta(days=1)}
+                        ).rowcount
+                    day += timedelta(days=1)
+                action["action"] = f"delete_range ({deleted} filas)"
+            print(f"Retención {table} {action['month']}: {action['action']}")
+            actions.append(action)
+
+        if not dry_run:
+            _purge_payloads(engine, table, cutoff)
+            _bump_watermark(engine, table)
+    return actions
+
+
+def run_maintenance(engine: Engine, now: datetime = None):
+    """Crea las particiones próximas y aplica la retención"""
+    now = now or datetime.now()
+    created = []
+    with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            created += ensure_partitions(
+                conn, table, month_start(now), add_months(now, config.PARTITION_MONTHS_AHEAD)
+            )
+    return {"created": created, "retention": apply_retention(engine, now)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiones y retención del historial")
+    parser.add_argument("command", choices=["migrate", "ensure", "retention"])
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    from database import engine
+    if args.command == "migrate":
+        if engine.dialect.name != "postgresql":
+            raise SystemExit("El particionado solo aplica en PostgreSQL")
+        for table in PARTITIONED_TABLES:
+            print(f"Particionado {table}: {partition_table(engine, table, args.chunk_size)} filas")
+    elif args.command == "ensure":
+        with engine.begin() as conn:
+            now = datetime.now()
+            for table in PARTITIONED_TABLES:
+                for name in ensure_partitions(
+                    conn, table, month_start(now), add_months(now, config.PARTITION_MONTHS_AHEAD)
+                ):
+                    print(f"Partición creada: {name}")
+    else:
+        for action in apply_retention(engine, dry_run=args.dry_run):
+            print(action)
+
+
+if __name__ == "__main__":
+    main()
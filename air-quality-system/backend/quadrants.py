@@ -0,0 +1,92 @@
+from typing import List, Optional, Sequence
+import numpy as np
+
+# Registro de cuadrantes de Xalapa (mismos límites que XALAPA_QUADRANTS en el frontend)
+XALAPA_QUADRANTS = [
+    {"name": "Noroeste-1", "bounds": {"north": 19.5800, "south": 19.5619, "east": -96.9601, "west": -97.0000}},
+    {"name": "Noroeste-2", "bounds": {"north": 19.5800, "south": 19.5619, "east": -96.9102, "west": -96.9601}},
+    {"name": "Noroeste-3", "bounds": {"north": 19.5619, "south": 19.5438, "east": -96.9601, "west": -97.0000}},
+    {"name": "Noroeste-4", "bounds": {"north": 19.5619, "south": 19.5438, "east": -96.9102, "west": -96.9601}},
+    {"name": "Noreste-1", "bounds": {"north": 19.5800, "south": 19.5619, "east": -96.8551, "west": -96.9102}},
+    {"name": "Noreste-2", "bounds": {"north": 19.5800, "south": 19.5619, "east": -96.8000, "west": -96.8551}},
+    {"name": "Noreste-3", "bounds": {"north": 19.5619, "south": 19.5438, "east": -96.8551, "west": -96.9102}},
+    {"name": "Noreste-4", "bounds": {"north": 19.5619, "south": 19.5438, "east": -96.8000, "west": -96.8551}},
+    {"name": "Suroeste-1", "bounds": {"north": 19.5438, "south": 19.5219, "east": -96.9601, "west": -97.0000}},
+    {"name": "Suroeste-2", "bounds": {"north": 19.5438, "south": 19.5219, "east": -96.9102, "west": -96.9601}},
+    {"name": "Suroeste-3", "bounds": {"north": 19.5219, "south": 19.5000, "east": -96.9601, "west": -97.0000}},
+    {"name": "Suroeste-4", "bounds": {"north": 19.5219, "south": 19.5000, "east": -96.9102, "west": -96.9601}},
+    {"name": "Sureste-1", "bounds": {"north": 19.5438, "south": 19.5219, "east": -96.8551, "west": -96.9102}},
+    {"name": "Sureste-2", "bounds": {"north": 19.5438, "south": 19.5219, "east": -96.8000, "west": -96.8551}},
+    {"name": "Sureste-3", "bounds": {"north": 19.5219, "south": 19.5000, "east": -96.8551, "west": -96.9102}},
+    {"name": "Sureste-4", "bounds": {"north": 19.5219, "south": 19.5000, "east": -96.8000, "west": -96.8551}},
+]
+
+PARENT_QUADRANTS = ["Noroeste", "Noreste", "Suroeste", "Sureste"]
+
+
+def parent_quadrant(name: str) -> str:
+    """Nombre del cuadrante principal de un subcuadrante ('Noroeste-1' -> 'Noroeste')"""
+    return name.split("-")[0]
+
+
+class QuadrantGridIndex:
+    """Índice de rejilla para asignar puntos (lat, lon) a cuadrantes.
+
+    Los bordes de la rejilla se derivan de los límites del registro; cada
+    celda guarda el índice del cuadrante que la contiene. La búsqueda es
+    vectorizada: dos ``np.searchsorted`` y una indexación por lote, sin
+    recorrer los cuadrantes en Python.
+
+    Desempate en bordes: un punto sobre un borde interno pertenece a la
+    celda al norte (latitud) y al este (longitud) del borde; sobre los bordes
+    exteriores norte/este, a la última celda. Así el punto de Open-Meteo
+    (19.5438, -96.9102), en la esquina de cuatro cuadrantes, siempre se
+    asigna a Noreste-3.
+    """
+
+    def __init__(self, quadrants: List[dict] = XALAPA_QUADRANTS):
+        self.names = np.array([q["name"] for q in quadrants] + [None], dtype=object)
+        self.lat_edges = np.unique(
+            [q["bounds"][side] for q in quadrants for side in ("south", "north")]
+        )
+        self.lon_edges = np.unique(
+            [q["bounds"][side] for q in quadrants for side in ("west", "east")]
+        )
+
+        # Celda sin cuadrante -> índice del valor None al final de names
+        outside = len(quadrants)
+        self.cells = np.full(
+            (len(self.lat_edges) - 1, len(self.lon_edges) - 1), outside, dtype=np.int64
+        )
+        lat_centers = (self.lat_edges[:-1] + self.lat_edges[1:]) / 2
+        lon_centers = (self.lon_edges[:-1] + self.lon_edges[1:]) / 2
+        for index, quadrant in enumerate(quadrants):
+            bounds = quadrant["bounds"]
+            rows = (lat_centers > bounds["south"]) & (lat_centers < bounds["north"])
+            cols = (lon_centers > bounds["west"]) & (lon_centers < bounds["east"])
+            self.cells[np.ix_(rows, cols)] = index
+
+    def lookup(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """Retorna el nombre del cuadrante de cada punto (None si está fuera)"""
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        rows = np.searchsorted(self.lat_edges, lats, side="right") - 1
+        cols = np.searchsorted(self.lon_edges, lons, side="right") - 1
+
+        # Los puntos sobre el borde norte/este exterior pertenecen a la última celda
+        rows[lats == self.lat_edges[-1]] = len(self.lat_edges) - 2
+        cols[lons == self.lon_edges[-1]] = len(self.lon_edges) - 2
+
+        inside = (
+            (rows >= 0) & (rows < self.cells.shape[0]) &
+            (cols >= 0) & (cols < self.cells.shape[1])
+        )
+        indices = np.full(lats.shape, len(self.names) - 1, dtype=np.int64)
+        indices[inside] = self.cells[rows[inside], cols[inside]]
+        return self.names[indices]
+
+    def lookup_one(self, latitude: float, longitude: float) -> Optional[str]:
+        return self.lookup([latitude], [longitude])[0]
+
+
+QUADRANT_INDEX = QuadrantGridIndex()
@@ -0,0 +1,52 @@
+"""Codificación de los payloads crudos guardados fuera de las tablas calientes.
+
+Los payloads de un lote de ingesta se guardan juntos como un solo blob
+comprimido (``raw_payload_batches``), indexado por el id de cada fila. Se usa
+zstd si el paquete ``zstandard`` está instalado y zlib en caso contrario; el
+códec queda registrado en cada lote para poder leerlo después.
+"""
+import zlib
+from typing import Dict, Optional
+import orjson
+import config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB_LEVEL = 6
+
+
+def default_codec() -> str:
+    if config.RAW_PAYLOAD_CODEC == "zstd" and zstandard is None:
+        return "zlib"
+    return config.RAW_PAYLOAD_CODEC
+
+
+def encode_payloads(payloads: Dict[int, dict], codec: Optional[str] = None):
+    """Serializa y comprime ``{id de fila: payload}``. Retorna (códec, blob)"""
+    codec = codec or default_codec()
+    data = orjson.dumps(payloads, option=orjson.OPT_NON_STR_KEYS)
+    if codec == "zstd":
+        return codec, zstandard.ZstdCompressor(level=config.RAW_PAYLOAD_LEVEL).compress(data)
+    if codec == "zlib":
+        return codec, zlib.compress(data, ZLIB_LEVEL)
+    if codec == "none":
+        return codec, data
+    raise ValueError(f"Códec de payload desconocido: {codec}")
+
+
+def decode_payloads(codec: str, blob: bytes) -> Dict[str, dict]:
+    """Inverso de encode_payloads; las claves (ids) quedan como texto"""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Leer payloads zstd requiere el paquete 'zstandard'")
+        data = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == "zlib":
+        data = zlib.decompress(blob)
+    elif codec == "none":
+        data = blob
+    else:
+        raise ValueError(f"Códec de payload desconocido: {codec}")
+    return orjson.loads(data)
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from repositories.crud import (
+    AirQualityRepository,
+    TrafficRepository,
+    QuadrantStatsRepository,
+    PredictionRepository,
+    RollupRepository,
+    RawPayloadRepository,
+    BackfillRepository
+)
+
+# Sesión entregada por get_async_db según DB_ASYNC
+DBSession = Union[Session, AsyncSession]
+
+
+async def run_sync(db, func, *args, **kwargs):
+    """Ejecuta ``func(session, *args)`` sin bloquear el event loop.
+
+    Con una AsyncSession la función corre sobre la conexión asíncrona
+    (``run_sync``); con una Session síncrona se ejecuta en un hilo del pool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: func(session, *args, **kwargs))
+    return await asyncio.to_thread(func, db, *args, **kwargs)
+
+
+class AwaitableRepository:
+    """Versión awaitable de un repositorio de ``crud.py``.
+
+    Cada método estático que recibe la sesión como primer argumento se
+    expone como corrutina con la misma firma, de modo que la lógica de
+    consultas se mantiene en un solo lugar.
+    """
+
+    def __init__(self, repository):
+        self._repository = repository
+
+    def __getattr__(self, name):
+        method = getattr(self._repository, name)
+
+        async def call(db, *args, **kwargs):
+            return await run_sync(db, method, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+
+AsyncAirQualityRepository = AwaitableRepository(AirQualityRepository)
+AsyncTrafficRepository = AwaitableRepository(TrafficRepository)
+AsyncQuadrantStatsRepository = AwaitableRepository(QuadrantStatsRepository)
+AsyncPredictionRepository = AwaitableRepository(PredictionRepository)
+AsyncRollupRepository = AwaitableRepository(RollupRepository)
+AsyncRawPayloadRepository = AwaitableRepository(RawPayloadRepository)
+AsyncBackfillRepository = AwaitableRepository(BackfillRepository)
@@ -1,15 +1,170 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, select, and_, or_, tuple_, text
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import json
+import numpy as np
 import models
+from pagination import encode_cursor, decode_cursor
+from quadrants import QUADRANT_INDEX, XALAPA_QUADRANTS, PARENT_QUADRANTS, parent_quadrant
+from online_stats import RunningStats
+from data_collectors.registry import FUSED_SOURCE
+from raw_payloads import encode_payloads, decode_payloads
+from aggregation import (
+    POLLUTANTS,
+    ROLLUP_GRANULARITIES,
+    aggregate_rows,
+    bucket_label,
+    merge_rollups,
+    rollup_readings,
+    truncate_datetime
+)
+
+# Precisión (decimales) de las coordenadas en la clave natural de las lecturas
+COORD_PRECISION = 4
+UPSERT_CHUNK_SIZE = 500
+
+READING_KEY_COLUMNS = ["source", "timestamp", "latitude", "longitude"]
+READING_VALUE_COLUMNS = ["pm25", "pm10", "no2", "o3", "co", "quadrant_name", "raw_batch_id"]
+ROLLUP_KEY_COLUMNS = ["granularity", "bucket_start", "source"]
+QUADRANT_NAMES = [quadrant["name"] for quadrant in XALAPA_QUADRANTS]
+READING_COLUMNS = [
+    "id", "timestamp", "latitude", "longitude",
+    "pm25", "pm10", "no2", "o3", "co", "source", "quadrant_name"
+]
+
+def _reading_columns():
+    """Columnas de lectura seleccionadas sin hidratar objetos ORM"""
+    table = models.AirQualityReading.__table__
+    return [table.c[column] for column in READING_COLUMNS]
+
+def _reading_key(reading: dict):
+    return tuple(reading[column] for column in READING_KEY_COLUMNS)
+
+def _source_filter(column, source: Optional[str] = None):
+    """Filtro de fuente para consultas sobre lecturas crudas.
+
+    Sin fuente explícita se excluyen las lecturas fusionadas, que combinan
+    observaciones ya guardadas por sus fuentes y las contarían dos veces.
+    """
+    if source:
+        return column == source
+    return or_(column.is_(None), column != FUSED_SOURCE)
+
+
+def _existing_readings(db: Session, keys: List[tuple]):
+    """Lote de payload (raw_batch_id) de las lecturas ya guardadas entre ``keys``.
+
+    Consulta por fuente y rango de horas del lote, de modo que la búsqueda
+    recorre solo ese tramo de uq_air_quality_natural_key; las filas vecinas
+    del rango que no están en ``keys`` se descartan aquí.
+    """
+    table = models.AirQualityReading.__table__
+    ranges = {}
+    for source, timestamp, _, _ in keys:
+        low, high = ranges.get(source, (timestamp, timestamp))
+        ranges[source] = (min(low, timestamp), max(high, timestamp))
+
+    key_columns = [table.c[column] for column in READING_KEY_COLUMNS]
+    wanted = set(keys)
+    rows = db.execute(
+        select(*key_columns, table.c.raw_batch_id).where(or_(*[
+            and_(
+                table.c.source.is_(None) if source is None else table.c.source == source,
+                table.c.timestamp.between(low, high)
+            )
+            for source, (low, high) in ranges.items()
+        ]))
+    )
+    existing = {}
+    for row in rows:
+        key = tuple(row[:-1])
+        if key in wanted:
+            existing[key] = row.raw_batch_id
+    return existing
+
+def _dialect_insert(db: Session):
+    """Retorna la construcción INSERT con soporte ON CONFLICT del dialecto activo"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+def _bulk_insert(db: Session, model, rows: List[dict], returning: bool = False):
+    """Inserta ``rows`` con executemany por bloques, sin confirmar la transacción.
+
+    La sentencia se compila una sola vez y el controlador la agrupa en
+    INSERT de múltiples filas. Con ``returning`` se retornan las filas
+    insertadas (incluido su id) en el mismo orden, en lugar de refrescar
+    cada objeto; si no, el número de filas.
+    """
+    table = model.__table__
+    stmt = table.insert()
+    if returning:
+        stmt = stmt.returning(*table.c, sort_by_parameter_order=True)
+    inserted = []
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        result = db.execute(stmt, rows[start:start + UPSERT_CHUNK_SIZE])
+        if returning:
+            inserted.extend(result.mappings().all())
+    return inserted if returning else len(rows)
+
+def _open_payload_batch(db: Session, table_name: str, rows: List[dict]):
+    """Separa ``raw_data`` de cada fila y reserva un lote de payloads crudos.
+
+    Las filas con payload quedan apuntando al lote mediante raw_batch_id.
+    Retorna (lote, payloads en el orden de ``rows``); el lote es None si
+    ninguna fila trae payload.
+    """
+    payloads = [row.pop("raw_data", None) for row in rows]
+    batch = None
+    if any(payload is not None for payload in payloads):
+        batch = models.RawPayloadBatch(table_name=table_name, codec="none", payload=b"")
+        db.add(batch)
+        db.flush()
+    for row, payload in zip(rows, payloads):
+        row["raw_batch_id"] = batch.id if batch is not None and payload is not None else None
+    return batch, payloads
+
+def _close_payload_batch(db: Session, batch, payloads: Dict[int, dict], end_time: Optional[datetime]):
+    """Comprime los payloads de las filas escritas; descarta el lote si no quedó ninguno"""
+    if batch is None:
+        return
+    if not payloads:
+        db.delete(batch)
+        return
+    batch.codec, batch.payload = encode_payloads(payloads)
+    batch.row_count = len(payloads)
+    batch.end_time = end_time
+
+def _compact_payload_batches(db: Session, released: Dict[int, set]):
+    """Quita de cada lote los payloads de las filas que dejaron de apuntar a él.
+
+    Un upsert que actualiza una fila la apunta a su nuevo lote (o a ninguno)
+    y su payload viejo quedaría huérfano. ``released`` es
+    ``{id de lote: ids de filas}``; los lotes que se quedan sin payloads se
+    eliminan y los demás se recomprimen con los restantes.
+    """
+    if not released:
+        return
+    for batch in db.query(models.RawPayloadBatch).filter(models.RawPayloadBatch.id.in_(released)):
+        row_ids = {str(row_id) for row_id in released[batch.id]}
+        payloads = decode_payloads(batch.codec, batch.payload)
+        kept = {key: payload for key, payload in payloads.items() if key not in row_ids}
+        if not kept:
+            db.delete(batch)
+        elif len(kept) < len(payloads):
+            batch.codec, batch.payload = encode_payloads(kept)
+            batch.row_count = len(kept)
 
 class AirQualityRepository:
     @staticmethod
-    def get_latest_readings(db: Session, limit: int = 10):
-        """Obtiene las últimas lecturas sin filtrar por fuente"""
+    def get_latest_readings(db: Session, limit: int = 10, source: Optional[str] = None):
+        """Obtiene las últimas lecturas de todas las fuentes (ver _source_filter)"""
         try:
             return db.query(models.AirQualityReading)\
+                .filter(_source_filter(models.AirQualityReading.source, source))\
                 .order_by(models.AirQualityReading.timestamp.desc())\
                 .limit(limit)\
                 .all()
@@ -21,7 +176,8 @@ class AirQualityRepository:
     def get_readings_count_in_timeframe(
         db: Session,
         start_time: datetime,
-        end_time: datetime
+        end_time: datetime,
+        source: Optional[str] = None
     ):
         """Obtiene el número total de lecturas en un rango de tiempo"""
         try:
@@ -29,32 +185,134 @@ class AirQualityRepository:
                 .filter(
                     models.AirQualityReading.timestamp.between(
                         start_time, end_time
-                    )
+                    ),
+                    _source_filter(models.AirQualityReading.source, source)
                 )\
                 .count()
         except Exception as e:
             print(f"Error getting readings count: {str(e)}")
             return 0
 
+    @staticmethod
+    def normalize_reading(reading: dict):
+        """Normaliza una lectura para la clave natural (coordenadas redondeadas).
+
+        Una lectura sin timestamp toma la hora local actual, el mismo reloj
+        (America/Mexico_City) de las lecturas de los colectores.
+        """
+        normalized = dict(reading)
+        normalized["latitude"] = round(float(reading["latitude"]), COORD_PRECISION)
+        normalized["longitude"] = round(float(reading["longitude"]), COORD_PRECISION)
+        if isinstance(normalized.get("timestamp"), str):
+            normalized["timestamp"] = datetime.fromisoformat(normalized["timestamp"])
+        if normalized.get("timestamp") is None:
+            normalized["timestamp"] = truncate_datetime(datetime.now(), "hour")
+        normalized.setdefault("source", None)
+        for column in READING_VALUE_COLUMNS:
+            normalized.setdefault(column, None)
+        return normalized
+
     @staticmethod
     def store_batch_readings(db: Session, readings: List[dict]):
-        """Almacena un lote de lecturas en la base de datos"""
+        """Almacena un lote de lecturas de forma idempotente.
+
+        Usa INSERT ... ON CONFLICT DO UPDATE sobre la clave natural
+        (fuente, hora de observación, latitud, longitud), de modo que volver a
+        ingerir las mismas horas no crea filas nuevas. Las filas cuyo contenido
+        no cambió no se reescriben.
+
+        Retorna un diccionario con los conteos inserted/updated/skipped, o
+        None si ocurrió un error.
+        """
+        counts = {"inserted": 0, "updated": 0, "skipped": 0}
         try:
-            # Crear objetos de modelo para cada lectura
-            db_readings = [
-                models.AirQualityReading(**reading)
-                for reading in readings
-            ]
-            
-            # Agregar todas las lecturas a la sesión
-            db.bulk_save_objects(db_readings)
+            # Deduplicar dentro del lote (gana la última lectura)
+            batch = {}
+            for reading in readings:
+                normalized = AirQualityRepository.normalize_reading(reading)
+                batch[_reading_key(normalized)] = normalized
+            counts["skipped"] += len(readings) - len(batch)
+
+            table = models.AirQualityReading.__table__
+            insert = _dialect_insert(db)
+            rows = list(batch.values())
+
+            # Asignar cuadrante a todo el lote con una sola búsqueda vectorizada
+            if rows:
+                quadrant_names = QUADRANT_INDEX.lookup(
+                    [row["latitude"] for row in rows],
+                    [row["longitude"] for row in rows]
+                )
+                for row, quadrant_name in zip(rows, quadrant_names):
+                    row["quadrant_name"] = row["quadrant_name"] or quadrant_name
+
+            # Los payloads crudos van comprimidos a un lote aparte; solo se
+            # guardan los de filas insertadas o actualizadas
+            payload_batch, payloads = _open_payload_batch(db, "air_quality_readings", rows)
+            payload_by_key = {
+                _reading_key(row): payload
+                for row, payload in zip(rows, payloads) if payload is not None
+            }
+            written_payloads = {}
+            payload_end_time = None
+            written_buckets = set()
+            released_payloads = {}
+
+            # Sentencia de una fila ejecutada con executemany: su forma
+            # compilada queda en caché entre lotes
+            key_columns = [table.c[column] for column in READING_KEY_COLUMNS]
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=READING_KEY_COLUMNS,
+                set_={column: stmt.excluded[column] for column in READING_VALUE_COLUMNS},
+                where=or_(*[
+                    table.c[column].is_distinct_from(stmt.excluded[column])
+                    for column in READING_VALUE_COLUMNS if column != "raw_batch_id"
+                ])
+            ).returning(table.c.id, *key_columns)
+
+            for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+                keys = [_reading_key(row) for row in chunk]
+                existing = _existing_readings(db, keys)
+
+                written = db.execute(stmt, [
+                    {column: row[column] for column in READING_KEY_COLUMNS + READING_VALUE_COLUMNS}
+                    for row in chunk
+                ]).all()
+                changed = len(written)
+
+                for row in written:
+                    key = tuple(row[1:])
+                    if existing.get(key) is not None:
+                        released_payloads.setdefault(existing[key], set()).add(row.id)
+                    if row.source is not None:
+                        written_buckets.add((row.source, truncate_datetime(row.timestamp, "hour")))
+                    if key in payload_by_key:
+                        written_payloads[row.id] = payload_by_key[key]
+                        payload_end_time = max(payload_end_time or row.timestamp, row.timestamp)
+
+                inserted = sum(1 for key in keys if key not in existing)
+                counts["inserted"] += inserted
+                counts["updated"] += changed - inserted
+                counts["skipped"] += len(chunk) - changed
+
+            _close_payload_batch(db, payload_batch, written_payloads, payload_end_time)
+            _compact_payload_batches(db, released_payloads)
+            data_version = None
+            if counts["inserted"] or counts["updated"]:
+                data_version = WatermarkRepository.bump(db, "air_quality_readings")
+
+            # Actualizar solo los rollups de las horas con filas insertadas o
+            # actualizadas; un lote sin cambios no recalcula nada
+            RollupRepository.refresh_buckets(db, written_buckets, data_version)
+
             db.commit()
-            
-            return True
+            return counts
         except Exception as e:
             print(f"Error storing batch readings: {str(e)}")
             db.rollback()
-            return False
+            return None
 
     @staticmethod
     def get_readings_in_timeframe(
@@ -62,39 +320,237 @@ class AirQualityRepository:
         start_time: datetime,
         end_time: datetime,
         limit: int = 1000,
-        offset: int = 0
+        offset: int = 0,
+        source: Optional[str] = None
     ):
-        """Obtiene lecturas dentro de un rango de tiempo específico"""
+        """Obtiene lecturas dentro de un rango de tiempo específico.
+
+        Retorna filas ligeras (columnas de READING_COLUMNS) en lugar de
+        objetos ORM. Sin ``source`` se omiten las lecturas fusionadas.
+        """
         try:
-            print(f"Buscando lecturas entre {start_time} y {end_time}")
-            print(f"Límite: {limit}, Offset: {offset}")
-            
-            readings = db.query(models.AirQualityReading)\
+            return db.query(*_reading_columns())\
                 .filter(
                     models.AirQualityReading.timestamp.between(
                         start_time, end_time
-                    )
+                    ),
+                    _source_filter(models.AirQualityReading.source, source)
                 )\
                 .order_by(models.AirQualityReading.timestamp.desc())\
                 .offset(offset)\
                 .limit(limit)\
                 .all()
-            
-            print(f"Se encontraron {len(readings)} lecturas")
-            return readings
         except Exception as e:
             print(f"Error getting readings in timeframe: {str(e)}")
             return []
 
+    @staticmethod
+    def get_readings_page(
+        db: Session,
+        start_time: datetime,
+        end_time: datetime,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        source: Optional[str] = None
+    ):
+        """Obtiene una página de lecturas usando paginación por cursor (keyset).
+
+        Ordena por (timestamp, id) descendente y continúa después de la
+        posición codificada en ``cursor``, por lo que cada página cuesta lo
+        mismo sin importar su profundidad. Retorna (lecturas, next_cursor);
+        next_cursor es None en la última página. Un cursor inválido lanza
+        InvalidCursorError. Sin ``source`` se omiten las lecturas fusionadas.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        try:
+            reading = models.AirQualityReading
+            query = db.query(*_reading_columns())\
+                .filter(
+                    reading.timestamp.between(start_time, end_time),
+                    _source_filter(reading.source, source)
+                )
+
+            if position:
+                query = query.filter(
+                    tuple_(reading.timestamp, reading.id) < tuple_(*position)
+                )
+
+            # Pedir una fila extra para saber si hay otra página
+            readings = query\
+                .order_by(reading.timestamp.desc(), reading.id.desc())\
+                .limit(limit + 1)\
+                .all()
+
+            next_cursor = None
+            if len(readings) > limit:
+                readings = readings[:limit]
+                next_cursor = encode_cursor(readings[-1].timestamp, readings[-1].id)
+            return readings, next_cursor
+        except Exception as e:
+            print(f"Error getting readings page: {str(e)}")
+            return [], None
+
+    @staticmethod
+    def get_readings_count_estimate(
+        db: Session,
+        start_time: datetime,
+        end_time: datetime,
+        source: Optional[str] = None
+    ):
+        """Estima el número de lecturas en un rango sin recorrerlas.
+
+        En PostgreSQL usa la estimación de filas del planificador; en otros
+        motores recurre al conteo exacto.
+        """
+        try:
+            if db.get_bind().dialect.name != "postgresql":
+                return AirQualityRepository.get_readings_count_in_timeframe(
+                    db, start_time, end_time, source
+                )
+            reading = models.AirQualityReading
+            stmt = select(1).where(
+                reading.timestamp.between(start_time, end_time),
+                _source_filter(reading.source, source)
+            ).compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+            plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {stmt}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception as e:
+            print(f"Error estimating readings count: {str(e)}")
+            return 0
+
+    @staticmethod
+    def iter_readings_in_timeframe(
+        db: Session,
+        start_time: datetime,
+        end_time: datetime,
+        source: Optional[str] = None,
+        chunk_size: int = 1000
+    ):
+        """Itera lecturas de un rango en bloques de ``chunk_size`` filas.
+
+        Selecciona solo las columnas de exportación y usa ``yield_per`` (cursor
+        del lado del servidor en PostgreSQL), de modo que la memoria no crece
+        con el tamaño del rango. Cada bloque es una lista de filas en el orden
+        de READING_COLUMNS.
+        """
+        reading = models.AirQualityReading
+        stmt = select(*_reading_columns())\
+            .where(
+                reading.timestamp.between(start_time, end_time),
+                _source_filter(reading.source, source)
+            )
+        stmt = stmt.order_by(reading.timestamp, reading.id)\
+            .execution_options(yield_per=chunk_size)
+
+        for partition in db.execute(stmt).partitions():
+            yield partition
+
+    @staticmethod
+    def aggregate_readings(
+        db: Session,
+        start_time: datetime,
+        end_time: datetime,
+        bucket: str = "hour",
+        pollutants: Optional[List[str]] = None,
+        percentiles: Optional[List[int]] = None,
+        source: Optional[str] = None
+    ):
+        """Agrega lecturas por bucket de tiempo (hour/day/week).
+
+        En PostgreSQL el agrupamiento se hace en SQL con date_trunc y
+        percentile_cont; en otros motores se leen solo las columnas necesarias
+        y se agregan con NumPy. Retorna una fila por bucket con count y
+        <contaminante>_mean/_min/_max/_p<N>.
+        """
+        pollutants = pollutants or POLLUTANTS
+        percentiles = percentiles or []
+        table = models.AirQualityReading.__table__
+
+        filters = [
+            table.c.timestamp.between(start_time, end_time),
+            _source_filter(table.c.source, source)
+        ]
+
+        try:
+            if db.get_bind().dialect.name != "postgresql":
+                rows = db.execute(
+                    select(table.c.timestamp, *[table.c[p] for p in pollutants])
+                    .where(*filters)
+                ).all()
+                return aggregate_rows(rows, bucket, pollutants, percentiles)
+
+            bucket_column = func.date_trunc(bucket, table.c.timestamp).label("bucket")
+            columns = [bucket_column, func.count().label("count")]
+            for pollutant in pollutants:
+                column = table.c[pollutant]
+                columns += [
+                    func.avg(column).label(bucket_label(pollutant, "mean")),
+                    func.min(column).label(bucket_label(pollutant, "min")),
+                    func.max(column).label(bucket_label(pollutant, "max")),
+                ]
+                columns += [
+                    func.percentile_cont(percentile / 100.0)
+                    .within_group(column)
+                    .label(bucket_label(pollutant, f"p{percentile}"))
+                    for percentile in percentiles
+                ]
+
+            rows = db.execute(
+                select(*columns)
+                .where(*filters)
+                .group_by(bucket_column)
+                .order_by(bucket_column)
+            ).mappings().all()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"Error aggregating readings: {str(e)}")
+            return []
+
+    @staticmethod
+    def get_latest_station_readings(
+        db: Session,
+        start_time: datetime,
+        end_time: datetime,
+        source: Optional[str] = None
+    ):
+        """Obtiene la lectura más reciente de cada ubicación dentro de un rango"""
+        try:
+            table = models.AirQualityReading.__table__
+            filters = [
+                table.c.timestamp.between(start_time, end_time),
+                _source_filter(table.c.source, source)
+            ]
+
+            latest = select(
+                table.c.latitude,
+                table.c.longitude,
+                func.max(table.c.timestamp).label("timestamp")
+            ).where(*filters).group_by(table.c.latitude, table.c.longitude).subquery()
+
+            return db.execute(
+                select(table.c.latitude, table.c.longitude, *[table.c[p] for p in POLLUTANTS])
+                .join(latest, and_(
+                    table.c.latitude == latest.c.latitude,
+                    table.c.longitude == latest.c.longitude,
+                    table.c.timestamp == latest.c.timestamp
+                ))
+                .where(*filters)
+            ).all()
+        except Exception as e:
+            print(f"Error getting latest station readings: {str(e)}")
+            return []
+
     @staticmethod
     def get_latest_readings_by_source(
         db: Session,
         source: str,
         limit: int = 10
     ):
-        """Obtiene las últimas lecturas de una fuente específica"""
+        """Obtiene las últimas lecturas de una fuente específica como filas ligeras"""
         try:
-            return db.query(models.AirQualityReading)\
+            return db.query(*_reading_columns())\
                 .filter(models.AirQualityReading.source == source)\
                 .order_by(models.AirQualityReading.timestamp.desc())\
                 .limit(limit)\
@@ -103,13 +559,183 @@ class AirQualityRepository:
             print(f"Error getting latest readings by source: {str(e)}")
             return []
 
+class RollupRepository:
+    @staticmethod
+    def _upsert(db: Session, granularity: str, rollups: dict):
+        if not rollups:
+            return
+        table = models.AirQualityRollup.__table__
+        insert = _dialect_insert(db)
+        rows = [
+            {"granularity": granularity, "source": source, "bucket_start": bucket_start, **values}
+            for (source, bucket_start), values in rollups.items()
+        ]
+        value_columns = [column for column in rows[0] if column not in ROLLUP_KEY_COLUMNS]
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = insert(table).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=ROLLUP_KEY_COLUMNS,
+                set_={column: stmt.excluded[column] for column in value_columns}
+            )
+            db.execute(stmt)
+
+    @staticmethod
+    def refresh_buckets(db: Session, hour_buckets: set, data_version: Optional[int] = None):
+        """Recalcula solo los rollups afectados por un lote de lecturas.
+
+        ``hour_buckets`` es un conjunto de (source, inicio de hora). Los rollups
+        horarios se recalculan desde las lecturas crudas de esas horas y los
+        diarios se recombinan desde los horarios del día. Con ``data_version``
+        los buckets horarios quedan marcados con la versión de las lecturas
+        que los cambió. No hace commit: se ejecuta dentro de la transacción de
+        ingesta.
+        """
+        if not hour_buckets:
+            return
+
+        readings = models.AirQualityReading.__table__
+        sources = {source for source, _ in hour_buckets}
+        hours = [bucket_start for _, bucket_start in hour_buckets]
+        raw_rows = db.execute(
+            select(readings.c.source, readings.c.timestamp, *[readings.c[p] for p in POLLUTANTS])
+            .where(
+                readings.c.source.in_(sources),
+                readings.c.timestamp >= min(hours),
+                readings.c.timestamp < max(hours) + ROLLUP_GRANULARITIES["hour"]
+            )
+        ).all()
+        hourly = {
+            key: rollup for key, rollup in rollup_readings(raw_rows, "hour").items()
+            if key in hour_buckets
+        }
+        if data_version is not None:
+            for rollup in hourly.values():
+                rollup["data_version"] = data_version
+        RollupRepository._upsert(db, "hour", hourly)
+
+        day_buckets = {
+            (source, truncate_datetime(bucket_start, "day"))
+            for source, bucket_start in hour_buckets
+        }
+        days = [bucket_start for _, bucket_start in day_buckets]
+        rollups = models.AirQualityRollup.__table__
+        hourly_rows = db.execute(
+            select(rollups)
+            .where(
+                rollups.c.granularity == "hour",
+                rollups.c.source.in_(sources),
+                rollups.c.bucket_start >= min(days),
+                rollups.c.bucket_start < max(days) + ROLLUP_GRANULARITIES["day"]
+            )
+        ).mappings().all()
+        daily = {
+            key: rollup for key, rollup in merge_rollups(hourly_rows, "day").items()
+            if key in day_buckets
+        }
+        RollupRepository._upsert(db, "day", daily)
+
+    @staticmethod
+    def backfill(
+        db: Session,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        window: timedelta = timedelta(days=7)
+    ):
+        """Reconstruye los rollups a partir del historial crudo, por ventanas.
+
+        Cada ventana se procesa y confirma por separado. Retorna el número de
+        buckets horarios recalculados.
+        """
+        readings = models.AirQualityReading.__table__
+        if start_time is None or end_time is None:
+            first, last = db.execute(
+                select(func.min(readings.c.timestamp), func.max(readings.c.timestamp))
+            ).one()
+            if first is None:
+                return 0
+            start_time = start_time or first
+            end_time = end_time or last
+
+        refreshed = 0
+        window_start = truncate_datetime(start_time, "day")
+        while window_start <= end_time:
+            window_end = window_start + window
+            buckets = {
+                (source, truncate_datetime(timestamp, "hour"))
+                for source, timestamp in db.execute(
+                    select(readings.c.source, readings.c.timestamp)
+                    .where(
+                        readings.c.source.isnot(None),
+                        readings.c.timestamp >= window_start,
+                        readings.c.timestamp < window_end
+                    )
+                )
+            }
+            RollupRepository.refresh_buckets(db, buckets)
+            db.commit()
+            refreshed += len(buckets)
+            print(f"Rollups recalculados hasta {window_end}: {refreshed} buckets")
+            window_start = window_end
+        return refreshed
+
+    @staticmethod
+    def get_rollups(
+        db: Session,
+        granularity: str,
+        start_time: datetime,
+        end_time: datetime,
+        source: Optional[str] = None,
+        pollutants: Optional[List[str]] = None
+    ):
+        """Obtiene rollups de un rango con promedio, mínimo y máximo por contaminante"""
+        try:
+            pollutants = pollutants or POLLUTANTS
+            rollups = models.AirQualityRollup.__table__
+            stmt = select(rollups).where(
+                rollups.c.granularity == granularity,
+                rollups.c.bucket_start.between(start_time, end_time)
+            )
+            if source:
+                stmt = stmt.where(rollups.c.source == source)
+            rows = db.execute(
+                stmt.order_by(rollups.c.bucket_start, rollups.c.source)
+            ).mappings().all()
+
+            results = []
+            for row in rows:
+                result = {
+                    "bucket": row["bucket_start"],
+                    "source": row["source"],
+                    "count": row["count"]
+                }
+                for pollutant in pollutants:
+                    count = row[f"{pollutant}_count"]
+                    result[bucket_label(pollutant, "mean")] = (
+                        row[f"{pollutant}_sum"] / count if count else None
+                    )
+                    result[bucket_label(pollutant, "min")] = row[f"{pollutant}_min"]
+                    result[bucket_label(pollutant, "max")] = row[f"{pollutant}_max"]
+                results.append(result)
+            return results
+        except Exception as e:
+            print(f"Error getting rollups: {str(e)}")
+            return []
+
 class TrafficRepository:
     @staticmethod
     def create_traffic_data(db: Session, traffic_data: dict):
         """Crea un nuevo registro de datos de tráfico"""
         try:
-            db_traffic = models.TrafficData(**traffic_data)
+            row = dict(traffic_data)
+            payload_batch, (payload,) = _open_payload_batch(db, "traffic_data", [row])
+            db_traffic = models.TrafficData(**row)
             db.add(db_traffic)
+            db.flush()
+            _close_payload_batch(
+                db, payload_batch,
+                {db_traffic.id: payload} if payload is not None else {},
+                db_traffic.timestamp
+            )
             db.commit()
             db.refresh(db_traffic)
             return db_traffic
@@ -118,6 +744,36 @@ class TrafficRepository:
             db.rollback()
             return None
 
+    @staticmethod
+    def create_traffic_data_batch(db: Session, traffic_data: List[dict], returning: bool = False):
+        """Crea registros de tráfico en bloque dentro de una sola transacción.
+
+        Retorna el número de filas (o las filas insertadas con ``returning``),
+        o None si ocurrió un error.
+        """
+        try:
+            rows = [dict(row) for row in traffic_data]
+            payload_batch, payloads = _open_payload_batch(db, "traffic_data", rows)
+            result = _bulk_insert(
+                db, models.TrafficData, rows, returning or payload_batch is not None
+            )
+            if payload_batch is not None:
+                written = {
+                    row["id"]: (payload, row["timestamp"])
+                    for row, payload in zip(result, payloads) if payload is not None
+                }
+                _close_payload_batch(
+                    db, payload_batch,
+                    {row_id: payload for row_id, (payload, _) in written.items()},
+                    max(timestamp for _, timestamp in written.values())
+                )
+            db.commit()
+            return result if returning else len(rows)
+        except Exception as e:
+            print(f"Error creating traffic data batch: {str(e)}")
+            db.rollback()
+            return None
+
     @staticmethod
     def get_latest_traffic_data(db: Session, limit: int = 10):
         """Obtiene los últimos datos de tráfico"""
@@ -130,6 +786,72 @@ class TrafficRepository:
             print(f"Error getting latest traffic data: {str(e)}")
             return []
 
+class WatermarkRepository:
+    @staticmethod
+    def bump(db: Session, table_name: str):
+        """Incrementa la versión de ``table_name`` sin confirmar la transacción.
+
+        Se llama dentro de la misma transacción que la escritura, así que la
+        versión cambia solo si la escritura se confirma. La fila queda
+        bloqueada hasta entonces, por lo que las versiones se asignan en el
+        orden en que se confirman las escrituras. Retorna la nueva versión.
+        """
+        table = models.DataWatermark.__table__
+        stmt = _dialect_insert(db)(table).values(
+            table_name=table_name, version=1, updated_at=datetime.utcnow()
+        )
+        return db.execute(stmt.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"version": table.c.version + 1, "updated_at": stmt.excluded.updated_at}
+        ).returning(table.c.version)).scalar_one()
+
+    @staticmethod
+    def get(db: Session, table_name: str):
+        """Retorna (versión, fecha UTC de la última escritura); (0, None) si nunca se escribió"""
+        row = db.get(models.DataWatermark, table_name)
+        if row is None:
+            return 0, None
+        return row.version, row.updated_at
+
+class RawPayloadRepository:
+    @staticmethod
+    def get_payload(db: Session, model, row_id: int):
+        """Lee bajo demanda el payload crudo de una fila de ``model``.
+
+        Descomprime el lote al que apunta raw_batch_id. Retorna None si la
+        fila no existe o no tiene payload.
+        """
+        try:
+            batch_id = db.execute(
+                select(model.raw_batch_id).where(model.id == row_id)
+            ).scalar()
+            if batch_id is None:
+                return None
+            batch = db.get(models.RawPayloadBatch, batch_id)
+            if batch is None:
+                return None
+            return decode_payloads(batch.codec, batch.payload).get(str(row_id))
+        except Exception as e:
+            print(f"Error getting raw payload: {str(e)}")
+            return None
+
+    @staticmethod
+    def purge_batches(db: Session, table_name: str, before: datetime):
+        """Elimina los lotes cuyas filas son todas anteriores a ``before``"""
+        try:
+            deleted = db.query(models.RawPayloadBatch)\
+                .filter(
+                    models.RawPayloadBatch.table_name == table_name,
+                    models.RawPayloadBatch.end_time < before
+                )\
+                .delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception as e:
+            print(f"Error purging raw payload batches: {str(e)}")
+            db.rollback()
+            return 0
+
 class QuadrantStatsRepository:
     @staticmethod
     def create_stats(db: Session, stats_data: dict):
@@ -145,6 +867,18 @@ class QuadrantStatsRepository:
             db.rollback()
             return None
 
+    @staticmethod
+    def create_stats_batch(db: Session, stats_data: List[dict], returning: bool = False):
+        """Crea registros de estadísticas por cuadrante en bloque y en una sola transacción"""
+        try:
+            result = _bulk_insert(db, models.QuadrantStatistics, stats_data, returning)
+            db.commit()
+            return result
+        except Exception as e:
+            print(f"Error creating quadrant stats batch: {str(e)}")
+            db.rollback()
+            return None
+
     @staticmethod
     def get_latest_stats_by_quadrant(
         db: Session, 
@@ -167,20 +901,202 @@ class QuadrantStatsRepository:
             return None
 
         try:
-            stats = {
-                "quadrant_name": quadrant_name,
-                "avg_pm25": sum(r.pm25 for r in readings) / len(readings),
-                "avg_pm10": sum(r.pm10 for r in readings) / len(readings),
-                "avg_no2": sum(r.no2 for r in readings) / len(readings),
-                "avg_o3": sum(r.o3 for r in readings) / len(readings),
-                "avg_co": sum(r.co for r in readings) / len(readings),
-            }
+            stats = {"quadrant_name": quadrant_name}
+            summaries = {}
+            for pollutant in POLLUTANTS:
+                running = RunningStats()
+                running.update([getattr(r, pollutant) for r in readings])
+                stats[f"avg_{pollutant}"] = running.mean if running.count else None
+                summaries[pollutant] = running.summary()
+            stats["additional_metrics"] = {"stats": summaries}
 
             return QuadrantStatsRepository.create_stats(db, stats)
         except Exception as e:
             print(f"Error calculating quadrant stats: {str(e)}")
             return None
 
+    @staticmethod
+    def _latest_snapshots(db: Session, names: List[str]):
+        """Último registro de estadísticas de cada cuadrante de ``names``.
+
+        Una búsqueda por cuadrante sobre ix_quadrant_stats_quadrant_timestamp,
+        en lugar de agrupar toda la tabla.
+        """
+        snapshots = {}
+        for name in names:
+            row = QuadrantStatsRepository.get_latest_stats_by_quadrant(db, name)
+            if row is not None:
+                snapshots[name] = row
+        return snapshots
+
+    @staticmethod
+    def _changed_hours(db: Session, since_version: int, start: datetime, end: datetime):
+        """Horas de [start, end) con lecturas escritas después de ``since_version``"""
+        rollups = models.AirQualityRollup.__table__
+        return set(db.execute(
+            select(rollups.c.bucket_start).distinct().where(
+                rollups.c.granularity == "hour",
+                rollups.c.bucket_start >= start,
+                rollups.c.bucket_start < end,
+                rollups.c.data_version > since_version,
+                rollups.c.source != FUSED_SOURCE
+            )
+        ).scalars())
+
+    @staticmethod
+    def _hour_states(db: Session, hours: set):
+        """Estado RunningStats serializado por (subcuadrante, hora) para las horas dadas"""
+        # Horas consecutivas en un solo rango para usar el índice de timestamp
+        ranges = []
+        for hour in sorted(hours):
+            if ranges and ranges[-1][1] == hour:
+                ranges[-1][1] = hour + timedelta(hours=1)
+            else:
+                ranges.append([hour, hour + timedelta(hours=1)])
+
+        table = models.AirQualityReading.__table__
+        rows = db.execute(
+            select(table.c.quadrant_name, table.c.timestamp, *[table.c[p] for p in POLLUTANTS]).where(
+                or_(*[and_(table.c.timestamp >= low, table.c.timestamp < high) for low, high in ranges]),
+                table.c.quadrant_name.in_(QUADRANT_NAMES),
+                _source_filter(table.c.source)
+            )
+        ).all()
+
+        groups = {}
+        for name, timestamp, *values in rows:
+            groups.setdefault((name, truncate_datetime(timestamp, "hour").isoformat()), []).append(values)
+        states = {}
+        for key, values in groups.items():
+            columns = np.array(values, dtype=np.float64)
+            state = {}
+            for index, pollutant in enumerate(POLLUTANTS):
+                running = RunningStats()
+                running.update(columns[:, index])
+                state[pollutant] = running.to_dict()
+            states[key] = state
+        return states
+
+    @staticmethod
+    def update_running_stats(db: Session, window_hours: int = 24, now: Optional[datetime] = None):
+        """Actualiza las estadísticas de los cuadrantes sobre la ventana de las últimas horas.
+
+        La ventana cubre ``window_hours`` horas completas hasta la hora en
+        curso. El último registro de cada subcuadrante guarda en
+        ``additional_metrics["hours"]`` el estado RunningStats (conteo, media,
+        M2, mín/máx y sketch de cuantiles) de cada hora de la ventana, y la
+        ventana y versión de lecturas ya incorporadas. Cada llamada relee solo
+        las horas que entraron a la ventana y las que tienen lecturas escritas
+        después de esa versión (rollups horarios con data_version mayor), de
+        modo que las correcciones del upsert se reflejan y el costo es
+        proporcional a lo escrito; las horas que salen de la ventana se
+        descartan sin leer nada. Los cuadrantes principales combinan el estado
+        de sus subcuadrantes. Se insertan registros solo para los cuadrantes
+        cuyo estado cambió; si ninguno cambió, la ventana se registra en el
+        último registro para no releerla. Retorna el último registro de cada
+        cuadrante.
+        """
+        try:
+            window_end = truncate_datetime(now or datetime.now(), "hour") + timedelta(hours=1)
+            window_start = window_end - timedelta(hours=window_hours)
+            # La versión se lee antes que las lecturas: lo escrito después se
+            # vuelve a leer en la siguiente llamada
+            version, _ = WatermarkRepository.get(db, "air_quality_readings")
+            window = {
+                "start": window_start.isoformat(),
+                "end": window_end.isoformat(),
+                "data_version": version
+            }
+
+            snapshots = QuadrantStatsRepository._latest_snapshots(db, QUADRANT_NAMES + PARENT_QUADRANTS)
+            latest = max(snapshots.values(), key=lambda row: row.id, default=None)
+            previous = (latest.additional_metrics or {}).get("window") if latest else None
+            if previous == window:
+                return list(snapshots.values())
+
+            hours = [window_start + timedelta(hours=n) for n in range(window_hours)]
+            stored = {
+                name: (row.additional_metrics or {}).get("hours")
+                for name, row in snapshots.items() if name not in PARENT_QUADRANTS
+            }
+            if previous is None or any(hour_states is None for hour_states in stored.values()):
+                # Sin estado por hora (primera llamada o registros anteriores): ventana completa
+                reread = set(hours)
+            else:
+                previous_start = datetime.fromisoformat(previous["start"])
+                previous_end = datetime.fromisoformat(previous["end"])
+                reread = {hour for hour in hours if not previous_start <= hour < previous_end}
+                reread |= QuadrantStatsRepository._changed_hours(
+                    db, previous["data_version"], window_start, window_end
+                )
+
+            window_keys = {hour.isoformat() for hour in hours}
+            reread_keys = {hour.isoformat() for hour in reread}
+            states = {
+                name: {
+                    key: state for key, state in (hour_states or {}).items()
+                    if key in window_keys and key not in reread_keys
+                }
+                for name, hour_states in stored.items()
+            }
+            if reread:
+                for (name, key), state in QuadrantStatsRepository._hour_states(db, reread).items():
+                    states.setdefault(name, {})[key] = state
+
+            def window_stats(hour_states):
+                merged = {pollutant: RunningStats() for pollutant in POLLUTANTS}
+                for key in sorted(hour_states):
+                    for pollutant in POLLUTANTS:
+                        merged[pollutant].merge(RunningStats.from_dict(hour_states[key][pollutant]))
+                return merged
+
+            def snapshot(name, merged, hour_states=None):
+                summaries = {p: merged[p].summary() for p in POLLUTANTS}
+                metrics = {"window": window, "stats": summaries}
+                if hour_states is not None:
+                    metrics["hours"] = hour_states
+                stats = {"quadrant_name": name, "additional_metrics": metrics}
+                for pollutant in POLLUTANTS:
+                    stats[f"avg_{pollutant}"] = summaries[pollutant]["mean"]
+                return models.QuadrantStatistics(**stats)
+
+            db_stats = []
+            merged_states = {}
+            # Los cuadrantes que se quedaron sin lecturas en la ventana también se actualizan
+            for name in sorted(states):
+                hour_states = states[name]
+                if name not in snapshots and not hour_states:
+                    continue
+                merged_states[name] = window_stats(hour_states)
+                if stored.get(name) != hour_states:
+                    db_stats.append(snapshot(name, merged_states[name], hour_states))
+
+            # Los cuadrantes principales combinan el estado de todos sus subcuadrantes
+            for parent in PARENT_QUADRANTS:
+                children = [state for name, state in merged_states.items() if parent_quadrant(name) == parent]
+                if not children:
+                    continue
+                merged = {pollutant: RunningStats() for pollutant in POLLUTANTS}
+                for state in children:
+                    for pollutant in POLLUTANTS:
+                        merged[pollutant].merge(state[pollutant])
+                row = snapshot(parent, merged)
+                previous_row = snapshots.get(parent)
+                if previous_row is None or (previous_row.additional_metrics or {}).get("stats") != row.additional_metrics["stats"]:
+                    db_stats.append(row)
+
+            if db_stats:
+                db.add_all(db_stats)
+                snapshots.update({row.quadrant_name: row for row in db_stats})
+            elif latest is not None:
+                latest.additional_metrics = {**(latest.additional_metrics or {}), "window": window}
+            db.commit()
+            return list(snapshots.values())
+        except Exception as e:
+            print(f"Error updating running quadrant stats: {str(e)}")
+            db.rollback()
+            return []
+
 class PredictionRepository:
     @staticmethod
     def create_prediction(db: Session, prediction_data: dict):
@@ -196,22 +1112,186 @@ class PredictionRepository:
             db.rollback()
             return None
 
+    @staticmethod
+    def store_predictions(db: Session, predictions: List[dict], returning: bool = False):
+        """Guarda una corrida completa de predicciones en una sola transacción"""
+        try:
+            result = _bulk_insert(db, models.AirQualityPrediction, predictions, returning)
+            db.commit()
+            return result
+        except Exception as e:
+            print(f"Error storing predictions: {str(e)}")
+            db.rollback()
+            return None
+
     @staticmethod
     def get_latest_predictions(
         db: Session, 
         quadrant_name: Optional[str] = None,
-        limit: int = 10
+        limit: int = 200
     ):
-        """Obtiene las últimas predicciones, opcionalmente filtradas por cuadrante"""
+        """Obtiene las predicciones de la última corrida, opcionalmente filtradas por cuadrante"""
         try:
-            query = db.query(models.AirQualityPrediction)
+            prediction = models.AirQualityPrediction
+            latest_run = select(func.max(prediction.issued_at)).scalar_subquery()
+            query = db.query(prediction).filter(prediction.issued_at == latest_run)
             if quadrant_name:
-                query = query.filter(
-                    models.AirQualityPrediction.quadrant_name == quadrant_name
-                )
+                query = query.filter(prediction.quadrant_name == quadrant_name)
             return query.order_by(
-                models.AirQualityPrediction.timestamp.desc()
+                prediction.quadrant_name, prediction.horizon_hours
             ).limit(limit).all()
         except Exception as e:
             print(f"Error getting latest predictions: {str(e)}")
             return []
+
+    @staticmethod
+    def get_forecast_inputs(db: Session, start: datetime, end: datetime):
+        """Lecturas con cuadrante asignado en [start, end) para alimentar los modelos"""
+        try:
+            table = models.AirQualityReading.__table__
+            columns = [table.c.quadrant_name, table.c.timestamp] + [
+                table.c[pollutant] for pollutant in POLLUTANTS
+            ]
+            return db.execute(
+                select(*columns).where(
+                    table.c.quadrant_name.isnot(None),
+                    table.c.timestamp >= start,
+                    table.c.timestamp < end,
+                    _source_filter(table.c.source)
+                )
+            ).all()
+        except Exception as e:
+            print(f"Error getting forecast inputs: {str(e)}")
+            return []
+
+class BackfillRepository:
+    @staticmethod
+    def create_job(db: Session, source: str, start_date: date, end_date: date, chunk_days: int):
+        """Registra una recarga histórica pendiente"""
+        try:
+            job = models.BackfillJob(
+                source=source,
+                start_date=start_date,
+                end_date=end_date,
+                chunk_days=chunk_days,
+                status="pending",
+                completed_chunks=[],
+                counts={"inserted": 0, "updated": 0, "skipped": 0}
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job
+        except Exception as e:
+            print(f"Error creating backfill job: {str(e)}")
+            db.rollback()
+            return None
+
+    @staticmethod
+    def get_job(db: Session, job_id: int):
+        """Obtiene una recarga histórica por id"""
+        try:
+            return db.get(models.BackfillJob, job_id)
+        except Exception as e:
+            print(f"Error getting backfill job: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_jobs(db: Session, limit: int = 20):
+        """Obtiene las recargas históricas más recientes"""
+        try:
+            return db.query(models.BackfillJob)\
+                .order_by(models.BackfillJob.id.desc())\
+                .limit(limit)\
+                .all()
+        except Exception as e:
+            print(f"Error getting backfill jobs: {str(e)}")
+            return []
+
+    @staticmethod
+    def get_running_job(db: Session, stale_before: datetime):
+        """Recarga en curso con progreso posterior a ``stale_before``, o None"""
+        try:
+            return db.query(models.BackfillJob)\
+                .filter(
+                    models.BackfillJob.status == "running",
+                    models.BackfillJob.updated_at >= stale_before
+                )\
+                .first()
+        except Exception as e:
+            print(f"Error getting running backfill job: {str(e)}")
+            return None
+
+    @staticmethod
+    def claim_job(db: Session, job_id: int, stale_before: datetime):
+        """Marca la recarga como 'running' si ninguna otra lo está.
+
+        Las recargas 'running' sin progreso desde ``stale_before`` (su proceso
+        murió) pasan a 'interrupted'. Luego un UPDATE condicionado a que no
+        exista otra recarga 'running' (incluida esta) asigna la recarga. La
+        condición sola no basta con READ COMMITTED: dos procesos que asignan
+        recargas distintas no ven la fila del otro sin confirmar. El índice
+        único parcial uq_backfill_jobs_running lo impide: el segundo espera a
+        que el primero confirme y falla por la clave duplicada. Retorna True
+        si la recarga quedó asignada a quien llama.
+        """
+        try:
+            jobs = models.BackfillJob.__table__
+            db.execute(
+                jobs.update()
+                .where(jobs.c.status == "running", jobs.c.updated_at < stale_before)
+                .values(status="interrupted", updated_at=datetime.utcnow())
+            )
+            other = jobs.alias("other")
+            busy = select(other.c.id).where(other.c.status == "running")
+            result = db.execute(
+                jobs.update()
+                .where(jobs.c.id == job_id, ~busy.exists())
+                .values(status="running", error=None, updated_at=datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount == 1
+        except IntegrityError:
+            # Otra recarga quedó asignada al mismo tiempo
+            db.rollback()
+            return False
+        except Exception as e:
+            print(f"Error claiming backfill job: {str(e)}")
+            db.rollback()
+            return False
+
+    @staticmethod
+    def record_chunk(db: Session, job_id: int, chunk_start: date, counts: dict):
+        """Marca un fragmento como guardado y acumula sus conteos (punto de control)"""
+        try:
+            job = db.get(models.BackfillJob, job_id)
+            completed = list(job.completed_chunks or [])
+            if chunk_start.isoformat() not in completed:
+                completed.append(chunk_start.isoformat())
+            totals = dict(job.counts or {})
+            for result in ("inserted", "updated", "skipped"):
+                totals[result] = totals.get(result, 0) + counts.get(result, 0)
+            job.completed_chunks = completed
+            job.counts = totals
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            return job
+        except Exception as e:
+            print(f"Error recording backfill chunk: {str(e)}")
+            db.rollback()
+            return None
+
+    @staticmethod
+    def set_status(db: Session, job_id: int, status: str, error: Optional[str] = None):
+        """Actualiza el estado de una recarga histórica"""
+        try:
+            job = db.get(models.BackfillJob, job_id)
+            job.status = status
+            job.error = error
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            return job
+        except Exception as e:
+            print(f"Error updating backfill job: {str(e)}")
+            db.rollback()
+            return None
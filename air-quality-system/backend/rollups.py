@@ -0,0 +1,98 @@
+"""Mantenimiento de los rollups horarios y diarios.
+
+Uso:
+    python rollups.py backfill [--start 2024-01-01] [--end 2024-12-31]
+    python rollups.py verify --start 2024-01-01 --end 2024-01-31
+"""
+import argparse
+import math
+from datetime import datetime
+from sqlalchemy import select
+import models
+from database import SessionLocal, engine
+from aggregation import POLLUTANTS, merge_rollups, rollup_readings
+from repositories.crud import RollupRepository
+
+
+def _differs(expected, actual):
+    if expected is None or actual is None:
+        return expected != actual
+    return not math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def verify_rollups(db, start_time: datetime, end_time: datetime):
+    """Compara los rollups almacenados con un recálculo desde las lecturas crudas.
+
+    El rango debe cubrir días completos. Retorna la lista de diferencias
+    como tuplas (granularity, source, bucket_start, campo, esperado, actual).
+    """
+    readings = models.AirQualityReading.__table__
+    rollups = models.AirQualityRollup.__table__
+
+    raw_rows = db.execute(
+        select(readings.c.source, readings.c.timestamp, *[readings.c[p] for p in POLLUTANTS])
+        .where(
+            readings.c.source.isnot(None),
+            readings.c.timestamp >= start_time,
+            readings.c.timestamp < end_time
+        )
+    ).all()
+    expected = {"hour": rollup_readings(raw_rows, "hour")}
+    expected["day"] = merge_rollups(
+        [
+            {"source": source, "bucket_start": bucket_start, **values}
+            for (source, bucket_start), values in expected["hour"].items()
+        ],
+        "day"
+    )
+
+    mismatches = []
+    for granularity, expected_rollups in expected.items():
+        stored = {
+            (row["source"], row["bucket_start"]): row
+            for row in db.execute(
+                select(rollups).where(
+                    rollups.c.granularity == granularity,
+                    rollups.c.bucket_start >= start_time,
+                    rollups.c.bucket_start < end_time
+                )
+            ).mappings()
+        }
+        for key in expected_rollups.keys() | stored.keys():
+            values = expected_rollups.get(key, {})
+            row = stored.get(key, {})
+            for field in values.keys() | {"count"}:
+                if _differs(values.get(field), row.get(field)):
+                    mismatches.append(
+                        (granularity, key[0], key[1], field, values.get(field), row.get(field))
+                    )
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento de rollups de calidad del aire")
+    parser.add_argument("command", choices=["backfill", "verify"])
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == "backfill":
+            refreshed = RollupRepository.backfill(db, args.start, args.end)
+            print(f"Backfill completado: {refreshed} buckets horarios")
+        else:
+            if not args.start or not args.end:
+                parser.error("verify requiere --start y --end")
+            mismatches = verify_rollups(db, args.start, args.end)
+            for mismatch in mismatches:
+                print("Diferencia:", mismatch)
+            print(f"Verificación completada: {len(mismatches)} diferencias")
+            raise SystemExit(1 if mismatches else 0)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
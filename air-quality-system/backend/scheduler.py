@@ -0,0 +1,104 @@
+import asyncio
+import random
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+from metrics import JOB_RUNS
+
+
+class ScheduledJob:
+    """Tarea periódica con intervalo propio, jitter y backoff exponencial"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable],
+        interval: float,
+        jitter: float = 0.1,
+        max_backoff: float = 3600,
+        run_on_start: bool = True
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.run_on_start = run_on_start
+        self.failures = 0
+        self.last_run: Optional[datetime] = None
+        self.last_success: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def next_delay(self) -> float:
+        """Calcula la espera hasta la siguiente ejecución"""
+        delay = self.interval
+        if self.failures:
+            delay = min(self.interval * (2 ** self.failures), self.max_backoff)
+        spread = delay * self.jitter
+        return max(0.0, delay + random.uniform(-spread, spread))
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "failures": self.failures,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "last_error": self.last_error
+        }
+
+
+class IngestionScheduler:
+    """Ejecuta los colectores en segundo plano, desacoplados de las peticiones HTTP"""
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add_job(self, job: ScheduledJob):
+        self.jobs[job.name] = job
+        return job
+
+    async def run_job(self, name: str):
+        """Ejecuta una tarea una vez, registrando éxito o fallo"""
+        job = self.jobs[name]
+        job.last_run = datetime.now()
+        try:
+            result = await job.func()
+            job.failures = 0
+            job.last_success = datetime.now()
+            job.last_error = None
+            JOB_RUNS.inc(job=name, outcome="success")
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            JOB_RUNS.inc(job=name, outcome="failure")
+            print(f"Error en la tarea {name} (fallo #{job.failures}): {str(e)}")
+            return None
+
+    async def _loop(self, job: ScheduledJob):
+        if not job.run_on_start:
+            await asyncio.sleep(job.next_delay())
+        while True:
+            await self.run_job(job.name)
+            await asyncio.sleep(job.next_delay())
+
+    def start(self):
+        """Lanza una tarea asyncio por cada trabajo registrado"""
+        for name, job in self.jobs.items():
+            if name not in self._tasks or self._tasks[name].done():
+                self._tasks[name] = asyncio.create_task(self._loop(job), name=name)
+                print(f"Tarea de ingesta iniciada: {name} (cada {job.interval}s)")
+
+    async def stop(self):
+        """Cancela las tareas en ejecución y espera a que terminen"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def status(self):
+        return [job.to_dict() for job in self.jobs.values()]
@@ -0,0 +1,37 @@
+from typing import Iterable, List, Literal, Sequence
+import orjson
+from fastapi.responses import ORJSONResponse
+from repositories.crud import READING_COLUMNS
+
+Layout = Literal["records", "columns"]
+
+
+def rows_to_records(rows: Iterable[Sequence], columns: List[str] = READING_COLUMNS):
+    """Convierte filas en una lista de diccionarios ({"pm25": ..., ...} por fila)"""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def rows_to_columns(rows: Sequence[Sequence], columns: List[str] = READING_COLUMNS):
+    """Convierte filas en formato columnar ({"pm25": [...], ...})"""
+    if not rows:
+        return {column: [] for column in columns}
+    return {column: list(values) for column, values in zip(columns, zip(*rows))}
+
+
+def dicts_to_rows(items: Iterable[dict], columns: List[str] = READING_COLUMNS):
+    return [tuple(item.get(column) for column in columns) for item in items]
+
+
+def serialize_rows(rows, layout: Layout = "records", columns: List[str] = READING_COLUMNS):
+    if layout == "columns":
+        return rows_to_columns(rows, columns)
+    return rows_to_records(rows, columns)
+
+
+def readings_response(rows, layout: Layout = "records", columns: List[str] = READING_COLUMNS):
+    """Respuesta JSON serializada con orjson directamente desde filas (datetime incluido)"""
+    return ORJSONResponse(serialize_rows(rows, layout, columns))
+
+
+def dumps(value) -> bytes:
+    return orjson.dumps(value)
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+# Los módulos del backend se importan de forma plana (import database, ...)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# database.py crea el motor al importarse: la configuración debe ir antes
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["INGESTION_ENABLED"] = "false"
+os.environ.setdefault("DB_ASYNC", "false")
+
+import pytest
+import models
+from database import engine, SessionLocal
+
+
+@pytest.fixture
+def db():
+    """Sesión sobre un esquema recién creado para cada prueba"""
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
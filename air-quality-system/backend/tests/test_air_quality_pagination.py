@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+import main
+from repositories.crud import AirQualityRepository
+
+START = datetime(2024, 5, 1)
+
+
+def test_timeframe_pages_follow_the_cursor(db):
+    AirQualityRepository.store_batch_readings(db, [
+        {"timestamp": START + timedelta(hours=hour), "latitude": 19.54, "longitude": -96.91,
+         "source": "openmeteo", "pm25": float(hour)}
+        for hour in range(25)
+    ])
+    client = TestClient(main.app)
+    params = {"start_time": START.isoformat(), "end_time": (START + timedelta(days=2)).isoformat(), "limit": 10}
+
+    seen = []
+    cursor = None
+    for _ in range(5):
+        response = client.get("/api/air-quality", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen.extend(row["pm25"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [float(hour) for hour in reversed(range(25))]
+
+
+def test_invalid_cursor_is_rejected(db):
+    client = TestClient(main.app)
+    response = client.get("/api/air-quality", params={
+        "start_time": START.isoformat(), "end_time": START.isoformat(), "cursor": "no-es-un-cursor"
+    })
+    assert response.status_code == 400
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+from datetime import date, datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+import backfill
+import config
+import main
+import models
+from database import SessionLocal
+from backfill import BackfillConflictError, claim_job, create_job, run_job, validate_range
+
+
+class FakeCollector:
+    """Colector con fetch_range determinista; ``block`` detiene el primer fragmento"""
+
+    def __init__(self, block=False):
+        self.block = block
+        self.calls = []
+
+    async def fetch_range(self, start_date, end_date):
+        self.calls.append(start_date)
+        if self.block:
+            await asyncio.Event().wait()
+        return [
+            {"timestamp": datetime.combine(day, datetime.min.time()).isoformat(),
+             "latitude": 19.55, "longitude": -96.9, "pm25": 10.0}
+            for day in (start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1))
+        ]
+
+
+def test_range_is_clamped_to_today_and_capped(monkeypatch):
+    monkeypatch.setattr(config, "BACKFILL_MAX_DAYS", 31)
+    today = date(2024, 6, 15)
+    assert validate_range(date(2024, 6, 1), date(2030, 1, 1), today) == (date(2024, 6, 1), today)
+    with pytest.raises(ValueError):
+        validate_range(date(2024, 7, 1), date(2024, 7, 5), today)
+    with pytest.raises(ValueError):
+        validate_range(date(2024, 1, 1), date(2024, 3, 1), today)
+
+
+def test_only_one_job_runs_at_a_time(db):
+    first = create_job(date(2024, 1, 1), date(2024, 1, 10), 5)
+    second = create_job(date(2024, 2, 1), date(2024, 2, 10), 5)
+    assert claim_job(first)
+    assert not claim_job(first)
+    assert not claim_job(second)
+    with pytest.raises(BackfillConflictError):
+        create_job(date(2024, 3, 1), date(2024, 3, 10), 5)
+    with pytest.raises(BackfillConflictError):
+        asyncio.run(run_job(second, FakeCollector()))
+
+
+def test_concurrent_claims_of_different_jobs_have_one_winner(db):
+    jobs = [create_job(date(2024, 1, 1), date(2024, 1, 10), 5) for _ in range(8)]
+    barrier = threading.Barrier(len(jobs))
+    results = {}
+
+    def claim(job_id):
+        barrier.wait()
+        results[job_id] = claim_job(job_id)
+
+    threads = [threading.Thread(target=claim, args=(job_id,)) for job_id in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results.values()) == [False] * 7 + [True]
+    assert db.query(models.BackfillJob).filter_by(status="running").count() == 1
+
+
+def test_database_rejects_a_second_running_job(db):
+    # Con READ COMMITTED la condición NOT EXISTS de otra sesión no ve una
+    # asignación sin confirmar; el índice único es lo que la rechaza
+    first = create_job(date(2024, 1, 1), date(2024, 1, 10), 5)
+    second = create_job(date(2024, 2, 1), date(2024, 2, 10), 5)
+    assert claim_job(first)
+
+    other = SessionLocal()
+    try:
+        with pytest.raises(IntegrityError):
+            other.execute(
+                text("UPDATE backfill_jobs SET status = 'running' WHERE id = :id"), {"id": second}
+            )
+            other.commit()
+    finally:
+        other.rollback()
+        other.close()
+
+
+def test_stale_running_job_does_not_block(db, monkeypatch):
+    job_id = create_job(date(2024, 1, 1), date(2024, 1, 10), 5)
+    assert claim_job(job_id)
+    monkeypatch.setattr(backfill, "_stale_before", lambda: datetime.utcnow() + timedelta(minutes=1))
+    second = create_job(date(2024, 2, 1), date(2024, 2, 10), 5)
+    assert second is not None
+    assert claim_job(second)
+    db.expire_all()
+    assert db.get(models.BackfillJob, job_id).status == "interrupted"
+
+
+def test_interrupted_job_resumes_pending_chunks(db):
+    job_id = create_job(date(2024, 1, 1), date(2024, 1, 10), 5)
+
+    async def interrupt():
+        task = asyncio.create_task(run_job(job_id, FakeCollector(block=True), concurrency=1, rate_limit=0))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(interrupt())
+    db.expire_all()
+    assert db.get(models.BackfillJob, job_id).status == "interrupted"
+
+    collector = FakeCollector()
+    assert asyncio.run(run_job(job_id, collector, rate_limit=0)) == "completed"
+    assert sorted(collector.calls) == [date(2024, 1, 1), date(2024, 1, 6)]
+    assert db.query(models.AirQualityReading).count() == 10
+
+
+def test_empty_chunks_fail_and_are_refetched_on_resume(db):
+    job_id = create_job(date(2024, 1, 1), date(2024, 1, 10), 5)
+
+    class PartialCollector(FakeCollector):
+        async def fetch_range(self, start_date, end_date):
+            readings = await super().fetch_range(start_date, end_date)
+            # Respuesta sin los campos esperados para el segundo fragmento
+            return [] if start_date == date(2024, 1, 6) else readings
+
+    assert asyncio.run(run_job(job_id, PartialCollector(), rate_limit=0)) == "failed"
+    db.expire_all()
+    assert db.get(models.BackfillJob, job_id).completed_chunks == ["2024-01-01"]
+
+    collector = FakeCollector()
+    assert asyncio.run(run_job(job_id, collector, rate_limit=0)) == "completed"
+    assert collector.calls == [date(2024, 1, 6)]
+    assert db.query(models.AirQualityReading).count() == 10
+
+
+def test_api_rejects_a_second_job_while_one_runs(db):
+    job_id = create_job(date(2024, 1, 1), date(2024, 1, 10), 5)
+    assert claim_job(job_id)
+    client = TestClient(main.app)
+    response = client.post("/api/backfill", params={"start_date": "2024-02-01", "end_date": "2024-02-05"})
+    assert response.status_code == 409
+    assert client.post(f"/api/backfill/{job_id}/resume").status_code == 409
+    assert client.get(f"/api/backfill/{job_id}").json()["running"] is True
+    assert client.post(
+        "/api/backfill", params={"start_date": "2099-01-01", "end_date": "2099-01-05"}
+    ).status_code == 400
+
+
+def test_cli_migrates_an_existing_database(db, monkeypatch, capsys):
+    db.execute(text("DROP TABLE air_quality_readings"))
+    db.execute(text(
+        "CREATE TABLE air_quality_readings (id INTEGER PRIMARY KEY, timestamp DATETIME, "
+        "latitude FLOAT, longitude FLOAT, pm25 FLOAT, pm10 FLOAT, no2 FLOAT, o3 FLOAT, "
+        "co FLOAT, source VARCHAR, raw_data JSON)"
+    ))
+    db.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    db.commit()
+
+    monkeypatch.setattr("sys.argv", ["backfill.py", "status"])
+    backfill.main()
+
+    columns = {row[1] for row in db.execute(text("PRAGMA table_info(air_quality_readings)"))}
+    assert {"quadrant_name", "raw_batch_id"} <= columns
+    assert "raw_data" not in columns
@@ -0,0 +1,49 @@
+import asyncio
+from cache import AsyncCache
+import main
+
+
+def counting_fetch(results):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return results[min(len(calls), len(results)) - 1]
+
+    return fetch, calls
+
+
+def test_failures_are_cached_only_with_negative_ttl():
+    async def run():
+        cache = AsyncCache(ttl=60, stale_ttl=0)
+        fetch, calls = counting_fetch([None])
+        assert await cache.get_or_fetch("sin-negativa", fetch) is None
+        assert await cache.get_or_fetch("sin-negativa", fetch) is None
+        assert len(calls) == 2
+
+        fetch, calls = counting_fetch([None, {"temperature": 21}])
+        assert await cache.get_or_fetch("clima", fetch, negative_ttl=60) is None
+        assert await cache.get_or_fetch("clima", fetch, negative_ttl=60) is None
+        assert len(calls) == 1
+        # Vencida la caché negativa se vuelve a consultar
+        assert await cache.get_or_fetch("clima", fetch, negative_ttl=0) == {"temperature": 21}
+
+    asyncio.run(run())
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    async def run():
+        cache = AsyncCache(ttl=0, stale_ttl=300)
+        fetch, calls = counting_fetch([{"temperature": 21}, None])
+        assert await cache.get_or_fetch("clima", fetch, negative_ttl=60) == {"temperature": 21}
+        assert await cache.get_or_fetch("clima", fetch, negative_ttl=60) == {"temperature": 21}
+        await asyncio.sleep(0)
+        assert len(calls) == 2
+        assert await cache.get_or_fetch("clima", fetch, negative_ttl=60) == {"temperature": 21}
+
+    asyncio.run(run())
+
+
+def test_fallback_readings_are_not_cacheable(db):
+    assert main._latest_readings_body("openmeteo", 24, "records") is None
+    assert main._fallback_readings_body("records").startswith(b"[")
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+import httpx
+import pytest
+from data_collectors.air_quality_collector import OpenMeteoCollector
+from data_collectors.http_client import AsyncHTTPClient
+from data_collectors.registry import FUSED_SOURCE, fuse_readings, normalize_reading
+from data_collectors.sentinel5p_collector import Sentinel5PCollector
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fixture_client(name, requests=None):
+    """Cliente HTTP que responde cualquier petición con el fixture ``name``"""
+    body = load_fixture(name)
+
+    def handler(request):
+        if requests is not None:
+            requests.append(request)
+        return httpx.Response(200, json=body)
+
+    return AsyncHTTPClient(retries=0, transport=httpx.MockTransport(handler))
+
+
+def collect(collector, name):
+    async def run():
+        try:
+            return [
+                normalize_reading(name, raw)
+                for raw in await collector.fetch_air_quality_data()
+            ]
+        finally:
+            await collector.http_client.aclose()
+    return asyncio.run(run())
+
+
+def test_openmeteo_fixture_is_parsed_and_normalized():
+    requests = []
+    collector = OpenMeteoCollector(fixture_client("openmeteo_air_quality.json", requests))
+    readings = collect(collector, "openmeteo")
+
+    assert requests[0].url.host == "air-quality-api.open-meteo.com"
+    assert len(readings) == 6
+    latest = readings[0]
+    assert latest["timestamp"] == datetime(2024, 5, 1, 5)
+    assert latest["source"] == "openmeteo"
+    assert (latest["latitude"], latest["longitude"]) == (19.5438, -96.9102)
+    assert latest["pm25"] == 12.0
+    # CO llega en µg/m³ y se guarda en mg/m³
+    assert latest["co"] == pytest.approx(0.226)
+    assert latest["raw_data"] is None
+
+
+def test_sentinel5p_fixture_is_parsed_and_normalized(monkeypatch):
+    monkeypatch.setenv("CAMS_API_KEY", "token-de-prueba")
+    requests = []
+    collector = Sentinel5PCollector(fixture_client("sentinel5p_cams.json", requests))
+    readings = collect(collector, "sentinel5p")
+
+    assert requests[0].method == "POST"
+    assert requests[0].headers["Authorization"] == "Bearer token-de-prueba"
+    assert len(readings) == 3
+    assert readings[0]["timestamp"] == datetime(2024, 5, 1, 0)
+    assert readings[0]["pm25"] == 13.1
+    assert readings[2]["no2"] is None
+
+
+def test_normalize_reading_keeps_only_extra_fields_in_raw_data():
+    normalized = normalize_reading("cams", {
+        "timestamp": "2024-05-01T03:15:00Z",
+        "latitude": "19.53",
+        "longitude": -96.91,
+        "pm25": "8.5",
+        "pm10": None,
+        "station": "XAL-01"
+    })
+    assert normalized == {
+        "timestamp": datetime(2024, 5, 1, 3, 15),
+        "latitude": 19.53,
+        "longitude": -96.91,
+        "source": "cams",
+        "raw_data": {"station": "XAL-01"},
+        "pm25": 8.5,
+        "pm10": None,
+        "no2": None,
+        "o3": None,
+        "co": None
+    }
+
+
+def test_normalize_reading_rejects_incomplete_readings():
+    assert normalize_reading("cams", {"timestamp": "no es fecha", "latitude": 1, "longitude": 1}) is None
+    assert normalize_reading("cams", {"timestamp": "2024-05-01T00:00", "latitude": 1}) is None
+
+
+def test_fuse_readings_weights_sources_that_overlap():
+    reading = lambda source, minute, pm25, no2: normalize_reading(source, {
+        "timestamp": f"2024-05-01T00:{minute:02d}:00",
+        "latitude": 19.5512,
+        "longitude": -96.9049,
+        "pm25": pm25,
+        "no2": no2
+    })
+    readings = [
+        reading("openmeteo", 0, 10.0, 8.0),
+        reading("sentinel5p", 30, 16.0, None),
+        # Sin otra fuente en esa hora/ubicación: no se fusiona
+        reading("openmeteo", 0, 30.0, 9.0) | {"latitude": 19.60}
+    ]
+    fused = fuse_readings(readings, {"openmeteo": 2.0, "sentinel5p": 1.0})
+
+    assert len(fused) == 1
+    assert fused[0]["source"] == FUSED_SOURCE
+    assert fused[0]["timestamp"] == datetime(2024, 5, 1, 0)
+    assert (fused[0]["latitude"], fused[0]["longitude"]) == (19.55, -96.9)
+    assert fused[0]["pm25"] == pytest.approx((2 * 10.0 + 16.0) / 3)
+    assert fused[0]["no2"] == 8.0
+    assert fused[0]["o3"] is None
+    assert fused[0]["raw_data"]["sources"] == ["openmeteo", "sentinel5p"]
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from conftest import BACKEND_DIR
+from database import _engine_options, async_database_url
+
+# Se ejecuta en un proceso aparte porque database.py crea los motores al importarse
+ENDPOINT_CHECK = textwrap.dedent("""
+    from datetime import datetime, timedelta
+    from fastapi.testclient import TestClient
+    import database
+    import main
+    from repositories.crud import AirQualityRepository
+
+    assert (database.async_engine is not None) == (database.config.DB_ASYNC)
+    db = database.SessionLocal()
+    AirQualityRepository.store_batch_readings(db, [
+        {"timestamp": datetime(2024, 5, 1) + timedelta(hours=hour), "latitude": 19.55,
+         "longitude": -96.9, "source": "openmeteo", "pm25": float(hour)}
+        for hour in range(5)
+    ])
+    db.close()
+
+    client = TestClient(main.app)
+    params = {"start_time": "2024-05-01T00:00:00", "end_time": "2024-05-02T00:00:00", "limit": 3}
+    first = client.get("/api/air-quality", params=params)
+    assert [row["pm25"] for row in first.json()] == [4.0, 3.0, 2.0], first.text
+    rest = client.get("/api/air-quality", params={**params, "cursor": first.headers["X-Next-Cursor"]})
+    assert [row["pm25"] for row in rest.json()] == [1.0, 0.0], rest.text
+    aggregate = client.get("/api/air-quality/aggregate", params={**params, "bucket": "day"})
+    assert aggregate.json()[0]["count"] == 5, aggregate.text
+    if database.async_engine is not None:
+        assert 'engine="async"' in client.get("/metrics").text
+""")
+
+
+@pytest.mark.parametrize("db_async", ["false", "true"])
+def test_endpoints_in_sync_and_async_mode(db_async):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/modes.db",
+        "DB_ASYNC": db_async,
+        "INGESTION_ENABLED": "false"
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", ENDPOINT_CHECK],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+
+def test_memory_sqlite_is_shared_across_threads():
+    url = make_url("sqlite://")
+    engine = create_engine(url, **_engine_options(url))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    def count():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT count(*) FROM t")).scalar()
+
+    assert asyncio.run(asyncio.to_thread(count)) == 1
+
+
+def test_async_mode_rejects_memory_sqlite():
+    with pytest.raises(RuntimeError):
+        async_database_url("sqlite:///:memory:")
+    assert async_database_url("sqlite:////tmp/a.db").drivername == "sqlite+aiosqlite"
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+from estimator.forecaster import QuadrantForecaster, hourly_quadrant_means
+from quadrants import parent_quadrant
+
+NOW = datetime(2024, 5, 10, 12)
+
+
+def _rows(quadrant_name, start, hours):
+    return [
+        (quadrant_name, start + timedelta(hours=hour), 10.0 + hour, 20.0, None, None, None)
+        for hour in range(hours)
+    ]
+
+
+def test_next_start_never_precedes_the_history_window():
+    forecaster = QuadrantForecaster()
+    oldest = NOW - timedelta(days=7)
+    assert forecaster.next_start(oldest) == oldest
+
+    forecaster.fold(hourly_quadrant_means(_rows("Noreste-3", NOW - timedelta(days=30), 3), parent_quadrant))
+    assert forecaster.next_start(oldest) == oldest
+
+    forecaster.fold(hourly_quadrant_means(_rows("Noreste-3", NOW - timedelta(hours=3), 2), parent_quadrant))
+    assert forecaster.next_start(oldest) == NOW - timedelta(hours=1)
+
+
+def test_stale_quadrants_expire_and_stop_forecasting():
+    forecaster = QuadrantForecaster(horizons=(1,))
+    forecaster.fold(hourly_quadrant_means(
+        _rows("Noroeste-1", NOW - timedelta(days=10), 24) + _rows("Sureste-2", NOW - timedelta(hours=6), 6),
+        parent_quadrant
+    ))
+
+    forecaster.expire(NOW - timedelta(days=7))
+
+    assert set(forecaster.last_hour) == {"Sureste-2", "Sureste"}
+    assert {quadrant_name for quadrant_name, _ in forecaster.states} == {"Sureste-2", "Sureste"}
+    assert forecaster.next_start(NOW - timedelta(days=7)) == NOW
+    targets = {p["quadrant_name"]: p["timestamp"] for p in forecaster.forecast(NOW)}
+    assert targets == {"Sureste-2": NOW, "Sureste": NOW}
@@ -0,0 +1,87 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+import main
+from repositories.crud import AirQualityRepository, PredictionRepository
+from data_collectors.registry import FUSED_SOURCE, fuse_readings
+
+START = datetime(2024, 5, 1, 0)
+END = datetime(2024, 5, 1, 23, 59)
+
+
+def store_with_fusion(db):
+    readings = [
+        {
+            "timestamp": datetime(2024, 5, 1, 10),
+            "latitude": 19.5512,
+            "longitude": -96.9049,
+            "source": source,
+            "pm25": pm25,
+            "pm10": None, "no2": None, "o3": None, "co": None
+        }
+        for source, pm25 in (("openmeteo", 10.0), ("sentinel5p", 20.0))
+    ]
+    readings += fuse_readings(readings, {})
+    AirQualityRepository.store_batch_readings(db, readings)
+
+
+def test_fused_readings_are_not_counted_by_raw_consumers(db):
+    store_with_fusion(db)
+
+    buckets = AirQualityRepository.aggregate_readings(db, START, END, "hour", ["pm25"])
+    assert [bucket["count"] for bucket in buckets] == [2]
+    assert buckets[0]["pm25_mean"] == 15.0
+
+    stations = AirQualityRepository.get_latest_station_readings(db, START, END)
+    assert sorted(row.pm25 for row in stations) == [10.0, 20.0]
+
+    exported = [
+        row for rows in AirQualityRepository.iter_readings_in_timeframe(db, START, END)
+        for row in rows
+    ]
+    assert {row.source for row in exported} == {"openmeteo", "sentinel5p"}
+
+    inputs = PredictionRepository.get_forecast_inputs(db, START, END)
+    assert len(inputs) == 2
+
+
+def test_fused_readings_are_available_by_source(db):
+    store_with_fusion(db)
+
+    buckets = AirQualityRepository.aggregate_readings(
+        db, START, END, "hour", ["pm25"], source=FUSED_SOURCE
+    )
+    assert [bucket["count"] for bucket in buckets] == [1]
+    stations = AirQualityRepository.get_latest_station_readings(db, START, END, FUSED_SOURCE)
+    assert [row.pm25 for row in stations] == [15.0]
+
+
+def test_raw_reading_reads_skip_fused_rows(db):
+    store_with_fusion(db)
+
+    readings = AirQualityRepository.get_readings_in_timeframe(db, START, END)
+    assert sorted(row.source for row in readings) == ["openmeteo", "sentinel5p"]
+    page, _ = AirQualityRepository.get_readings_page(db, START, END)
+    assert sorted(row.source for row in page) == ["openmeteo", "sentinel5p"]
+    assert AirQualityRepository.get_readings_count_in_timeframe(db, START, END) == 2
+    assert AirQualityRepository.get_readings_count_estimate(db, START, END) == 2
+    latest = AirQualityRepository.get_latest_readings(db)
+    assert FUSED_SOURCE not in {row.source for row in latest}
+
+    fused, _ = AirQualityRepository.get_readings_page(db, START, END, source=FUSED_SOURCE)
+    assert [row.pm25 for row in fused] == [15.0]
+    assert AirQualityRepository.get_readings_count_in_timeframe(db, START, END, FUSED_SOURCE) == 1
+
+
+def test_history_endpoints_skip_fused_rows(db):
+    store_with_fusion(db)
+    client = TestClient(main.app)
+
+    daily = client.get("/api/air-quality/history/daily?date=2024-05-01&total=exact").json()
+    assert daily["total"] == 2
+    assert sorted(row["source"] for row in daily["data"]) == ["openmeteo", "sentinel5p"]
+
+    history = client.get(
+        "/api/air-quality/history",
+        params={"start_time": START.isoformat(), "end_time": END.isoformat(), "source": FUSED_SOURCE}
+    ).json()
+    assert [row["source"] for row in history] == [FUSED_SOURCE]
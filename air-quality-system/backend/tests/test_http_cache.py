@@ -0,0 +1,36 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+import main
+from repositories.crud import AirQualityRepository
+
+READING = {"timestamp": datetime(2024, 5, 1), "latitude": 19.54, "longitude": -96.91, "source": "openmeteo"}
+
+
+def test_etag_follows_the_database_version(db):
+    AirQualityRepository.store_batch_readings(db, [{**READING, "pm25": 10.0}])
+    client = TestClient(main.app)
+
+    first = client.get("/api/air-quality/latest")
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+    assert client.get("/api/air-quality/latest", headers={"If-None-Match": etag}).status_code == 304
+
+    # Re-ingerir lo mismo no cambia la versión
+    AirQualityRepository.store_batch_readings(db, [{**READING, "pm25": 10.0}])
+    assert client.get("/api/air-quality/latest", headers={"If-None-Match": etag}).status_code == 304
+
+    # Una escritura de otro proceso (sin pasar por run_ingestion) cambia el ETag
+    # e invalida la caché de respuestas de este proceso
+    AirQualityRepository.store_batch_readings(db, [{**READING, "pm25": 12.5}])
+    changed = client.get("/api/air-quality/latest", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()[0]["pm25"] == 12.5
+
+
+def test_time_dependent_endpoints_are_not_conditional(db):
+    client = TestClient(main.app)
+    params = {"start_time": "2024-05-01T00:00:00", "end_time": "2024-05-02T00:00:00"}
+    assert "ETag" not in client.get("/api/air-quality/export", params=params).headers
+    assert "ETag" not in client.get("/api/air-quality/grid", params={"rows": 2, "cols": 2}).headers
+    assert "ETag" in client.get("/api/air-quality/history", params=params).headers
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from database import engine
+from repositories.crud import AirQualityRepository, PredictionRepository, QuadrantStatsRepository
+
+START = datetime(2024, 5, 1)
+END = START + timedelta(days=1)
+TIMESTAMP_INDEX = "ix_air_quality_timestamp_id"
+
+
+@contextmanager
+def captured_selects(table: str = "air_quality_readings"):
+    """Sentencias SELECT sobre ``table`` ejecutadas dentro del bloque"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and table in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def _query_plan(db, statement, parameters) -> str:
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_timeframe_query_uses_timestamp_index(db):
+    with captured_selects() as statements:
+        AirQualityRepository.get_readings_in_timeframe(db, START, END)
+
+    assert statements
+    for statement, parameters in statements:
+        assert TIMESTAMP_INDEX in _query_plan(db, statement, parameters)
+
+
+def test_keyset_page_uses_timestamp_index(db):
+    readings = [
+        {"timestamp": START + timedelta(minutes=10 * i), "latitude": 19.54, "longitude": -96.91,
+         "source": "openmeteo", "pm25": 1.0}
+        for i in range(30)
+    ]
+    AirQualityRepository.store_batch_readings(db, readings)
+    _, cursor = AirQualityRepository.get_readings_page(db, START, END, limit=10)
+
+    with captured_selects() as statements:
+        AirQualityRepository.get_readings_page(db, START, END, limit=10, cursor=cursor)
+
+    assert statements
+    for statement, parameters in statements:
+        plan = _query_plan(db, statement, parameters)
+        assert TIMESTAMP_INDEX in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_batch_upsert_looks_up_existing_rows_through_natural_key(db):
+    readings = [
+        {"timestamp": START + timedelta(hours=i), "latitude": 19.54, "longitude": -96.91,
+         "source": "openmeteo", "pm25": 1.0}
+        for i in range(24)
+    ]
+    AirQualityRepository.store_batch_readings(db, readings)
+
+    with captured_selects() as statements:
+        AirQualityRepository.store_batch_readings(db, readings)
+
+    assert statements
+    for statement, parameters in statements:
+        plan = _query_plan(db, statement, parameters)
+        assert "USING INDEX uq_air_quality_natural_key" in plan
+        assert "SCAN air_quality_readings" not in plan
+
+
+def test_latest_readings_by_source_use_natural_key_prefix(db):
+    with captured_selects() as statements:
+        AirQualityRepository.get_latest_readings_by_source(db, "openmeteo")
+
+    assert statements
+    for statement, parameters in statements:
+        plan = _query_plan(db, statement, parameters)
+        assert "USING INDEX uq_air_quality_natural_key (source=?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_latest_quadrant_stats_use_quadrant_timestamp_index(db):
+    with captured_selects("quadrant_statistics") as statements:
+        QuadrantStatsRepository.get_latest_stats_by_quadrant(db, "Noreste-3")
+
+    assert statements
+    for statement, parameters in statements:
+        plan = _query_plan(db, statement, parameters)
+        assert "USING INDEX ix_quadrant_stats_quadrant_timestamp (quadrant_name=?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_latest_predictions_use_issued_at_index(db):
+    for quadrant_name in (None, "Noreste-3"):
+        with captured_selects("air_quality_predictions") as statements:
+            PredictionRepository.get_latest_predictions(db, quadrant_name)
+
+        assert statements
+        for statement, parameters in statements:
+            # El ORDER BY ordena solo las filas de la última corrida
+            plan = _query_plan(db, statement, parameters)
+            assert "USING INDEX ix_predictions_issued_at (issued_at=?)" in plan
+            assert "COVERING INDEX ix_predictions_issued_at" in plan
+            assert "SCAN air_quality_predictions" not in plan
@@ -0,0 +1,29 @@
+import asyncio
+import main
+
+
+def test_publish_failures_do_not_fail_ingestion(monkeypatch):
+    counts = {"inserted": 3, "updated": 0, "skipped": 0, "sources": {}}
+
+    async def fake_ingest_all(registry):
+        return dict(counts)
+
+    def broken_stats():
+        raise RuntimeError("estadísticas no disponibles")
+
+    async def broken_weather():
+        raise RuntimeError("clima no disponible")
+
+    published = []
+    monkeypatch.setattr(main, "ingest_all", fake_ingest_all)
+    monkeypatch.setattr(main, "_update_quadrant_stats_body", broken_stats)
+    monkeypatch.setattr(main, "_latest_readings_body", lambda *args: b"[]")
+    monkeypatch.setattr(main.openmeteo_collector, "get_weather_data", broken_weather)
+    monkeypatch.setattr(main.broadcaster, "publish", lambda event, data: published.append(event))
+
+    async def run():
+        await main.response_cache.invalidate("weather")
+        return await main.run_ingestion()
+
+    assert asyncio.run(run()) == counts
+    assert published == ["readings"]
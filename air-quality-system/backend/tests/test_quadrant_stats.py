@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from sqlalchemy import event, text
+import models
+from database import engine
+from online_stats import RunningStats
+from repositories.crud import AirQualityRepository, QuadrantStatsRepository
+
+NOW = datetime(2024, 5, 2, 12, 30)
+# Noreste-3 y Sureste-1 (cuadrante principal distinto)
+POINTS = {"Noreste-3": (19.55, -96.90), "Sureste-1": (19.53, -96.90)}
+
+
+def reading(hours_ago, quadrant, pm25, source="openmeteo"):
+    latitude, longitude = POINTS[quadrant]
+    return {
+        "timestamp": NOW.replace(minute=0) - timedelta(hours=hours_ago),
+        "latitude": latitude, "longitude": longitude, "source": source, "pm25": pm25
+    }
+
+
+def stats_by_name(db):
+    rows = QuadrantStatsRepository.update_running_stats(db, window_hours=24, now=NOW)
+    return {row.quadrant_name: row.additional_metrics["stats"]["pm25"] for row in rows}
+
+
+def test_stats_cover_only_the_window_and_follow_revisions(db):
+    AirQualityRepository.store_batch_readings(db, [
+        reading(hours, "Noreste-3", float(hours)) for hours in range(24)
+    ] + [reading(hours, "Sureste-1", 100.0) for hours in range(3)])
+
+    stats = stats_by_name(db)
+    assert stats["Noreste-3"]["count"] == 24
+    assert stats["Noreste-3"]["mean"] == pytest.approx(np.mean(range(24)))
+    assert stats["Noreste"]["max"] == 23.0
+    assert stats["Sureste"]["count"] == 3
+
+    # Historial recargado fuera de la ventana y lecturas fusionadas no cuentan
+    AirQualityRepository.store_batch_readings(db, [
+        reading(24 * 30, "Noreste-3", 500.0),
+        reading(0, "Noreste-3", 999.0, source="fused")
+    ])
+    assert stats_by_name(db)["Noreste-3"]["count"] == 24
+
+    # Una lectura corregida en sitio (mismo id) se refleja
+    AirQualityRepository.store_batch_readings(db, [reading(0, "Noreste-3", 50.0)])
+    stats = stats_by_name(db)
+    assert stats["Noreste-3"]["count"] == 24
+    assert stats["Noreste-3"]["max"] == 50.0
+    assert stats["Noreste-3"]["mean"] == pytest.approx((sum(range(1, 24)) + 50.0) / 24)
+
+
+def test_unchanged_window_inserts_nothing(db):
+    AirQualityRepository.store_batch_readings(db, [reading(1, "Noreste-3", 10.0)])
+    stats_by_name(db)
+    inserted = db.query(models.QuadrantStatistics).count()
+    assert inserted == 2
+
+    stats_by_name(db)
+    AirQualityRepository.store_batch_readings(db, [reading(1, "Noreste-3", 10.0)])
+    stats_by_name(db)
+    assert db.query(models.QuadrantStatistics).count() == inserted
+
+    # Cuando la lectura sale de la ventana, el cuadrante queda vacío
+    rows = QuadrantStatsRepository.update_running_stats(db, window_hours=24, now=NOW + timedelta(days=2))
+    assert {row.quadrant_name: row.additional_metrics["stats"]["pm25"]["count"] for row in rows} == {
+        "Noreste-3": 0, "Noreste": 0
+    }
+
+
+def test_state_is_folded_per_hour_without_rescanning_the_window(db):
+    AirQualityRepository.store_batch_readings(db, [
+        reading(hours, "Noreste-3", float(hours)) for hours in range(24)
+    ])
+    stats_by_name(db)
+    snapshot = QuadrantStatsRepository.get_latest_stats_by_quadrant(db, "Noreste-3")
+    hours = snapshot.additional_metrics["hours"]
+    assert len(hours) == 24
+    assert RunningStats.from_dict(hours[min(hours)]["pm25"]).max == 23.0
+
+    # Una lectura borrada sin pasar por la ingesta no se nota: la hora no se
+    # relee porque su estado ya estaba guardado
+    db.execute(text("DELETE FROM air_quality_readings WHERE pm25 = 5.0"))
+    db.commit()
+
+    # Una hora después la lectura más antigua sale de la ventana y la nueva entra
+    AirQualityRepository.store_batch_readings(db, [reading(-1, "Noreste-3", 100.0)])
+    rows = QuadrantStatsRepository.update_running_stats(db, window_hours=24, now=NOW + timedelta(hours=1))
+    stats = {row.quadrant_name: row.additional_metrics["stats"]["pm25"] for row in rows}
+    assert stats["Noreste-3"]["count"] == 24
+    assert stats["Noreste-3"]["max"] == 100.0
+    assert stats["Noreste-3"]["mean"] == pytest.approx((sum(range(23)) + 100.0) / 24)
+    assert stats["Noreste"] == stats["Noreste-3"]
+
+
+def test_unchanged_quadrants_record_the_window(db):
+    AirQualityRepository.store_batch_readings(db, [reading(1, "Noreste-3", 10.0)])
+    stats_by_name(db)
+    later = NOW + timedelta(hours=1)
+    QuadrantStatsRepository.update_running_stats(db, window_hours=24, now=later)
+    inserted = db.query(models.QuadrantStatistics).count()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM air_quality_readings" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        QuadrantStatsRepository.update_running_stats(db, window_hours=24, now=later)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements == []
+    assert db.query(models.QuadrantStatistics).count() == inserted
@@ -0,0 +1,45 @@
+from datetime import datetime
+from sqlalchemy import text
+from migrations import assign_quadrants
+from quadrants import QUADRANT_INDEX, XALAPA_QUADRANTS
+
+
+def test_interior_points_resolve_to_their_quadrant():
+    for quadrant in XALAPA_QUADRANTS:
+        bounds = quadrant["bounds"]
+        latitude = (bounds["north"] + bounds["south"]) / 2
+        longitude = (bounds["east"] + bounds["west"]) / 2
+        assert QUADRANT_INDEX.lookup_one(latitude, longitude) == quadrant["name"]
+
+
+def test_corner_point_breaks_ties_to_the_north_east():
+    # Punto por defecto de Open-Meteo: esquina de Noroeste-4, Noreste-3, Suroeste-2 y Sureste-1
+    assert QUADRANT_INDEX.lookup_one(19.5438, -96.9102) == "Noreste-3"
+    # Borde interno horizontal y vertical
+    assert QUADRANT_INDEX.lookup_one(19.5438, -96.93) == "Noroeste-4"
+    assert QUADRANT_INDEX.lookup_one(19.53, -96.9102) == "Sureste-1"
+
+
+def test_outer_edges_stay_inside_and_outside_points_are_none():
+    assert QUADRANT_INDEX.lookup_one(19.5800, -96.8000) == "Noreste-2"
+    assert QUADRANT_INDEX.lookup_one(19.5000, -97.0000) == "Suroeste-3"
+    assert QUADRANT_INDEX.lookup_one(19.6, -96.9) is None
+
+
+def test_migration_assigns_quadrants_to_existing_rows(db):
+    db.execute(
+        text(
+            "INSERT INTO air_quality_readings (timestamp, latitude, longitude, source) "
+            "VALUES (:timestamp, :latitude, :longitude, 'legacy')"
+        ),
+        [
+            {"timestamp": datetime(2024, 1, 1, hour), "latitude": latitude, "longitude": longitude}
+            for hour, (latitude, longitude) in enumerate([(19.5438, -96.9102), (19.51, -96.82), (19.7, -96.9)])
+        ]
+    )
+    assign_quadrants(db.connection())
+
+    names = db.execute(text(
+        "SELECT quadrant_name FROM air_quality_readings ORDER BY timestamp"
+    )).scalars().all()
+    assert names == ["Noreste-3", "Sureste-4", None]
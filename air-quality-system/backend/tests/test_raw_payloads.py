@@ -0,0 +1,85 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+import models
+from data_collectors.registry import PROMOTED_FIELDS
+from migrations import offload_raw_data
+from raw_payloads import decode_payloads
+from repositories.crud import AirQualityRepository, RawPayloadRepository
+
+START = datetime(2024, 5, 1)
+
+
+def _readings(hours, pm25=10.0, raw_data=None):
+    return [
+        {
+            "timestamp": START + timedelta(hours=hour),
+            "latitude": 19.54381,
+            "longitude": -96.91023,
+            "source": "openmeteo",
+            "pm25": pm25,
+            "raw_data": raw_data
+        }
+        for hour in range(hours)
+    ]
+
+
+def _batches(db):
+    return db.execute(select(models.RawPayloadBatch)).scalars().all()
+
+
+def _reading_ids(db):
+    return db.execute(
+        select(models.AirQualityReading.id).order_by(models.AirQualityReading.timestamp)
+    ).scalars().all()
+
+
+def test_offload_links_only_rows_with_payloads_and_drops_promoted_fields(db):
+    db.execute(text("ALTER TABLE air_quality_readings ADD COLUMN raw_data JSON"))
+    db.execute(
+        text(
+            "INSERT INTO air_quality_readings (timestamp, latitude, longitude, source, pm25, raw_data) "
+            "VALUES (:timestamp, 19.54, -96.91, 'legacy', 10.0, :raw_data)"
+        ),
+        [
+            {"timestamp": START, "raw_data": json.dumps({"pm2_5": 10.0, "pm25": 10.0, "aqi": 42})},
+            {"timestamp": START + timedelta(hours=1), "raw_data": "null"},
+            {"timestamp": START + timedelta(hours=2), "raw_data": json.dumps({"pm25": 10.0, "latitude": 19.54})},
+            {"timestamp": START + timedelta(hours=3), "raw_data": None},
+        ]
+    )
+    offload_raw_data("air_quality_readings", promoted_fields=PROMOTED_FIELDS)(db.connection())
+
+    first, null_payload, promoted_only, no_payload = _reading_ids(db)
+    linked = db.execute(
+        select(models.AirQualityReading.id).where(models.AirQualityReading.raw_batch_id.is_not(None))
+    ).scalars().all()
+    assert linked == [first]
+
+    [batch] = _batches(db)
+    assert batch.row_count == 1 and batch.end_time == START
+    assert decode_payloads(batch.codec, batch.payload) == {str(first): {"pm2_5": 10.0, "aqi": 42}}
+    assert RawPayloadRepository.get_payload(db, models.AirQualityReading, null_payload) is None
+
+
+def test_updated_rows_release_their_old_payloads(db):
+    AirQualityRepository.store_batch_readings(db, _readings(4, raw_data={"aqi": 1}))
+    [old_batch] = _batches(db)
+
+    revised = _readings(4, raw_data={"aqi": 2})
+    revised[0]["pm25"] = 99.0
+    revised[1]["pm25"] = 99.0
+    AirQualityRepository.store_batch_readings(db, revised)
+
+    ids = _reading_ids(db)
+    db.expire_all()
+    batches = {batch.id: batch for batch in _batches(db)}
+    assert batches[old_batch.id].row_count == 2
+    assert set(decode_payloads(old_batch.codec, old_batch.payload)) == {str(row_id) for row_id in ids[2:]}
+    assert RawPayloadRepository.get_payload(db, models.AirQualityReading, ids[0]) == {"aqi": 2}
+    assert RawPayloadRepository.get_payload(db, models.AirQualityReading, ids[3]) == {"aqi": 1}
+
+    # Una actualización sin payloads libera el resto y los lotes vacíos se eliminan
+    AirQualityRepository.store_batch_readings(db, _readings(4, pm25=50.0))
+    assert db.execute(select(func.count()).select_from(models.RawPayloadBatch)).scalar() == 0
+    assert RawPayloadRepository.get_payload(db, models.AirQualityReading, ids[0]) is None
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+import config
+import models
+from database import engine
+from migrations import MIGRATIONS
+from partitions import apply_retention
+from repositories.crud import AirQualityRepository
+
+
+def test_partitioning_is_not_a_startup_migration():
+    assert not any("partition" in version for version, _ in MIGRATIONS)
+
+
+def test_sqlite_retention_deletes_old_months_and_keeps_rollups(db, monkeypatch):
+    monkeypatch.setattr(config, "RETENTION_READINGS_MONTHS", 2)
+    monkeypatch.setattr(config, "RETENTION_TRAFFIC_MONTHS", 0)
+    AirQualityRepository.store_batch_readings(db, [
+        {"timestamp": datetime(2024, 1, 1) + timedelta(hours=6 * step), "latitude": 19.54,
+         "longitude": -96.91, "source": "openmeteo", "pm25": float(step)}
+        for step in range(4 * 120)
+    ])
+
+    actions = apply_retention(engine, now=datetime(2024, 4, 15))
+
+    assert [(action["month"], action["action"]) for action in actions] == [
+        ("2024-01", "delete_range (124 filas)")
+    ]
+    reading = models.AirQualityReading
+    assert db.scalar(select(func.min(reading.timestamp))) == datetime(2024, 2, 1)
+    rollup = models.AirQualityRollup
+    assert db.scalar(select(func.count()).where(
+        rollup.granularity == "day", rollup.bucket_start < datetime(2024, 2, 1)
+    )) == 31
@@ -0,0 +1,84 @@
+import math
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from aggregation import POLLUTANTS
+from repositories.crud import AirQualityRepository
+
+START = datetime(2024, 5, 1, 20)
+BUCKET_FORMATS = {"hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d 00:00:00"}
+
+
+def _readings(hours, offset=0.0):
+    readings = []
+    for hour in range(hours):
+        for minute in (0, 30):
+            for source, latitude in (("openmeteo", 19.54), ("sentinel5p", 19.53)):
+                readings.append({
+                    "timestamp": START + timedelta(hours=hour, minutes=minute),
+                    "latitude": latitude,
+                    "longitude": -96.91,
+                    "source": source,
+                    "pm25": 10.0 + hour + minute / 10 + offset,
+                    "pm10": None if hour % 5 == 0 else 20.0 + hour,
+                    "no2": 5.0,
+                    "o3": 30.0 - hour,
+                    "co": 0.2
+                })
+    return readings
+
+
+def _recomputed(db, granularity):
+    """Agregados por GROUP BY directamente sobre las lecturas crudas"""
+    columns = ", ".join(
+        f"COUNT({p}), SUM({p}), MIN({p}), MAX({p})" for p in POLLUTANTS
+    )
+    rows = db.execute(text(
+        f"SELECT source, strftime('{BUCKET_FORMATS[granularity]}', timestamp), COUNT(*), {columns} "
+        "FROM air_quality_readings GROUP BY 1, 2"
+    )).all()
+    return {(row[0], row[1]): tuple(row[2:]) for row in rows}
+
+
+def _stored(db, granularity):
+    columns = ", ".join(f"{p}_count, {p}_sum, {p}_min, {p}_max" for p in POLLUTANTS)
+    rows = db.execute(text(
+        f"SELECT source, strftime('%Y-%m-%d %H:%M:%S', bucket_start), count, {columns} "
+        "FROM air_quality_rollups WHERE granularity = :granularity"
+    ), {"granularity": granularity}).all()
+    return {(row[0], row[1]): tuple(row[2:]) for row in rows}
+
+
+def _assert_matches(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key, values in expected.items():
+        for want, got in zip(values, actual[key]):
+            if want is None or got is None:
+                assert want == got, key
+            else:
+                assert math.isclose(want, got, rel_tol=1e-9), key
+
+
+def test_rollups_match_recomputation_after_insert_and_update(db):
+    AirQualityRepository.store_batch_readings(db, _readings(8))
+
+    # Revisar parte de las horas (cruza la medianoche) y agregar horas nuevas
+    revised = _readings(12)
+    for reading in revised[8:24]:
+        reading["pm25"] += 7.5
+        reading["pm10"] = None
+    counts = AirQualityRepository.store_batch_readings(db, revised)
+    assert counts["updated"] == 16 and counts["inserted"] == 16
+
+    for granularity in ("hour", "day"):
+        _assert_matches(_recomputed(db, granularity), _stored(db, granularity))
+
+
+def test_unchanged_reingest_does_not_recompute_rollups(db):
+    AirQualityRepository.store_batch_readings(db, _readings(4))
+    db.execute(text("DELETE FROM air_quality_rollups"))
+    db.commit()
+
+    counts = AirQualityRepository.store_batch_readings(db, _readings(4))
+
+    assert counts["inserted"] == counts["updated"] == 0
+    assert db.execute(text("SELECT COUNT(*) FROM air_quality_rollups")).scalar() == 0
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+import models
+from repositories.crud import AirQualityRepository
+
+START = datetime(2024, 5, 1)
+
+
+def _readings(hours, pm25=10.0, source="openmeteo"):
+    return [
+        {
+            "timestamp": START + timedelta(hours=hour),
+            "latitude": 19.54381,
+            "longitude": -96.91023,
+            "source": source,
+            "pm25": pm25,
+            "pm10": 20.0
+        }
+        for hour in range(hours)
+    ]
+
+
+def _count(db):
+    return db.execute(select(func.count()).select_from(models.AirQualityReading)).scalar()
+
+
+def test_first_ingest_inserts_every_reading(db):
+    counts = AirQualityRepository.store_batch_readings(db, _readings(24))
+
+    assert counts == {"inserted": 24, "updated": 0, "skipped": 0}
+    assert _count(db) == 24
+
+
+def test_unchanged_reingest_is_skipped(db):
+    AirQualityRepository.store_batch_readings(db, _readings(24))
+    counts = AirQualityRepository.store_batch_readings(db, _readings(24))
+
+    assert counts == {"inserted": 0, "updated": 0, "skipped": 24}
+    assert _count(db) == 24
+
+
+def test_changed_values_update_in_place(db):
+    AirQualityRepository.store_batch_readings(db, _readings(24))
+    revised = _readings(24)
+    for reading in revised[:6]:
+        reading["pm25"] = 99.0
+    counts = AirQualityRepository.store_batch_readings(db, revised + _readings(26)[24:])
+
+    assert counts == {"inserted": 2, "updated": 6, "skipped": 18}
+    assert _count(db) == 26
+    values = db.execute(
+        select(models.AirQualityReading.pm25).order_by(models.AirQualityReading.timestamp)
+    ).scalars().all()
+    assert values[:6] == [99.0] * 6 and values[6:] == [10.0] * 20
+
+
+def test_duplicates_within_batch_keep_last_reading(db):
+    batch = _readings(3) + _readings(3, pm25=50.0)
+    counts = AirQualityRepository.store_batch_readings(db, batch)
+
+    assert counts == {"inserted": 3, "updated": 0, "skipped": 3}
+    assert set(db.execute(select(models.AirQualityReading.pm25)).scalars()) == {50.0}
+
+
+def test_coordinates_are_rounded_into_the_natural_key(db):
+    AirQualityRepository.store_batch_readings(db, _readings(1))
+    nearby = _readings(1)
+    nearby[0]["latitude"] += 0.00001
+    counts = AirQualityRepository.store_batch_readings(db, nearby)
+
+    assert counts == {"inserted": 0, "updated": 0, "skipped": 1}
+
+
+def test_missing_timestamp_uses_the_local_hour(db):
+    reading = {"latitude": 19.54, "longitude": -96.91, "source": "openmeteo", "pm25": 10.0}
+    before = datetime.now().replace(minute=0, second=0, microsecond=0)
+    first = AirQualityRepository.store_batch_readings(db, [reading])
+    second = AirQualityRepository.store_batch_readings(db, [{**reading, "timestamp": None}])
+    after = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    assert first["inserted"] == 1
+    # En la misma hora la segunda lectura cae en la misma clave natural
+    assert second["inserted"] == 0 or before != after
+    timestamp = db.execute(select(models.AirQualityReading.timestamp)).scalars().first()
+    assert before <= timestamp <= after
@@ -495,8 +495,21 @@ const AirQualityDashboard = () => {
         };
 
         fetchData();
-        const interval = setInterval(fetchData, 300000); // Cada 5 minutos
-        return () => clearInterval(interval);
+
+        // Actualizaciones en vivo desde el servidor; sondeo solo si no hay soporte SSE
+        if (!window.EventSource) {
+            const interval = setInterval(fetchData, 300000); // Cada 5 minutos
+            return () => clearInterval(interval);
+        }
+        const eventSource = new EventSource('/api/stream');
+        eventSource.addEventListener('readings', (event) => {
+            setAirQualityData(JSON.parse(event.data));
+            setDataSource('real');
+        });
+        eventSource.addEventListener('weather', (event) => {
+            setWeatherData(JSON.parse(event.data));
+        });
+        return () => eventSource.close();
     }, []);
 
     // Efecto para cargar datos meteorológicos
@@ -514,6 +527,8 @@ const AirQualityDashboard = () => {
         };
 
         fetchWeatherData();
+        // Con SSE el clima llega por el mismo canal que las lecturas
+        if (window.EventSource) return;
         const interval = setInterval(fetchWeatherData, 300000); // Actualizar cada 5 minutos
         return () => clearInterval(interval);
     }, []);